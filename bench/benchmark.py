@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# Offline benchmarks of likedtweetsv2.py and savemylikes.py, run against synthetic archives and the local mock server
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  rotation() archives an hour-old archive, as the hourly runs do
+
+# External modules/dependencies
+import argparse                # Parser for command-line options, arguments and sub-commands
+import contextlib              # Utilities for with-statement contexts
+import json                    # JSON encoder and decoder
+import mockserver              # Local stand-in for the liked_tweets and favorites/list endpoints
+import os                      # Miscellaneous operating system interfaces
+import platform                # Access to underlying platform's identifying data
+import shutil                  # High-level file operations
+import statistics              # Mathematical statistics functions
+import subprocess              # Subprocess management
+import sys                     # System-specific parameters and functions
+import synthetic               # Generator of synthetic archives
+import tempfile                # Generate temporary files and directories
+import time                    # Time access and conversions
+import tracemalloc             # Trace memory allocations
+from datetime import datetime, timedelta  # Basic date and time types
+
+# Global settings
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.ndjson')
+SIZES = '1000,10000'
+REPEAT = 3
+NAME = 'bench'
+OLD_TS = '2022-08-04-10'  # timestamp of the synthetic archives, see synthetic.TIMESTAMP
+NEW_TS = '2022-08-05-10'  # timestamp of the files written by the benchmarks
+
+# The scripts read LIKES_API_BASE when imported: the mock server is started first, the scripts are imported by main()
+likedtweetsv2 = None
+savemylikes = None
+
+
+def fetchV2(size, server):
+    """
+    fetchV2() fetches every like from the mock server with likedtweetsv2.fetchLikes(), i.e. the "full" pagination
+    """
+    journal = likedtweetsv2.PageJournal(NAME + '_likedtweets.journal', 'full')
+    start = time.perf_counter()
+    likedtweetsv2.fetchLikes(likedtweetsv2.createUrl('1'), 'synthetic', set(), {}, journal, None)
+    elapsed = time.perf_counter() - start
+    journal.discard()
+    return elapsed
+
+
+def fetchV1(size, server):
+    """
+    fetchV1() runs the "first" flavour of savemylikes.fetch_account(): fetches every like and saves the archive
+    """
+    config_json = {'BEARER': 'synthetic', 'last_timestamp': '', 'last_index_str': ''}
+    start = time.perf_counter()
+    savemylikes.fetch_account(NAME, config_json)
+    return time.perf_counter() - start
+
+
+def mergeExpansions(size, server):
+    """
+    mergeExpansions() merges 'data' and 'includes' of every page, the pages are built beforehand
+    """
+    pages = []
+    offset = 0
+    while offset < size:
+        page = server.v2Page({'max_results': '100', 'pagination_token': mockserver.TOKENPREFIX + format(offset, 'x'),
+            'expansions': 'author_id', 'tweet.fields': 'author_id,created_at,entities', 'user.fields': 'id,name,username'})
+        pages.append(page)
+        offset += 100
+    authors = {}
+    start = time.perf_counter()
+    for page in pages:
+        likedtweetsv2.mergeExpansions(page['data'], page['includes']['users'], authors)
+    return time.perf_counter() - start
+
+
+def saveStore(store):
+    """
+    saveStore() returns the benchmark of likedtweetsv2.saveData() with a given archive store: the whole archive,
+    already fetched as records, is saved
+    """
+    def save(size, server):
+        synthetic.generate(NAME, size)
+        archive = likedtweetsv2.likestore.JsonStore(NAME + '_likedtweets_' + OLD_TS + '.json')
+        tweets = list(likedtweetsv2.records.fromJson(archive.iterNewest()))
+        journal = likedtweetsv2.PageJournal(NAME + '_likedtweets.journal', 'full')
+        start = time.perf_counter()
+        compaction = likedtweetsv2.saveData(NAME, {'store': store}, tweets, None, journal, {})
+        if compaction is not None:
+            compaction.join()
+        return time.perf_counter() - start
+    return save
+
+
+def convert2HTML(size, server):
+    """
+    convert2HTML() renders the whole archive to HTML pages, none of them being reused
+    """
+    synthetic.generate(NAME, size)
+    shutil.rmtree(NAME + '_html', ignore_errors = True)
+    config_json = likedtweetsv2.readConf(NAME)
+    start = time.perf_counter()
+    archive = likedtweetsv2.openArchive(NAME, config_json)
+    authors = likedtweetsv2.readAuthors()
+    likedtweetsv2.convert2HTML(likedtweetsv2.loadRecords(archive.iterNewest(), authors), archive.count(), NAME, OLD_TS, authors)
+    return time.perf_counter() - start
+
+
+def printAll(size, server):
+    """
+    printAll() pretty prints the whole v1.1 archive with savemylikes.print_all(), oldest first, to /dev/null
+    """
+    synthetic.generate(NAME, size, 'v1')
+    with open(NAME + '_config.json', 'r') as config_in:
+        config_json = json.load(config_in)
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        savemylikes.print_all(savemylikes.open_archive(NAME, config_json))
+    return time.perf_counter() - start
+
+
+def rotation(size, server):
+    """
+    rotation() obsoletes an archive and its HTML index with likedtweetsv2.archiveFile(): snapshot into an empty _archive.
+    The archive is an hour old, as with hourly runs, so that the retention policy keeps the snapshot rather than
+    pruning it right away
+    """
+    old_ts = (datetime.now() - timedelta(hours = 1)).strftime('%Y-%m-%d-%H')
+    synthetic.generate(NAME, size, timestamp = old_ts)
+    with open(NAME + '_index_' + old_ts + '.html', 'w') as index_out:
+        index_out.write('<html></html>\n')
+    shutil.rmtree(likedtweetsv2.ARCHIVEDIR, ignore_errors = True)
+    os.mkdir(likedtweetsv2.ARCHIVEDIR)
+    start = time.perf_counter()
+    likedtweetsv2.archiveFile(NAME, old_ts)
+    elapsed = time.perf_counter() - start
+    import snapshots               # Content-deduplicated snapshots, importable once main() added ROOT to the path
+    if old_ts not in snapshots.listSnapshots(likedtweetsv2.ARCHIVEDIR, NAME):
+        raise RuntimeError('snapshot ' + old_ts + ' was pruned by the run that took it')
+    return elapsed
+
+
+BENCHMARKS = {
+    'fetch_v2': fetchV2,
+    'fetch_v1': fetchV1,
+    'merge_expansions': mergeExpansions,
+    'save_json': saveStore('json'),
+    'save_blocks': saveStore('blocks'),
+    'convert2html': convert2HTML,
+    'print_all': printAll,
+    'rotation': rotation
+}
+
+
+def runBenchmark(name, size, server, repeat, memory):
+    """
+    runBenchmark() runs a benchmark 'repeat' times, each time in a new empty directory and with its output discarded.
+    Returns the result: best and median time and, if asked, the peak of memory allocated by one more run
+    Args:
+    - name (string): one of BENCHMARKS
+    - size (int): number of likes
+    - server (LikesServer): mock server, serving 'size' likes
+    - repeat (int): number of runs
+    - memory (bool): whether the peak of memory is measured, tracemalloc slows the run down so it isn't timed
+    """
+    server.count = size
+    timings = []
+    peak = None
+    for run in range(repeat + (1 if memory else 0)):
+        workdir = tempfile.mkdtemp(prefix = 'likes-bench-')
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                if run < repeat:
+                    timings.append(BENCHMARKS[name](size, server))
+                else:
+                    tracemalloc.start()
+                    BENCHMARKS[name](size, server)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors = True)
+    return {'benchmark': name, 'size': size, 'repeat': repeat, 'best': min(timings), 'median': statistics.median(timings),
+        'peak': peak}
+
+
+def revision():
+    """
+    revision() returns the abbreviated hash of the current git commit, '' when not available
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd = ROOT, stderr = subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def readResults(filename):
+    """
+    readResults() returns the recorded results grouped by run, oldest run first
+    Args:
+    - filename (string): results file, NDJSON
+    """
+    runs = {}
+    try:
+        with open(filename, 'r') as results_in:
+            for line in results_in:
+                result = json.loads(line)
+                runs.setdefault(result['run'], []).append(result)
+    except FileNotFoundError:
+        pass
+    return [runs[run] for run in sorted(runs)]
+
+
+def compareRuns(filename):
+    """
+    compareRuns() prints the results of the last run next to those of the previous one, as best times and their ratio
+    Args:
+    - filename (string): results file, NDJSON
+    """
+    runs = readResults(filename)
+    if len(runs) < 2:
+        print('[-] At least two runs are needed, ' + str(len(runs)) + ' found in ' + filename)
+        return
+    previous = {(result['benchmark'], result['size']): result for result in runs[-2]}
+    print('[+] ' + runs[-2][0]['run'] + ' (' + runs[-2][0]['revision'] + ') vs ' + runs[-1][0]['run'] + ' (' + runs[-1][0]['revision'] + ')')
+    for result in runs[-1]:
+        before = previous.get((result['benchmark'], result['size']))
+        line = format(result['benchmark'], '18') + format(result['size'], '>9') + '  ' + format(result['best'], '9.4f') + 's'
+        if before is not None:
+            line += '  was ' + format(before['best'], '9.4f') + 's  x' + format(result['best'] / before['best'], '.2f')
+        print(line)
+
+
+def main():
+    """
+    main() handles the input (through argparse), runs the benchmarks and appends the results to the results file
+    """
+    global likedtweetsv2, savemylikes
+    parser = argparse.ArgumentParser(description = 'Benchmarks the fetch, merge, save, HTML, print and rotation steps offline.')
+    parser.add_argument('-n', '--sizes', metavar = '<N,N>', default = SIZES, type = str, help = 'Comma-separated archive sizes, in likes')
+    parser.add_argument('-b', '--bench', metavar = '<name,name>', default = ','.join(BENCHMARKS), type = str, help = 'Benchmarks to run: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('-r', '--repeat', metavar = '<N>', default = REPEAT, type = int, help = 'Runs of each benchmark, the best and the median are recorded')
+    parser.add_argument('-m', '--memory', action = 'store_true', help = 'Also measure the peak of allocated memory (one more, untimed, run)')
+    parser.add_argument('-o', '--output', metavar = '<file>', default = RESULTS, type = str, help = 'Results file, NDJSON, appended to')
+    parser.add_argument('-c', '--compare', action = 'store_true', help = 'Compare the last two runs recorded in the results file, then quit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compareRuns(args.output)
+        sys.exit(0)
+    names = args.bench.split(',')
+    for name in names:
+        if name not in BENCHMARKS:
+            print('[-] Unknown benchmark: ' + name)
+            sys.exit(10)
+
+    server = mockserver.startServer(0, limit = 1 << 30)
+    os.environ['LIKES_API_BASE'] = server.url
+    sys.path.insert(0, ROOT)
+    import likedtweetsv2 as v2
+    import savemylikes as v1
+    likedtweetsv2, savemylikes = v2, v1
+    likedtweetsv2.ISVERBOSE = savemylikes.ISVERBOSE = False
+    likedtweetsv2.TIMESTAMP = savemylikes.TIMESTAMP = NEW_TS
+
+    run = datetime.now().isoformat(timespec = 'seconds')
+    header = {'run': run, 'revision': revision(), 'python': platform.python_version()}
+    print('[+] Run ' + run + ', revision ' + (header['revision'] or 'N/A') + ', Python ' + header['python'])
+    with open(args.output, 'a') as results_out:
+        for size in [int(size) for size in args.sizes.split(',')]:
+            for name in names:
+                result = dict(header, **runBenchmark(name, size, server, args.repeat, args.memory))
+                results_out.write(json.dumps(result) + '\n')
+                results_out.flush()
+                print('[+] ' + format(name, '18') + format(size, '>9') + '  best ' + format(result['best'], '.4f') + 's, median '
+                    + format(result['median'], '.4f') + 's' + ('' if result['peak'] is None else ', peak ' + format(result['peak'] / 1e6, '.1f') + 'MB'))
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# Local stand-in for the liked_tweets (API v2) and favorites/list (API v1.1) endpoints, serving synthetic likes
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  429 responses carry Retry-After
+
+# External modules/dependencies
+import argparse                # Parser for command-line options, arguments and sub-commands
+import json                    # JSON encoder and decoder
+import random                  # Generate pseudo-random numbers
+import re                      # Regular expression operations
+import synthetic               # Generator of synthetic likes, shared with the archive generator
+import threading               # Thread-based parallelism
+import time                    # Time access and conversions
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # HTTP servers
+from urllib.parse import parse_qs, urlsplit  # Parse URLs into components
+
+# Global settings
+PORT = 8765
+V2PATH = re.compile(r'^/2/users/(\w+)/liked_tweets$')
+V1PATH = '/1.1/favorites/list.json'
+V2PAGE = (10, 100)    # default and largest max_results
+V1PAGE = (20, 200)    # default and largest count
+LIMIT = 75            # requests per window and per bearer token, as for both endpoints
+WINDOW = 900          # seconds, rate limit window
+TOKENPREFIX = '7140dibdnow9c7btw'  # next_token is opaque, it encodes the offset of the next page
+
+
+class LikesServer(ThreadingHTTPServer):
+    """
+    LikesServer serves 'count' synthetic likes, newest first, with the pagination of both APIs (next_token for v2,
+    max_id/since_id for v1.1), the fields asked by tweet.fields/user.fields/include_entities, and the rate-limit
+    headers of a window of 'limit' requests per bearer token. Each response is delayed by 'latency' seconds, give or
+    take 50%, and fails with a 503 with probability 'error_rate'
+    Args:
+    - address (tuple): host and port, port 0 picks a free one
+    - count (int): number of likes
+    - latency (float): seconds, average delay of a response
+    - limit (int): requests per window and per bearer token
+    - window (float): seconds, length of the rate limit window
+    - error_rate (float): probability of a 503 response
+    - seed (int): seed of the generator, see synthetic.py
+    """
+    daemon_threads = True
+
+    def __init__(self, address, count, latency = 0.0, limit = LIMIT, window = WINDOW, error_rate = 0.0, seed = synthetic.SEED):
+        super().__init__(address, Handler)
+        self.count = count
+        self.latency = latency
+        self.limit = limit
+        self.window = window
+        self.error_rate = error_rate
+        self.seed = seed
+        self.budgets = {}  # (endpoint, bearer token) -> (requests, reset)
+        self.requests = 0
+        self.sent = 0
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+
+    @property
+    def url(self):
+        """
+        url is the base URL of the server, to be set as LIKES_API_BASE
+        """
+        return 'http://' + self.server_address[0] + ':' + str(self.server_address[1])
+
+    def budget(self, endpoint, token):
+        """
+        budget() counts a request against the rate limit, returns the remaining requests and the reset time
+        """
+        now = time.time()
+        with self.lock:
+            requests, reset = self.budgets.get((endpoint, token), (0, now + self.window))
+            if now >= reset:
+                requests, reset = 0, now + self.window
+            requests += 1
+            self.budgets[(endpoint, token)] = (requests, reset)
+            self.requests += 1
+        return self.limit - requests, reset
+
+    def v2Page(self, query):
+        """
+        v2Page() returns a page of the liked_tweets endpoint as per the query parameters
+        """
+        size = min(int(query.get('max_results', V2PAGE[0])), V2PAGE[1])
+        token = query.get('pagination_token', '')
+        offset = int(token[len(TOKENPREFIX):], 16) if token.startswith(TOKENPREFIX) else 0
+        indexes = range(self.count - 1 - offset, max(self.count - 1 - offset - size, -1), -1)
+        if not indexes:
+            return {'meta': {'result_count': 0}}
+        tweet_fields = set(query.get('tweet.fields', '').split(',')) | {'id', 'text'}
+        user_fields = set(query.get('user.fields', '').split(',')) | {'id', 'name', 'username'}
+        data = []
+        authors = {}
+        for index in indexes:
+            tweet = synthetic.v2Tweet(index, self.count, self.seed)
+            data.append({key: value for key, value in tweet.items() if key in tweet_fields})
+            authors[tweet['author_id']] = int(tweet['author_id']) - 100000
+        page = {'data': data, 'meta': {'result_count': len(data), 'newest_id': data[0]['id'], 'oldest_id': data[-1]['id']}}
+        if 'author_id' in query.get('expansions', ''):
+            page['includes'] = {'users': [{key: value for key, value in synthetic.v2User(author).items() if key in user_fields}
+                for author in authors.values()]}
+        if indexes[-1] > 0:
+            page['meta']['next_token'] = TOKENPREFIX + format(offset + size, 'x')
+        return page
+
+    def v1Page(self, query):
+        """
+        v1Page() returns a page of the favorites/list endpoint as per the query parameters
+        """
+        size = min(int(query.get('count', V1PAGE[0])), V1PAGE[1])
+        top = self.count - 1
+        if 'max_id' in query:
+            top = min(top, (int(query['max_id']) - synthetic.BASEID) // synthetic.IDSTEP)
+        bottom = 0
+        if 'since_id' in query:
+            bottom = max(bottom, (int(query['since_id']) - synthetic.BASEID) // synthetic.IDSTEP + 1)
+        entities = query.get('include_entities', 'true') not in ('false', '0')
+        page = []
+        for index in range(top, max(top - size, bottom - 1), -1):
+            tweet = synthetic.v1Tweet(index, self.count, self.seed, entities)
+            if query.get('tweet_mode') != 'extended':
+                tweet['text'] = tweet.pop('full_text')[:140]
+            page.append(tweet)
+        return page
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Handler answers the requests of LikesServer over keep-alive connections
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """
+        log_message() silences the log of each request
+        """
+        pass
+
+    def reply(self, status, body, headers):
+        """
+        reply() sends a JSON response with a Content-Length, as needed by keep-alive connections
+        """
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.lock:
+            self.server.sent += len(data)
+
+    def do_GET(self):
+        """
+        do_GET() serves a page of likes, or a 404, 429 or 503 error
+        """
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if V2PATH.match(url.path):
+            endpoint = 'v2'
+        elif url.path == V1PATH:
+            endpoint = 'v1'
+        else:
+            return self.reply(404, {'title': 'Not Found Error'}, {})
+        if self.server.latency:
+            time.sleep(self.server.latency * self.server.random.uniform(0.5, 1.5))
+        remaining, reset = self.server.budget(endpoint, self.headers.get('Authorization', ''))
+        headers = {'x-rate-limit-limit': str(self.server.limit), 'x-rate-limit-remaining': str(max(remaining, 0)),
+            'x-rate-limit-reset': str(int(reset))}
+        if remaining < 0:
+            headers['retry-after'] = str(max(int(reset - time.time()) + 1, 1))
+            return self.reply(429, {'title': 'Too Many Requests', 'status': 429}, headers)
+        if self.server.error_rate and self.server.random.random() < self.server.error_rate:
+            return self.reply(503, {'title': 'Service Unavailable', 'status': 503}, headers)
+        page = self.server.v2Page(query) if endpoint == 'v2' else self.server.v1Page(query)
+        self.reply(200, page, headers)
+
+
+def startServer(count, port = 0, **options):
+    """
+    startServer() starts a LikesServer on a background thread, returns the server
+    Args:
+    - count (int): number of likes
+    - port (int): port, 0 picks a free one
+    - options: latency, limit, window, error_rate, seed, see LikesServer
+    """
+    server = LikesServer(('127.0.0.1', port), count, **options)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
+
+
+def main():
+    """
+    main() handles the input (through argparse) and serves until Ctrl-C
+    """
+    parser = argparse.ArgumentParser(description = 'Serves synthetic likes through local liked_tweets and favorites/list endpoints.')
+    parser.add_argument('-n', '--count', metavar = '<N>', default = 1000, type = int, help = 'Number of likes')
+    parser.add_argument('-P', '--port', metavar = '<port>', default = PORT, type = int, help = 'Port to listen to')
+    parser.add_argument('-l', '--latency', metavar = '<seconds>', default = 0.0, type = float, help = 'Average delay of a response')
+    parser.add_argument('-L', '--limit', metavar = '<N>', default = LIMIT, type = int, help = 'Requests per rate limit window and bearer token')
+    parser.add_argument('-W', '--window', metavar = '<seconds>', default = WINDOW, type = float, help = 'Rate limit window')
+    parser.add_argument('-e', '--errors', metavar = '<rate>', default = 0.0, type = float, help = 'Probability of a 503 response')
+    parser.add_argument('-s', '--seed', metavar = '<N>', default = synthetic.SEED, type = int, help = 'Seed of the generator')
+    args = parser.parse_args()
+
+    server = LikesServer(('127.0.0.1', args.port), args.count, args.latency, args.limit, args.window, args.errors, args.seed)
+    print('[+] Serving ' + str(args.count) + ' likes on ' + server.url + ', run the scripts with LIKES_API_BASE=' + server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('[!] Interrupted, ' + str(server.requests) + ' requests served, ' + str(server.sent) + ' bytes sent')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# Start-up benchmark of likedtweetsv2.py and savemylikes.py: cold-start latency of each offline mode, import by import
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import argparse                # Parser for command-line options, arguments and sub-commands
+import benchmark               # Results file shared with the other benchmarks, see benchmark.compareRuns()
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+import platform                # Access to underlying platform's identifying data
+import re                      # Regular expression operations
+import shutil                  # High-level file operations
+import statistics              # Mathematical statistics functions
+import subprocess              # Subprocess management
+import sys                     # System-specific parameters and functions
+import synthetic               # Generator of synthetic archives
+import tempfile                # Generate temporary files and directories
+import time                    # Time access and conversions
+from datetime import datetime  # Basic date and time types
+
+# Global settings
+SIZE = 1000    # likes of the synthetic archives, small so that the start-up dominates
+REPEAT = 10
+TOP = 8        # slowest imports shown per mode by --imports
+NAME = 'bench'
+IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+# Mode -> script and arguments, each run in the directory holding the synthetic archives; none of them touches the network
+MODES = {
+    'python': (None, ['-c', 'pass']),  # bare interpreter, the floor of every mode
+    'v2-version': ('likedtweetsv2.py', ['-V']),
+    'v2-tohtml': ('likedtweetsv2.py', ['-t', NAME]),
+    'v2-facets': ('likedtweetsv2.py', ['-f', NAME]),
+    'v2-export': ('likedtweetsv2.py', ['-e', NAME, '--since', '2022-01-01', '-o', os.devnull]),
+    'v1-version': ('savemylikes.py', ['-V']),
+    'v1-print': ('savemylikes.py', ['-p', NAME]),
+    'v1-tohtml': ('savemylikes.py', ['-t', NAME]),
+    'v1-facets': ('savemylikes.py', ['-f', NAME]),
+}
+
+
+def command(mode, *options):
+    """
+    command() returns the command line of a mode
+    Args:
+    - mode (string): one of MODES
+    - options (strings): interpreter options, e.g. -X importtime
+    """
+    script, arguments = MODES[mode]
+    return [sys.executable, *options] + ([os.path.join(benchmark.ROOT, script)] if script else []) + arguments
+
+
+def timeMode(mode, repeat):
+    """
+    timeMode() runs a mode 'repeat' times, after one untimed run that builds the files it caches (HTML pages, facet
+    index, bytecode). Returns the wall-clock times in seconds
+    Args:
+    - mode (string): one of MODES
+    - repeat (int): number of timed runs
+    """
+    timings = []
+    for run in range(repeat + 1):
+        start = time.perf_counter()
+        subprocess.run(command(mode), stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL, check = True)
+        if run:
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def slowestImports(mode, top):
+    """
+    slowestImports() returns the modules imported first-hand by a mode (the script and the interpreter's own site
+    excluded) as (module, cumulative microseconds), slowest first, as reported by python -X importtime
+    Args:
+    - mode (string): one of MODES
+    - top (int): number of modules returned
+    """
+    result = subprocess.run(command(mode, '-X', 'importtime'), stdout = subprocess.DEVNULL, stderr = subprocess.PIPE,
+        text = True, check = True)
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match and not match.group(3) and match.group(4) not in ('site', 'encodings'):
+            imports.append((match.group(4), int(match.group(2))))
+    imports.sort(key = lambda entry: -entry[1])
+    return imports[:top]
+
+
+def main():
+    """
+    main() handles the input (through argparse), times the modes and appends the results to the results file
+    """
+    parser = argparse.ArgumentParser(description = 'Measures the cold-start latency of the offline modes of both scripts.')
+    parser.add_argument('-m', '--modes', metavar = '<name,name>', default = ','.join(MODES), type = str, help = 'Modes to run: ' + ', '.join(MODES))
+    parser.add_argument('-n', '--size', metavar = '<N>', default = SIZE, type = int, help = 'Likes of the synthetic archives')
+    parser.add_argument('-r', '--repeat', metavar = '<N>', default = REPEAT, type = int, help = 'Runs of each mode, the best and the median are recorded')
+    parser.add_argument('-i', '--imports', action = 'store_true', help = 'Also print the slowest imports of each mode')
+    parser.add_argument('-o', '--output', metavar = '<file>', default = benchmark.RESULTS, type = str, help = 'Results file, NDJSON, appended to')
+    args = parser.parse_args()
+
+    modes = args.modes.split(',')
+    for mode in modes:
+        if mode not in MODES:
+            print('[-] Unknown mode: ' + mode)
+            sys.exit(10)
+
+    workdir = tempfile.mkdtemp(prefix = 'likes-startup-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    os.environ['LIKES_API_BASE'] = 'http://127.0.0.1:9'  # discard port: a mode sending a request would fail
+    try:
+        synthetic.generate(NAME, args.size, 'v2')
+        synthetic.generate(NAME, args.size, 'v1')
+        run = datetime.now().isoformat(timespec = 'seconds')
+        header = {'run': run, 'revision': benchmark.revision(), 'python': platform.python_version()}
+        print('[+] Run ' + run + ', revision ' + (header['revision'] or 'N/A') + ', Python ' + header['python'])
+        with open(args.output, 'a') as results_out:
+            for mode in modes:
+                timings = timeMode(mode, args.repeat)
+                result = dict(header, benchmark = 'startup-' + mode, size = args.size, repeat = args.repeat,
+                    best = min(timings), median = statistics.median(timings), peak = None)
+                results_out.write(json.dumps(result) + '\n')
+                results_out.flush()
+                print('[+] ' + format(mode, '12') + '  best ' + format(result['best'] * 1000, '6.1f') + 'ms, median '
+                    + format(result['median'] * 1000, '6.1f') + 'ms')
+                if args.imports and MODES[mode][0]:
+                    for module, elapsed in slowestImports(mode, TOP):
+                        print('      ' + format(module, '28') + format(elapsed / 1000, '6.1f') + 'ms')
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors = True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# Generator of synthetic archives, API v2 (<name>_likedtweets_) and v1.1 (<name>_twitter_likes_) shapes, for benchmarking
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import argparse                # Parser for command-line options, arguments and sub-commands
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+import random                  # Generate pseudo-random numbers
+import sys                     # System-specific parameters and functions
+from datetime import datetime, timedelta, timezone  # Basic date and time types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import projection              # Field projection profiles
+import records                 # Compact in-memory tweet records
+
+# Global settings
+SEED = 20220804
+BASEID = 1200000000000000000  # ID of the oldest like, IDs grow with the index of the like (0 = oldest)
+IDSTEP = 1000003
+BASETIME = datetime(2015, 1, 1, tzinfo = timezone.utc)  # date of the oldest like
+TIMESTEP = 3600                # seconds, average interval between two likes
+TIMESTAMP = '2022-08-04-10'
+WORDS = ('the', 'python', 'likes', 'release', 'thread', 'today', 'data', 'open', 'source', 'new', 'api', 'twitter',
+    'benchmark', 'performance', 'memory', 'archive', 'html', 'json', 'great', 'read', 'why', 'how', 'we', 'you',
+    'über', 'café', '日本語', '🙂', '🚀', '#python', '#opensource', '@someone')
+V1DATE = '%a %b %d %H:%M:%S +0000 %Y'
+
+
+def authorCount(count):
+    """
+    authorCount() returns the number of distinct authors of an archive of 'count' likes: one every 20 likes, at least 10
+    """
+    return max(count // 20, 10)
+
+
+def likeAt(index, count, seed = SEED):
+    """
+    likeAt() returns the like at a given index as a tuple (tweet_id, author_index, created_at, text, urls, mentions, hashtags).
+    Likes are derived from their index only, so the same like is generated by the archive generator and the mock server.
+    Authors follow a skewed distribution: a few authors get most of the likes
+    Args:
+    - index (int): index of the like, 0 being the oldest
+    - count (int): number of likes of the archive, it sets the number of authors
+    - seed (int): seed of the generator
+    """
+    rng = random.Random(seed * 1000003 + index)
+    tweet_id = BASEID + index * IDSTEP
+    author = int(authorCount(count) ** rng.random()) - 1
+    created_at = BASETIME + timedelta(seconds = index * TIMESTEP + rng.randrange(TIMESTEP))
+    words = rng.choices(WORDS, k = rng.randint(3, 45))
+    urls = ['https://site' + str(rng.randrange(50)) + '.example.com/' + format(rng.getrandbits(48), 'x')
+        for _ in range(rng.choice((0, 0, 1, 1, 1, 2)))]
+    mentions = [word[1:] for word in words if word.startswith('@')]
+    hashtags = [word[1:] for word in words if word.startswith('#')]
+    text = ' '.join(words + ['https://t.co/' + format(rng.getrandbits(40), 'x') for url in urls])
+    return tweet_id, author, created_at, text, urls, mentions, hashtags
+
+
+def v2User(author):
+    """
+    v2User() returns an author as returned by API v2 in 'includes', all of the user fields of the 'full' profile set
+    """
+    return {'id': str(100000 + author), 'name': 'Author ' + str(author), 'username': 'author' + str(author),
+        'created_at': '2010-01-01T00:00:00.000Z', 'description': 'Synthetic author number ' + str(author),
+        'location': 'Earth', 'profile_image_url': 'https://pbs.example.com/' + str(author) + '_normal.jpg',
+        'protected': False, 'public_metrics': {'followers_count': author * 7, 'following_count': author * 3,
+        'tweet_count': author * 11, 'listed_count': author}, 'url': '', 'verified': author % 10 == 0}
+
+
+def v2Tweet(index, count, seed = SEED):
+    """
+    v2Tweet() returns a like as returned by API v2 with all of the tweet fields of the 'full' profile set
+    Args:
+    - index (int): index of the like, 0 being the oldest
+    - count (int): number of likes of the archive
+    - seed (int): seed of the generator
+    """
+    tweet_id, author, created_at, text, urls, mentions, hashtags = likeAt(index, count, seed)
+    tweet = {'id': str(tweet_id), 'text': text, 'author_id': str(100000 + author),
+        'created_at': created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z'), 'conversation_id': str(tweet_id), 'lang': 'en',
+        'possibly_sensitive': False, 'source': 'Twitter Web App',
+        'public_metrics': {'retweet_count': index % 13, 'reply_count': index % 5, 'like_count': index % 97, 'quote_count': index % 3}}
+    entities = {}
+    if urls:
+        entities['urls'] = [{'start': 0, 'end': 23, 'url': 'https://t.co/x', 'expanded_url': url, 'display_url': url[8:40]}
+            for url in urls]
+    if mentions:
+        entities['mentions'] = [{'start': 0, 'end': 8, 'username': mention} for mention in mentions]
+    if hashtags:
+        entities['hashtags'] = [{'start': 0, 'end': 7, 'tag': hashtag} for hashtag in hashtags]
+    if entities:
+        tweet['entities'] = entities
+    return tweet
+
+
+def v1Tweet(index, count, seed = SEED, entities = True):
+    """
+    v1Tweet() returns a like as returned by API v1.1 favorites/list with tweet_mode=extended, user object embedded
+    Args:
+    - index (int): index of the like, 0 being the oldest
+    - count (int): number of likes of the archive
+    - seed (int): seed of the generator
+    - entities (bool): whether the entities are included, see include_entities
+    """
+    tweet_id, author, created_at, text, urls, mentions, hashtags = likeAt(index, count, seed)
+    user = v2User(author)
+    tweet = {'created_at': created_at.strftime(V1DATE), 'id': tweet_id, 'id_str': str(tweet_id), 'full_text': text,
+        'truncated': False, 'display_text_range': [0, len(text)], 'source': '<a href="https://mobile.twitter.com">Twitter Web App</a>',
+        'in_reply_to_status_id': None, 'in_reply_to_status_id_str': None, 'in_reply_to_user_id': None,
+        'in_reply_to_user_id_str': None, 'in_reply_to_screen_name': None,
+        'user': {'id': int(user['id']), 'id_str': user['id'], 'name': user['name'], 'screen_name': user['username'],
+            'location': user['location'], 'description': user['description'], 'url': None, 'protected': False,
+            'followers_count': user['public_metrics']['followers_count'], 'friends_count': user['public_metrics']['following_count'],
+            'listed_count': user['public_metrics']['listed_count'], 'created_at': 'Fri Jan 01 00:00:00 +0000 2010',
+            'favourites_count': 0, 'verified': user['verified'], 'statuses_count': user['public_metrics']['tweet_count'],
+            'lang': None, 'profile_image_url_https': user['profile_image_url'], 'default_profile': True},
+        'geo': None, 'coordinates': None, 'place': None, 'contributors': None, 'is_quote_status': False,
+        'retweet_count': index % 13, 'favorite_count': index % 97, 'favorited': True, 'retweeted': False,
+        'possibly_sensitive': False, 'lang': 'en'}
+    if entities:
+        tweet['entities'] = {'hashtags': [{'text': hashtag, 'indices': [0, 7]} for hashtag in hashtags], 'symbols': [],
+            'user_mentions': [{'screen_name': mention, 'name': mention, 'indices': [0, 8]} for mention in mentions],
+            'urls': [{'url': 'https://t.co/x', 'expanded_url': url, 'display_url': url[8:40], 'indices': [0, 23]} for url in urls]}
+    return tweet
+
+
+def writeArchive(filename, tweets):
+    """
+    writeArchive() streams a JSON array to a file, same layout as json.dump(), without holding it in memory.
+    Returns the number of tweets written
+    Args:
+    - filename (string): name of the archive
+    - tweets (iterable): tweets, newest first
+    """
+    written = 0
+    with open(filename + '.tmp', 'w') as archive_out:
+        archive_out.write('[')
+        for tweet in tweets:
+            archive_out.write((', ' if written else '') + json.dumps(tweet))
+            written += 1
+        archive_out.write(']')
+    os.replace(filename + '.tmp', filename)
+    return written
+
+
+def generate(name, count, api = 'v2', profile = None, skip = 0, timestamp = TIMESTAMP, seed = SEED):
+    """
+    generate() writes a synthetic archive of 'count' likes into the current directory, together with the configuration
+    file (and, for v2, the author cache) that the scripts expect, so that -t, -p and incremental -g work on it.
+    Returns the name of the archive
+    Args:
+    - name (string): user name, i.e. prefix of the files
+    - count (int): number of likes served by the mock server, see mockserver.py
+    - api (string): 'v2' or 'v1'
+    - profile (string): projection profile of the stored records, defaults to the one of the script
+    - skip (int): newest likes left out of the archive, i.e. new likes found by the next incremental fetch
+    - timestamp (string): timestamp of the archive
+    - seed (int): seed of the generator
+    """
+    indexes = range(count - 1 - skip, -1, -1)
+    if api == 'v2':
+        profile = profile or 'html'
+        filename = name + '_likedtweets_' + timestamp + '.json'
+        writeArchive(filename, (records.Tweet.fromJson(v2Tweet(index, count, seed), profile).toJson() for index in indexes))
+        authors = {}
+        for author in range(authorCount(count)):
+            user = v2User(author)
+            authors[user.pop('id')] = user if profile == 'full' else {'name': user['name'], 'username': user['username']}
+        with open('_authors.json', 'w') as authors_out:
+            json.dump(authors, authors_out)
+        config_json = {'twitter_id': '1', 'BEARER': 'synthetic', 'last_timestamp': timestamp, 'last_count': len(indexes),
+            'profile': profile}
+        with open(name + '_configv2.json', 'w') as config_out:
+            json.dump(config_json, config_out)
+    else:
+        profile = profile or 'full'
+        filename = name + '_twitter_likes_' + timestamp + '.json'
+        writeArchive(filename, (projection.projectV1(v1Tweet(index, count, seed), profile) for index in indexes))
+        config_json = {'BEARER': 'synthetic', 'last_timestamp': timestamp, 'last_count': len(indexes), 'profile': profile,
+            'last_index_str': str(BASEID + indexes[0] * IDSTEP) if indexes else ''}
+        with open(name + '_config.json', 'w') as config_out:
+            json.dump(config_json, config_out)
+    return filename
+
+
+def main():
+    """
+    main() handles the input (through argparse) and writes the archive
+    """
+    parser = argparse.ArgumentParser(description = 'Writes a synthetic archive of liked tweets, plus its configuration file.')
+    parser.add_argument('-n', '--count', metavar = '<N>', default = 1000, type = int, help = 'Number of likes, e.g. 1000 to 1000000')
+    parser.add_argument('-a', '--api', choices = ('v2', 'v1'), default = 'v2', help = 'Archive shape: v2 (likedtweetsv2.py) or v1 (savemylikes.py)')
+    parser.add_argument('-u', '--user', metavar = '<User name>', default = 'bench', type = str, help = 'User name, prefix of the files')
+    parser.add_argument('-p', '--profile', choices = projection.PROFILES, default = None, help = 'Projection profile of the records')
+    parser.add_argument('-k', '--skip', metavar = '<N>', default = 0, type = int, help = 'Newest likes left out, found by the next -g')
+    parser.add_argument('-s', '--seed', metavar = '<N>', default = SEED, type = int, help = 'Seed of the generator')
+    parser.add_argument('-d', '--dir', metavar = '<directory>', default = '.', type = str, help = 'Destination directory')
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok = True)
+    os.chdir(args.dir)
+    filename = generate(args.user, args.count, args.api, args.profile, args.skip, seed = args.seed)
+    print('[+] ' + filename + ': ' + str(max(args.count - args.skip, 0)) + ' likes, ' + str(os.path.getsize(filename)) + ' bytes')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# Changelog of the liked/unliked tweets between runs, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+from array import array        # Efficient arrays of numeric values
+
+
+def idVector(ids):
+    """
+    idVector() returns the given tweet IDs as a sorted vector of unsigned 64-bit integers, duplicates removed
+    Args:
+    - ids (iterable): tweet IDs, as strings or integers
+    """
+    return array('Q', sorted({int(tweet_id) for tweet_id in ids}))
+
+
+def diff(previous, current):
+    """
+    diff() compares two sorted ID vectors with a single linear merge, returns the vectors of added and removed IDs
+    Args:
+    - previous (array): IDs of the previous archive, as returned by idVector()
+    - current (array): IDs of the new archive, as returned by idVector()
+    """
+    added, removed = array('Q'), array('Q')
+    i, j = 0, 0
+    while i < len(previous) and j < len(current):
+        if previous[i] == current[j]:
+            i += 1
+            j += 1
+        elif previous[i] < current[j]:
+            removed.append(previous[i])
+            i += 1
+        else:
+            added.append(current[j])
+            j += 1
+    removed.extend(previous[i:])
+    added.extend(current[j:])
+    return added, removed
+
+
+def record(filename, timestamp, previous_ts, mode, added, removed):
+    """
+    record() appends an entry to the changelog, an NDJSON file with one line per run: timestamps of the new and of
+    the previous archive, kind of run, added and removed IDs (as strings). Consumers sync by reading the lines
+    written after the offset they've reached, see readChangelog()
+    Args:
+    - filename (string): name of the changelog, e.g. <name>_changelog.ndjson
+    - timestamp (string): timestamp of the new archive
+    - previous_ts (string): timestamp of the previous archive, '' if none
+    - mode (string): kind of run, e.g. 'full' or 'incremental'; only full runs can detect removed IDs
+    - added (array): added IDs
+    - removed (array): removed IDs
+    """
+    entry = {'timestamp': timestamp, 'previous': previous_ts, 'mode': mode,
+        'added': [str(tweet_id) for tweet_id in added], 'removed': [str(tweet_id) for tweet_id in removed]}
+    with open(filename, 'a') as changelog_out:
+        changelog_out.write(json.dumps(entry) + '\n')
+        changelog_out.flush()
+        os.fsync(changelog_out.fileno())
+
+
+def readChangelog(filename, offset = 0):
+    """
+    readChangelog() yields the entries of a changelog from a given byte offset on, oldest first, as (offset, entry):
+    the offset following each entry is where the next read should start from
+    Args:
+    - filename (string): name of the changelog
+    - offset (int): offset reached by the previous read, 0 for all of the entries
+    """
+    try:
+        with open(filename, 'rb') as changelog_in:
+            changelog_in.seek(offset)
+            for line in changelog_in:
+                if not line.endswith(b'\n'):
+                    break  # line truncated by a crash, or still being written
+                offset += len(line)
+                yield offset, json.loads(line)
+    except FileNotFoundError:
+        return
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# Facet indexes (likes per author, URL domain and day) and buffered export of the archive, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  csv is imported by the CSV export only
+
+# External modules/dependencies
+import json                    # JSON encoder and decoder
+import likesdb                 # normalize() reads both the v1.1 and the v2 schema
+import likestore               # Archive storage backends, BlockStore reads date ranges
+import sys                     # System-specific parameters and functions
+from datetime import datetime  # Basic date and time types
+from journal import atomicDump  # Atomic write-then-rename of JSON documents
+from urllib.parse import urlsplit  # Parse URLs into components
+# csv (CSV file reading and writing) is imported by exportArchive() when needed
+
+# Global settings
+FACETS = ('authors', 'domains', 'days', 'months', 'years')  # months and years are summed up from days
+FORMATS = ('ndjson', 'csv', 'pretty')
+BUFSIZE = 1 << 16  # bytes, buffer of the export writer
+TOP = 20           # rows shown per facet
+COLUMNS = ('id', 'created_at', 'author_id', 'username', 'name', 'text', 'urls')
+
+
+def domainOf(url):
+    """
+    domainOf() returns the domain of a URL, lowercase and without 'www.', None if the URL has none
+    """
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if host and host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def checkDate(day):
+    """
+    checkDate() returns a day given as YYYY-MM-DD, ValueError is raised when it's malformed
+    """
+    if day is not None:
+        datetime.strptime(day, '%Y-%m-%d')
+    return day
+
+
+class FacetIndex:
+    """
+    FacetIndex counts the likes of an archive per author, per URL domain and per day (created_at of the tweets), so that
+    "likes per author", "most liked domains" or "likes per month" are answered without reading the archive. It's kept
+    next to the archive, e.g. <name>_likedtweets_facets.json, and maintained at save time, see updateFacets().
+    Handles are recorded when the tweets embed them (v1.1), the author cache gives them otherwise
+    Args:
+    - filename (string): name of the index, read if it exists, None for an empty index
+    """
+    def __init__(self, filename = None):
+        self.timestamp = None  # timestamp of the archive the index was built for
+        self.count = 0
+        self.authors, self.domains, self.days, self.handles = {}, {}, {}, {}
+        if filename is not None:
+            try:
+                with open(filename, 'r') as facets_in:
+                    facets_json = json.load(facets_in)
+            except FileNotFoundError:
+                return
+            self.timestamp, self.count = facets_json['timestamp'], facets_json['count']
+            self.authors, self.domains = facets_json['authors'], facets_json['domains']
+            self.days, self.handles = facets_json['days'], facets_json['handles']
+
+    def add(self, tweets):
+        """
+        add() counts the given tweets
+        Args:
+        - tweets (iterable): tweets, v2 records or v1.1 objects
+        """
+        authors, domains, days = self.authors, self.domains, self.days
+        for tweet in tweets:
+            tweet_id, created_at, text, author, urls = likesdb.normalize(tweet)
+            authors[author[0]] = authors.get(author[0], 0) + 1
+            if author[2] is not None:
+                self.handles[author[0]] = author[2]
+            for domain in {domainOf(url) for url in urls} - {None}:
+                domains[domain] = domains.get(domain, 0) + 1
+            days[created_at[:10]] = days.get(created_at[:10], 0) + 1
+            self.count += 1
+
+    def write(self, filename, timestamp):
+        """
+        write() atomically saves the index, built for the archive of a given timestamp
+        """
+        self.timestamp = timestamp
+        atomicDump({'timestamp': timestamp, 'count': self.count, 'authors': self.authors, 'domains': self.domains,
+            'days': self.days, 'handles': self.handles}, filename)
+
+    def top(self, facet, limit = TOP, authors = None):
+        """
+        top() returns the rows of a facet as (value, likes): authors and domains most liked first, days, months and years
+        newest first
+        Args:
+        - facet (string): one of FACETS
+        - limit (int): maximum number of rows, None for all of them
+        - authors (dict): author cache, gives the handles the index doesn't hold
+        """
+        if facet in ('days', 'months', 'years'):
+            width = {'days': 10, 'months': 7, 'years': 4}[facet]
+            counts = {}
+            for day, likes in self.days.items():
+                counts[day[:width]] = counts.get(day[:width], 0) + likes
+            rows = sorted(counts.items(), reverse = True)
+        else:
+            rows = sorted(getattr(self, facet).items(), key = lambda row: (-row[1], row[0]))
+        rows = rows[:limit]
+        if facet == 'authors':
+            authors = authors or {}
+            rows = [('@' + (self.handles.get(author_id) or authors.get(author_id, {}).get('username', 'N/A')) + ' (' + author_id + ')', likes)
+                for author_id, likes in rows]
+        return rows
+
+
+def updateFacets(filename, new_tweets, timestamp, incremental, total, archive):
+    """
+    updateFacets() maintains the facet index when an archive is saved: after an incremental run the new tweets are added
+    to the index, unless it doesn't match the previous archive (missing, or left behind by an interrupted run) in which
+    case it's rebuilt from the new archive. After a full run the index is rebuilt from the tweets, i.e. the whole archive
+    Args:
+    - filename (string): name of the index, e.g. <name>_likedtweets_facets.json
+    - new_tweets (list): tweets saved by the run, v2 records or v1.1 objects
+    - timestamp (string): timestamp of the new archive
+    - incremental (bool): whether the new tweets were added on top of the previous archive
+    - total (int): number of tweets of the new archive
+    - archive (JsonStore/SegmentStore/BlockStore): the new archive, read when the index is rebuilt
+    """
+    index = FacetIndex(filename) if incremental else FacetIndex()
+    if not incremental:
+        index.add(new_tweets)
+    elif index.timestamp is not None and index.count + len(new_tweets) == total:
+        index.add(new_tweets)
+    else:
+        index = FacetIndex()
+        index.add(archive.iterNewest())
+    index.write(filename, timestamp)
+    return index
+
+
+def openOutput(filename = None):
+    """
+    openOutput() returns a text stream with a BUFSIZE buffer, writing to a file or to the standard output.
+    Closing it flushes the buffer, the standard output itself is left open
+    Args:
+    - filename (string): output file, None for the standard output
+    """
+    if filename is None:
+        sys.stdout.flush()
+        return open(sys.stdout.fileno(), 'w', buffering = BUFSIZE, encoding = 'utf-8', closefd = False)
+    return open(filename, 'w', buffering = BUFSIZE, encoding = 'utf-8', newline = '')
+
+
+def exportArchive(archive, out, fmt = 'ndjson', author = None, domain = None, since = None, until = None, authors = None):
+    """
+    exportArchive() streams the tweets of an archive matching the filters, newest first, to a text stream.
+    Tweets are normalized whatever the schema: id, created_at (ISO 8601), author_id, username, name, text and URLs.
+    A block archive only reads the blocks overlapping the date range. Returns the number of exported tweets
+    Args:
+    - archive (JsonStore/SegmentStore/BlockStore): the archive
+    - out (stream): output, see openOutput()
+    - fmt (string): one of FORMATS
+    - author (string): author handle (w/o @) or author_id
+    - domain (string): URL domain, its subdomains match too
+    - since (string): first day, ISO 8601 e.g. 2022-08-01
+    - until (string): last day, ISO 8601 e.g. 2022-08-31
+    - authors (dict): author cache, gives the details of the authors the tweets don't embed
+    """
+    authors = authors or {}
+    author = author.lstrip('@').lower() if author else None
+    domain = domain.lower() if domain else None
+    if isinstance(archive, likestore.BlockStore) and (since or until):
+        tweets = archive.iterRange(since or '', until or '9999')
+    else:
+        tweets = archive.iterNewest()
+    writer = None
+    if fmt == 'csv':
+        import csv                     # CSV file reading and writing
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+    exported = 0
+    for tweet in tweets:
+        tweet_id, created_at, text, (author_id, name, username), urls = likesdb.normalize(tweet)
+        if since and created_at[:10] < since or until and created_at[:10] > until:
+            continue
+        if username is None:
+            name, username = authors.get(author_id, {}).get('name'), authors.get(author_id, {}).get('username')
+        if author and author != author_id and author != (username or '').lower():
+            continue
+        if domain and not any(host == domain or host.endswith('.' + domain) for host in (domainOf(url) or '' for url in urls)):
+            continue
+        if fmt == 'ndjson':
+            out.write(json.dumps({'id': str(tweet_id), 'created_at': created_at, 'author_id': author_id, 'username': username,
+                'name': name, 'text': text, 'urls': urls}, ensure_ascii = False) + '\n')
+        elif fmt == 'csv':
+            writer.writerow((tweet_id, created_at, author_id, username, name, text, ' '.join(urls)))
+        else:
+            out.write('{\n\t"TWEET_ID": "' + str(tweet_id) + '",\n\t"TWEET_FULL_TEXT": """' + text + '""",\n\t"TWEET_DATE": "'
+                + created_at + '",\n\t"USER_ID": "' + author_id + '",\n\t"USER_NAME": "' + str(name or 'N/A')
+                + '",\n\t"USER_HANDLE": "' + str(username or 'N/A') + '",\n\t"URL": "' + (urls[0] if urls else 'N/A') + '"\n}\n\n')
+        exported += 1
+    return exported
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# Streaming, paginated HTML renderer shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version, replaces json2html
+#  2026-10-17  Pages whose rows didn't change since the previous run are reused, see MANIFEST
+#  2026-10-17  Client-side search index and page, see searchindex.py
+#  2026-10-17  The entry page is written atomically, see publish.py
+#  2026-10-17  An unchanged manifest or entry page isn't written again
+#  2026-10-17  Only the changed pages are added to the search index
+
+# External modules/dependencies
+import hashlib                 # Secure hashes and message digests
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+import publish                 # Atomic write-then-rename of the output files
+import searchindex             # Client-side search index of the pages
+from html import escape        # Escape special HTML characters
+from journal import atomicDump  # Atomic write-then-rename of JSON documents
+
+# Global settings
+PAGESIZE = 1000  # rows per page
+MANIFEST = 'manifest.json'  # content hash and row range of each page, kept next to the pages
+STYLE = ('table { border-collapse: collapse; } th, td { border: 1px solid #999; padding: 4px; vertical-align: top; } '
+    'td table td { border: none; padding: 0 4px; } nav { margin: 8px 0; }')
+TAIL = '</body></html>\n'
+ROWFORMAT = 2  # bumped whenever the markup of the rows changes, so that the pages are rendered again
+HEADER = '<th>ROW</th><th>USER INFO</th><th>TWEET INFO</th><th>FULL TEXT</th><th>URL</th>'
+
+
+def pageDir(name):
+    """
+    pageDir() returns the directory holding the pages of an account, e.g. <name>_html
+    Args:
+    - name (string): Twitter user name
+    """
+    return name + '_html'
+
+
+def pageName(number):
+    """
+    pageName() returns the file name of a page, e.g. page-0001.html
+    Args:
+    - number (int): page number, 1 being the page of the oldest likes
+    """
+    return 'page-' + format(number, '04d') + '.html'
+
+
+def renderRow(ordinal, row):
+    """
+    renderRow() returns a table row
+    Args:
+    - ordinal (int): ROW value, i.e. position of the like counting from the oldest (0)
+    - row (tuple): (user_id, user_name, user_handle, tweet_id, tweet_date, text, url)
+    """
+    user_id, user_name, user_handle, tweet_id, tweet_date, text, url = row
+    if url != 'N/A':
+        url_cell = '<a href="' + escape(url) + '">' + escape(url) + '</a>'
+    else:
+        url_cell = url
+    return ('<tr id="r' + str(ordinal) + '"><td>' + str(ordinal) + '</td>'
+        + '<td><table><tr><th>USER_ID</th><td>' + escape(str(user_id)) + '</td></tr>'
+        + '<tr><th>USER_NAME</th><td>' + escape(str(user_name)) + '</td></tr>'
+        + '<tr><th>USER_HANDLE</th><td>' + escape(str(user_handle)) + '</td></tr></table></td>'
+        + '<td><table><tr><th>TWEET_ID</th><td>' + escape(str(tweet_id)) + '</td></tr>'
+        + '<tr><th>TWEET_DATE</th><td>' + escape(str(tweet_date)) + '</td></tr></table></td>'
+        + '<td>' + escape(text) + '</td><td>' + url_cell + '</td></tr>\n')
+
+
+def _navigation(name, number, pages):
+    """
+    _navigation() returns the navigation bar of a page: index, newer and older pages
+    """
+    links = ['<a href="../' + escape(name) + '_index_latest.html">index</a>', '<a href="' + searchindex.SEARCHPAGE + '">search</a>']
+    if number < pages:
+        links.append('<a href="' + pageName(number + 1) + '">&larr; newer</a>')
+    if number > 1:
+        links.append('<a href="' + pageName(number - 1) + '">older &rarr;</a>')
+    return '<nav>' + ' | '.join(links) + '</nav>\n'
+
+
+def _head(title):
+    """
+    _head() returns the beginning of an HTML document, up to the opening of its body
+    """
+    return ('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>' + escape(title) + '</title>'
+        + '<style>' + STYLE + '</style></head><body>\n')
+
+
+class PageWriter:
+    """
+    PageWriter streams the rows of a single page straight to disk, the page only replaces the previous version
+    once it's complete
+    Args:
+    - filename (string): page file name
+    - title (string): page title
+    - navigation (string): navigation bar
+    """
+    def __init__(self, filename, title, navigation):
+        self.filename = filename
+        self.navigation = navigation
+        self.temporary = publish.tempName(filename)
+        self.file = open(self.temporary, 'w')
+        self.file.write(_head(title) + navigation + '<table><thead><tr>' + HEADER + '</tr></thead>\n')
+
+    def write(self, text):
+        """
+        write() appends a rendered row
+        """
+        self.file.write(text)
+
+    def close(self):
+        """
+        close() terminates the document and moves it to its final name
+        """
+        self.file.write('</table>\n' + self.navigation + TAIL)
+        self.file.close()
+        os.replace(self.temporary, self.filename)
+
+
+def readManifest(directory):
+    """
+    readManifest() returns the pages rendered by the previous run, keyed by page number (as string):
+    content hash, first and last ROW, oldest and newest TWEET_DATE. A manifest written with a different PAGESIZE is ignored
+    Args:
+    - directory (string): directory holding the pages
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST), 'r') as manifest_in:
+            manifest = json.load(manifest_in)
+    except FileNotFoundError:
+        return {}
+    if manifest.get('pagesize') != PAGESIZE:
+        return {}
+    return manifest['pages']
+
+
+def renderArchive(rows, total, name, timestamp):
+    """
+    renderArchive() streams the rows to fixed-size pages and writes the entry page <name>_index_<timestamp>.html
+    listing them, newest first. Pages are anchored to the oldest like (page 1 holds ROW 0 to PAGESIZE-1) so that new
+    likes only ever touch the newest pages. The rows of each page are hashed, a page is only rendered (and added to the
+    search index, see searchindex.py) when its hash differs from the one recorded in the manifest by the previous run,
+    otherwise the existing file is reused. Only one page of rows is held in memory.
+    Returns the number of rows, of pages and of pages actually rendered
+    Args:
+    - rows (iterable): rows as (user_id, user_name, user_handle, tweet_id, tweet_date, text, url), newest first
+    - total (int): number of rows
+    - name (string): Twitter user name
+    - timestamp (string): timestamp of the entry page
+    """
+    directory = pageDir(name)
+    os.makedirs(directory, exist_ok = True)
+    pages = max(-(-total // PAGESIZE), 1)
+    previous = readManifest(directory)
+    search = searchindex.SearchIndex(directory, name, PAGESIZE)
+    summary = {}
+    rendered = 0
+
+    def flush(number, first, page_rows):
+        """
+        flush() renders a page unless an identical one is already on disk, page_rows are newest first
+        """
+        nonlocal rendered
+        digest = hashlib.sha1(repr((ROWFORMAT, number < pages, first, page_rows)).encode()).hexdigest()
+        filename = os.path.join(directory, pageName(number))
+        summary[str(number)] = {'hash': digest, 'first': first, 'last': first + len(page_rows) - 1,
+            'oldest': page_rows[-1][4], 'newest': page_rows[0][4]}
+        if previous.get(str(number), {}).get('hash') == digest and os.path.isfile(filename):
+            if not search.hasPage(number):
+                search.addPage(number, first, page_rows)
+            return
+        search.addPage(number, first, page_rows)
+        writer = PageWriter(filename, name + ' likes, page ' + str(number), _navigation(name, number, pages))
+        ordinal = first + len(page_rows) - 1
+        for row in page_rows:
+            writer.write(renderRow(ordinal, row))
+            ordinal -= 1
+        writer.close()
+        rendered += 1
+
+    current = None
+    page_rows = []
+    count = 0
+    for index, row in enumerate(rows):
+        ordinal = total - 1 - index
+        number = ordinal // PAGESIZE + 1
+        if number != current:
+            if page_rows:
+                flush(current, ordinal + 1, page_rows)
+            current = number
+            page_rows = []
+        page_rows.append(row)
+        count += 1
+    if page_rows:
+        flush(current, total - count, page_rows)
+    for filename in os.listdir(directory):
+        if filename.startswith('page-') and filename.endswith('.html') and int(filename[5:-5]) > pages:
+            os.remove(os.path.join(directory, filename))  # left over by a larger archive
+    search.write(count, pages)
+    if summary != previous:  # written last: pages missing from the search index after a crash are rendered again
+        atomicDump({'pagesize': PAGESIZE, 'pages': summary}, os.path.join(directory, MANIFEST))
+
+    body = '<h1>' + escape(name) + ' likes</h1>\n<p>' + str(count) + ' likes, ' + str(len(summary)) + ' pages, <a href="' + escape(directory) + '/' + searchindex.SEARCHPAGE + '">search</a></p>\n'
+    body += '<table><thead><tr><th>PAGE</th><th>ROWS</th><th>TWEET_DATE (oldest row)</th><th>TWEET_DATE (newest row)</th></tr></thead>\n'
+    for number in sorted(summary, key = int, reverse = True):
+        page = summary[number]
+        body += ('<tr><td><a href="' + escape(directory) + '/' + pageName(int(number)) + '">' + number + '</a></td>'
+            + '<td>' + str(page['first']) + ' - ' + str(page['last']) + '</td><td>' + escape(str(page['oldest'])) + '</td>'
+            + '<td>' + escape(str(page['newest'])) + '</td></tr>\n')
+    body += '</table>\n'
+    publish.updateFile(name + '_index_' + timestamp + '.html', _head(name + ' likes') + body + TAIL)
+    return count, len(summary), rendered
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# HTTP client layer shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version: pooled keep-alive session, gzip, timeouts, latency counters
+#  2026-10-17  Added Scheduler: rate-limit pacing, jittered backoff on 429/5xx, deadline
+#  2026-10-17  Client and scheduler are shared by the threads fetching several accounts concurrently
+#  2026-10-17  requests is imported by the first request, modes that don't fetch don't load the HTTP stack
+#  2026-10-17  Retry-After is honoured, DeadlineError tells a request given up at the deadline
+#  2026-10-17  The send time of a paced request is reserved under the lock, see Scheduler.reserve()
+
+# External modules/dependencies
+import email.utils                         # Miscellaneous email utilities, parses the HTTP-date of Retry-After
+import os                                  # Miscellaneous operating system interfaces
+import random                              # Generate pseudo-random numbers
+import threading                           # Thread-based parallelism
+import time                                # Time access and conversions
+# requests (HTTP library for Python) is imported on first use, see HttpClient.open()
+
+# Global settings
+APIBASE = os.environ.get('LIKES_API_BASE', 'https://api.twitter.com')  # may point to a local stand-in server
+CONNECT_TIMEOUT = 5.0   # seconds
+READ_TIMEOUT = 30.0     # seconds
+POOLSIZE = 10           # connections kept alive per host
+USER_AGENT = 'LikedTweets'
+DEADLINE = 900.0        # seconds, a request is given up once retrying it would last longer than this
+RETRY_STATUS = (429, 500, 502, 503, 504)
+BACKOFF_BASE = 1.0      # seconds, doubled at each attempt
+BACKOFF_MAX = 60.0      # seconds
+LOWWATER = 3            # below this many remaining requests the calls are spread until the window resets
+
+
+class FetchError(Exception):
+    """
+    FetchError is raised by Scheduler.request() when a request can't be completed
+    Args:
+    - status (int): last HTTP status code, None in case of connection errors
+    - reason (string): last HTTP reason or exception message
+    """
+    def __init__(self, status, reason):
+        super().__init__(str(status) + ' ' + str(reason))
+        self.status = status
+        self.reason = reason
+
+
+class DeadlineError(FetchError):
+    """
+    DeadlineError is raised by Scheduler.request() when a request is given up, as retrying it would exceed the deadline
+    Args:
+    - status (int): last HTTP status code, None in case of connection errors
+    - reason (string): last HTTP reason or exception message
+    """
+
+
+class HttpClient:
+    """
+    HttpClient wraps a single requests.Session so that every page of a pagination reuses the same TCP+TLS connection.
+    Responses are negotiated gzip-compressed and each request is timed, see latency().
+    The client may be shared by several threads, up to pool_size of them keep their own connection alive.
+    The session is only opened by the first request, creating a client costs nothing
+    Args:
+    - connect_timeout (float): seconds allowed to establish the connection
+    - read_timeout (float): seconds allowed between two bytes of the response
+    - pool_size (int): number of connections kept alive per host
+    """
+    def __init__(self, connect_timeout = CONNECT_TIMEOUT, read_timeout = READ_TIMEOUT, pool_size = POOLSIZE):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.session = None
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.received = 0
+
+    def open(self):
+        """
+        open() imports requests and opens the pooled session, unless already done, then returns the session
+        """
+        with self.lock:
+            if self.session is None:
+                import requests                            # HTTP library for Python
+                from requests.adapters import HTTPAdapter  # Transport adapter, holds the connection pool
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections = self.pool_size, pool_maxsize = self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    'Accept-Encoding': 'gzip, deflate',
+                    'Connection': 'keep-alive',
+                    'User-Agent': USER_AGENT
+                })
+                self.session = session
+        return self.session
+
+    def get(self, url, headers = None, params = None):
+        """
+        get() sends a GET request over the pooled session and updates the latency counters
+        Args:
+        - url (string): the endpoint
+        - headers (dict): request headers, e.g. Authorization
+        - params (dict): query parameters
+        """
+        session = self.session or self.open()
+        start = time.perf_counter()
+        response = session.get(url, headers = headers, params = params, timeout = self.timeout)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.count += 1
+            self.total += elapsed
+            self.slowest = max(self.slowest, elapsed)
+            self.received += len(response.content)
+        return response
+
+    def latency(self):
+        """
+        latency() returns the per-request counters as a dictionary: requests, total/average/slowest seconds, bytes received
+        """
+        return {
+            'requests': self.count,
+            'total': self.total,
+            'average': self.total / self.count if self.count else 0.0,
+            'slowest': self.slowest,
+            'bytes': self.received
+        }
+
+    def summary(self):
+        """
+        summary() returns the latency counters as a human-readable one-liner
+        """
+        stats = self.latency()
+        return (str(stats['requests']) + ' requests in ' + format(stats['total'], '.2f') + 's, average '
+            + format(stats['average'] * 1000, '.0f') + 'ms, slowest ' + format(stats['slowest'] * 1000, '.0f') + 'ms, '
+            + str(stats['bytes']) + ' bytes received')
+
+    def close(self):
+        """
+        close() releases the pooled connections
+        """
+        if self.session is not None:
+            self.session.close()
+
+
+class Scheduler:
+    """
+    Scheduler sends the requests through an HttpClient while keeping track of the rate limit of each bearer token,
+    as advertised by the 'x-rate-limit-remaining' and 'x-rate-limit-reset' headers.
+    Requests are paced to the remaining budget, 429/5xx and connection errors are retried with a jittered exponential
+    backoff, no shorter than the 'Retry-After' header if any. A request is only given up, raising DeadlineError,
+    when the deadline would be exceeded.
+    Args:
+    - client (HttpClient): the client the requests are sent through
+    - deadline (float): seconds a single request may take, retries and waits included
+    - sleep (function): waits for the given seconds, replaceable for testing
+    - clock (function): returns the current time as seconds since the epoch, replaceable for testing
+    """
+    def __init__(self, client, deadline = DEADLINE, sleep = time.sleep, clock = time.time):
+        self.client = client
+        self.deadline = deadline
+        self.sleep = sleep
+        self.clock = clock
+        self.budgets = {}  # key -> (remaining, reset)
+        self.slots = {}    # key -> send time reserved by the last paced request
+        self.lock = threading.Lock()
+        self.retries = 0
+        self.waited = 0.0
+
+    def update(self, key, headers):
+        """
+        update() records the rate-limit budget returned along with a response
+        Args:
+        - key (string): the budget the request is accounted to, i.e. the bearer token
+        - headers (dict): the response headers
+        """
+        try:
+            budget = (int(headers['x-rate-limit-remaining']), float(headers['x-rate-limit-reset']))
+        except (KeyError, ValueError):
+            return
+        with self.lock:
+            self.budgets[key] = budget
+
+    def delay(self, key):
+        """
+        delay() returns the seconds to wait before the next request is sent with the given budget:
+        none while the budget is healthy, until the reset once it's exhausted, an even share of the window in between
+        Args:
+        - key (string): the budget the request is accounted to, i.e. the bearer token
+        """
+        with self.lock:
+            remaining, reset = self.budgets.get(key, (None, 0.0))
+        window = reset - self.clock()
+        if remaining is None or window <= 0 or remaining >= LOWWATER:
+            return 0.0
+        if remaining <= 0:
+            return window + random.uniform(0, 1)
+        return window / (remaining + 1)
+
+    def retryAfter(self, headers):
+        """
+        retryAfter() returns the seconds to wait as per the 'Retry-After' header, either seconds or an HTTP-date,
+        None when the header is missing or malformed
+        Args:
+        - headers (dict): the response headers
+        """
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(email.utils.parsedate_to_datetime(value).timestamp() - self.clock(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def reserve(self, key):
+        """
+        reserve() returns the seconds to wait before the next request is sent with the given budget, as delay() does,
+        except that its send time is computed and reserved within the lock: the requests of threads sharing a budget
+        (accounts sharing a bearer token) are spaced out one after the other rather than all sent after the same pause
+        Args:
+        - key (string): the budget the request is accounted to, i.e. the bearer token
+        """
+        with self.lock:
+            now = self.clock()
+            remaining, reset = self.budgets.get(key, (None, 0.0))
+            window = reset - now
+            if remaining is None or window <= 0 or remaining >= LOWWATER:
+                return 0.0
+            if remaining <= 0:
+                slot = reset + random.uniform(0, 1)
+            else:
+                slot = min(max(now, self.slots.get(key, 0.0)) + window / (remaining + 1), reset + random.uniform(0, 1))
+            self.slots[key] = slot
+        return slot - now
+
+    def wait(self, seconds):
+        """
+        wait() sleeps for the given seconds and accounts for them
+        Args:
+        - seconds (float): time to wait
+        """
+        with self.lock:
+            self.waited += seconds
+        self.sleep(seconds)
+
+    def request(self, url, key, headers = None, params = None):
+        """
+        request() sends a GET request and returns the successful response, FetchError is raised otherwise:
+        DeadlineError when the request is given up at the deadline
+        Args:
+        - url (string): the endpoint
+        - key (string): the budget the request is accounted to, i.e. the bearer token
+        - headers (dict): request headers, e.g. Authorization
+        - params (dict): query parameters
+        """
+        import requests                            # HTTP library for Python, see HttpClient.open()
+        start = self.clock()
+        attempt = 0
+        while True:
+            pause = self.reserve(key)
+            if self.clock() + pause - start > self.deadline:
+                raise DeadlineError(429, 'rate limit budget exhausted beyond the deadline')
+            if pause > 0:
+                self.wait(pause)
+
+            retry_after = None
+            try:
+                response = self.client.get(url, headers = headers, params = params)
+            except requests.exceptions.RequestException as error:
+                status, reason = None, str(error)
+            else:
+                self.update(key, response.headers)
+                if response.status_code == 200:
+                    return response
+                status, reason = response.status_code, response.reason
+                if status not in RETRY_STATUS:
+                    raise FetchError(status, reason)
+                retry_after = self.retryAfter(response.headers)
+
+            attempt += 1
+            backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            if status == 429:
+                backoff = max(backoff, self.delay(key))
+            if retry_after is not None:
+                backoff = max(backoff, retry_after)
+            if self.clock() + backoff - start > self.deadline:
+                raise DeadlineError(status, reason)
+            with self.lock:
+                self.retries += 1
+            self.wait(backoff)
+
+
+CLIENT = None
+SCHEDULER = None
+
+
+def getClient(connect_timeout = CONNECT_TIMEOUT, read_timeout = READ_TIMEOUT, pool_size = POOLSIZE):
+    """
+    getClient() returns the process-wide HttpClient, it's created on first use
+    Args:
+    - connect_timeout (float): seconds allowed to establish the connection
+    - read_timeout (float): seconds allowed between two bytes of the response
+    - pool_size (int): number of connections kept alive per host
+    """
+    global CLIENT
+    if CLIENT is None:
+        CLIENT = HttpClient(connect_timeout, read_timeout, pool_size)
+    return CLIENT
+
+
+def getScheduler(deadline = DEADLINE):
+    """
+    getScheduler() returns the process-wide Scheduler, bound to the process-wide HttpClient, it's created on first use
+    Args:
+    - deadline (float): seconds a single request may take, retries and waits included
+    """
+    global SCHEDULER
+    if SCHEDULER is None:
+        SCHEDULER = Scheduler(getClient(), deadline)
+    return SCHEDULER
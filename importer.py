@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# Bulk importer merging the v1.1 (savemylikes.py) and v2 (likedtweetsv2.py) archives of an account into a single v2 archive
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  TIMESTAMP is set by main()
+#  2026-10-17  Damaged compressed archives are skipped too
+
+# External modules/dependencies
+import argparse                # Parser for command-line options, arguments and sub-commands
+import json                    # JSON encoder and decoder
+import likesdb                 # normalize() reads both the v1.1 and the v2 schema
+import likestore               # Archive storage backends
+import lzma                    # Compression using the LZMA algorithm, errors of damaged block archives
+import os                      # Miscellaneous operating system interfaces
+import publish                 # Per-account locks, shared with the scripts
+import re                      # Regular expression operations
+import records                 # Compact in-memory tweet records, i.e. the v2 archive format
+import snapshots               # Content-deduplicated snapshots of the obsolete files
+import sys                     # System-specific parameters and functions
+import tempfile                # Generate temporary files and directories
+import time                    # Time access and conversions
+import zlib                    # Compression compatible with gzip, errors of damaged blocks and snapshot chunks
+from collections import namedtuple  # Container datatypes
+from concurrent.futures import ProcessPoolExecutor  # Launching parallel tasks
+from datetime import datetime  # Basic date and time types
+from journal import atomicDump  # Atomic write-then-rename of JSON documents
+
+# Global settings
+__version__ = '1.0'
+__build__ = '20261017'
+TIMESTAMP = None  # time of the run, format: %Y-%m-%d-%H, set by main()
+ARCHIVEDIR = '_archive'
+AUTHORCACHE = '_authors.json'  # author cache of likedtweetsv2.py
+PREFIXES = ('_likedtweets', '_twitter_likes')  # v2 and v1.1 archives
+ARCHIVENAME = re.compile(r'^(.+?)(_likedtweets|_twitter_likes)_(\d{4}-\d{2}-\d{2}-\d{2})\.(json|blocks)$')
+ISVERBOSE = False
+
+# A source is an archive to be imported: a file, a segments directory or a file held by a snapshot
+# - timestamp (string): timestamp of the archive, format: %Y-%m-%d-%H
+# - kind (string): 'json', 'blocks', 'segments' or 'snapshot'
+# - path (string): file or directory, archive directory for a snapshot
+# - name (string): account of a snapshot
+# - member (string): file of a snapshot
+Source = namedtuple('Source', 'timestamp kind path name member')
+
+
+def describe(source):
+    """
+    describe() returns the name of a source as shown to the user
+    """
+    if source.kind == 'snapshot':
+        return source.member + ' (snapshot ' + source.name + '/' + source.timestamp + ')'
+    return source.path
+
+
+def findSources(names, archivedir):
+    """
+    findSources() returns the archives of the given accounts, newest first: the current archives (any store), the full
+    copies moved to the archive directory by former versions and the archives held by snapshots
+    Args:
+    - names (list): user names, i.e. prefixes of the v2 and v1.1 files
+    - archivedir (string): archive directory
+    """
+    sources = []
+    for dirname in ('.', archivedir):
+        try:
+            filenames = sorted(os.listdir(dirname))
+        except FileNotFoundError:
+            continue
+        for filename in filenames:
+            match = ARCHIVENAME.match(filename)
+            if match and match.group(1) in names:
+                sources.append(Source(match.group(3), match.group(4), os.path.join(dirname, filename), None, None))
+    for name in names:
+        for prefix in PREFIXES:
+            dirname = name + prefix + '_segments'
+            if os.path.isfile(os.path.join(dirname, likestore.MANIFEST)):
+                mtime = os.path.getmtime(os.path.join(dirname, likestore.MANIFEST))
+                sources.append(Source(datetime.fromtimestamp(mtime).strftime('%Y-%m-%d-%H'), 'segments', dirname, None, None))
+        for timestamp in snapshots.listSnapshots(archivedir, name):
+            for member in sorted(snapshots.readSnapshot(archivedir, name, timestamp)['files']):
+                match = ARCHIVENAME.match(member)
+                if match and match.group(1) == name:
+                    sources.append(Source(timestamp, 'snapshot', archivedir, name, member))
+    sources.sort(key = lambda source: source.timestamp, reverse = True)
+    return sources
+
+
+def iterSource(source, tmpdir):
+    """
+    iterSource() yields the tweets of a source, newest first
+    Args:
+    - source (Source): the archive
+    - tmpdir (string): directory where a block archive held by a snapshot is rebuilt, as blocks are read by offset
+    """
+    if source.kind == 'segments':
+        return likestore.SegmentStore(source.path).iterNewest()
+    if source.kind == 'json':
+        return likestore.JsonStore(source.path).iterNewest()
+    if source.kind == 'blocks':
+        return likestore.BlockStore(source.path).iterNewest()
+    data = snapshots.readSnapshotFile(source.path, source.name, source.timestamp, source.member)
+    if source.member.endswith('.json'):
+        return iter(json.loads(data))
+    filename = os.path.join(tmpdir, source.member)
+    with open(filename, 'wb') as archive_out:
+        archive_out.write(data)
+    return likestore.BlockStore(filename).iterNewest()
+
+
+def readSource(source):
+    """
+    readSource() runs in a worker process: it reads an archive and normalizes its tweets, whatever the schema.
+    Returns a tuple (source, likes, authors, error):
+    - likes: list of (id, author_id, created_at, text, url), newest first, id as an int and created_at as ISO 8601
+    - authors: dictionary of the authors embedded in the tweets (v1.1 'user', author_name/author_handle of former v2
+      versions), keyed by author_id
+    - error: message, None unless the archive couldn't be read
+    Args:
+    - source (Source): the archive
+    """
+    likes = []
+    authors = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix = 'likes-import-') as tmpdir:
+            for tweet in iterSource(source, tmpdir):
+                tweet_id, created_at, text, author, urls = likesdb.normalize(tweet)
+                likes.append((tweet_id, author[0], created_at, text, urls[0] if urls else None))
+                if author[1] is not None:
+                    authors[author[0]] = {'name': author[1], 'username': author[2]}
+    except (OSError, KeyError, ValueError, EOFError, zlib.error, lzma.LZMAError) as error:
+        return source, [], {}, type(error).__name__ + ': ' + str(error)
+    return source, likes, authors, None
+
+
+def importArchives(sources, jobs):
+    """
+    importArchives() reads the archives on a pool of processes and merges them, newest archive first.
+    Each tweet is kept once, as found in the newest archive holding it. Likes keep their order: a tweet only found in
+    older archives (e.g. unliked since then) is placed right after the like preceding it in the newest of those.
+    Returns the list of likes, newest first, the authors and the number of records read
+    Args:
+    - sources (list): archives, newest first, see findSources()
+    - jobs (int): number of worker processes
+    """
+    likes = {}    # tweet ID -> like, see readSource()
+    after = {}    # tweet ID -> ID of the next (older) like, None being the head of the list
+    authors = {}
+    read = 0
+    with ProcessPoolExecutor(max_workers = jobs) as executor:
+        for source, found, embedded, error in executor.map(readSource, sources):
+            if error is not None:
+                print('[!] Skipping ' + describe(source) + ': ' + error)
+                continue
+            read += len(found)
+            added = 0
+            anchor = None
+            for like in found:
+                if like[0] not in likes:
+                    likes[like[0]] = like
+                    after[like[0]] = after.get(anchor)
+                    after[anchor] = like[0]
+                    added += 1
+                anchor = like[0]
+            for author_id, author in embedded.items():
+                authors.setdefault(author_id, author)
+            if ISVERBOSE: print('[+] ' + describe(source) + ': ' + str(len(found)) + ' likes, ' + str(added) + ' new')
+    merged = []
+    tweet_id = after.get(None)
+    while tweet_id is not None:
+        merged.append(likes[tweet_id])
+        tweet_id = after[tweet_id]
+    return merged, authors, read
+
+
+def saveAuthors(authors):
+    """
+    saveAuthors() adds the authors to AUTHORCACHE, the authors already cached are kept as they come from newer fetches.
+    Returns the number of authors added
+    Args:
+    - authors (dict): authors keyed by author_id
+    """
+    try:
+        with open(AUTHORCACHE, 'r') as authors_in:
+            cache = json.load(authors_in)
+    except FileNotFoundError:
+        cache = {}
+    added = {author_id: author for author_id, author in authors.items() if author_id not in cache}
+    if added:
+        cache.update(added)
+        atomicDump(cache, AUTHORCACHE)
+    return len(added)
+
+
+def writeArchive(name, kind, likes):
+    """
+    writeArchive() writes the merged likes as the v2 archive <name>_likedtweets_<TIMESTAMP>, with the given store.
+    Returns the name of the archive
+    Args:
+    - name (string): user name
+    - kind (string): archive store, see likestore.STORES
+    - likes (list): likes, newest first, see readSource()
+    """
+    tweets = (records.Tweet(str(like[0]), like[1], like[2], like[3], like[4]).toJson() for like in likes)
+    store = likestore.openStore(name + '_likedtweets', kind, TIMESTAMP)
+    if kind == 'segments':
+        store.replace(list(tweets))
+    elif kind == 'blocks':
+        store.write(tweets, len(likes))
+    else:
+        store.write(tweets)
+    return store.path
+
+
+def updateConf(name, kind, count):
+    """
+    updateConf() points the configuration file of likedtweetsv2.py to the merged archive
+    Args:
+    - name (string): user name
+    - kind (string): archive store
+    - count (int): number of likes of the merged archive
+    """
+    filename = name + '_configv2.json'
+    try:
+        with open(filename, 'r') as config_in:
+            config_json = json.load(config_in)
+    except FileNotFoundError:
+        print('[!] "' + filename + '" not found, configuration not updated')
+        return
+    config_json.update(last_timestamp = TIMESTAMP, last_count = count, store = kind)
+    atomicDump(config_json, filename)
+    print('[+] "' + filename + '" now points to the merged archive')
+
+
+def main():
+    """
+    main() handles the input (through argparse), finds the archives, merges them and writes the merged archive
+    """
+    global ISVERBOSE, TIMESTAMP
+    parser = argparse.ArgumentParser(description = 'Merges the v1.1 and v2 archives of an account, current and archived, into a single v2 archive.')
+    parser.add_argument('-u', '--user', metavar = '<User name>', action = 'append', type = str, help = 'User name, prefix of the archives; repeat it for archives saved under several names')
+    parser.add_argument('-o', '--output', metavar = '<User name>', type = str, help = 'User name of the merged archive, defaults to the first -u')
+    parser.add_argument('-d', '--dir', metavar = '<directory>', default = '.', type = str, help = 'Directory holding the archives and ' + ARCHIVEDIR)
+    parser.add_argument('-j', '--jobs', metavar = '<N>', default = os.cpu_count(), type = int, help = 'Worker processes')
+    parser.add_argument('-s', '--store', choices = likestore.STORES, default = None, help = 'Store of the merged archive, defaults to the one of the configuration file or json')
+    parser.add_argument('-c', '--config', action = 'store_true', help = 'Point the v2 configuration file to the merged archive')
+    parser.add_argument('-v', '--verbose', action = 'store_true', help = 'Print one line per archive')
+    parser.add_argument('-V', '--version', action = 'version', version = '%(prog)s ' + __version__ + ' build ' + __build__)
+    args = parser.parse_args()
+
+    if not args.user:
+        parser.print_help()
+        sys.exit(10)  # ERROR: no arguments
+    if '' in args.user:
+        print('[-] User name is an empty string!')
+        sys.exit(30)  # ERROR: user name is an empty string
+    ISVERBOSE = args.verbose
+    TIMESTAMP = datetime.now().strftime('%Y-%m-%d-%H')
+    os.chdir(args.dir)
+    name = args.output or args.user[0]
+    kind = args.store
+    if kind is None:
+        try:
+            with open(name + '_configv2.json', 'r') as config_in:
+                kind = json.load(config_in).get('store', 'json')
+        except FileNotFoundError:
+            kind = 'json'
+
+    start = time.perf_counter()
+    sources = findSources(set(args.user), ARCHIVEDIR)
+    if not sources:
+        print('[-] No archive of ' + ', '.join(args.user) + ' found!')
+        sys.exit(40)  # ERROR: local archive not found
+    print('[+] Importing ' + str(len(sources)) + ' archives with ' + str(args.jobs) + ' processes')
+    likes, authors, read = importArchives(sources, args.jobs)
+    try:
+        lock = publish.accountLock(name).acquire()
+    except publish.LockError as error:
+        print('[-] Another run is updating ' + name + ': ' + str(error))
+        sys.exit(100)  # ERROR: account locked by another run
+    with lock:
+        filename = writeArchive(name, kind, likes)
+        with publish.FileLock(AUTHORCACHE + publish.LOCKSUFFIX, wait = True):
+            added = saveAuthors(authors)
+        print('[+] ' + filename + ': ' + str(len(likes)) + ' likes out of ' + str(read) + ' records, ' + str(added)
+            + ' authors added to the cache, ' + format(time.perf_counter() - start, '.1f') + 's')
+        if args.config:
+            updateConf(name, kind, len(likes))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Crash-safe page journal shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  Appended pages are no longer held in memory, only replayed ones
+#  2026-10-17  atomicDump() writes to a temporary name unique to the process and thread
+#  2026-10-17  Pages may be journaled along with their authors, replayed into 'users'
+
+# External modules/dependencies
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+from publish import tempName   # Temporary names unique to the process and thread
+
+
+def atomicDump(obj, filename):
+    """
+    atomicDump() writes a JSON document to a temporary file, flushes it to disk and only then renames it to its final name,
+    so that readers see either the previous file or the complete new one
+    Args:
+    - obj (list/dict): the JSON document
+    - filename (string): final name of the file
+    """
+    temporary = tempName(filename)
+    with open(temporary, 'w') as file_out:
+        json.dump(obj, file_out)
+        file_out.flush()
+        os.fsync(file_out.fileno())
+    os.replace(temporary, filename)
+
+
+class PageJournal:
+    """
+    PageJournal appends each fetched page to an on-disk NDJSON file together with the cursor of the next page
+    (next_token for v2, max_id for v1.1). An interrupted pagination is resumed by replaying the journal, once the
+    run completes the journal is compacted into the archive and removed.
+    The first line is a header describing the run, a trailing line truncated by a crash is ignored.
+    A page may be stored along with its authors, so that those kept apart from the tweets survive the crash as well.
+    Args:
+    - filename (string): name of the journal file, e.g. <name>_likedtweets.journal
+    - mode (string): kind of pagination, a journal left by a different kind of run is discarded
+    """
+    def __init__(self, filename, mode):
+        self.filename = filename
+        self.mode = mode
+        self.pages = []
+        self.users = []
+        self.cursor = None
+        self.done = False
+
+    def replay(self):
+        """
+        replay() loads the pages stored by an interrupted run, returns True when there's something to resume from.
+        Afterwards 'pages' holds the list of pages, 'users' the authors stored along with them, 'cursor' the cursor
+        of the next page to fetch and 'done' tells whether the pagination had already reached its end
+        """
+        try:
+            with open(self.filename, 'r') as journal_in:
+                lines = journal_in.readlines()
+        except FileNotFoundError:
+            return False
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            header = {}
+        if header.get('mode') != self.mode:
+            self.discard()
+            return False
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # line truncated by a crash, the page will be fetched again
+            self.pages.append(entry['data'])
+            self.users += entry.get('users', [])
+            self.cursor = entry['cursor']
+            self.done = entry['cursor'] is None
+        return len(self.pages) > 0
+
+    def append(self, data, cursor, users = None):
+        """
+        append() durably stores a page, the journal is created on first use. Only replayed pages are held in 'pages',
+        an appended page is already held by the caller
+        Args:
+        - data (list): the page, i.e. list of tweets
+        - cursor (string/int): cursor of the next page, None when the pagination is over
+        - users (list): authors of the tweets of the page, when not stored in the tweets themselves
+        """
+        is_new = not os.path.isfile(self.filename)
+        with open(self.filename, 'a') as journal_out:
+            if is_new:
+                journal_out.write(json.dumps({'mode': self.mode}) + '\n')
+            entry = {'cursor': cursor, 'data': data}
+            if users:
+                entry['users'] = users
+            journal_out.write(json.dumps(entry) + '\n')
+            journal_out.flush()
+            os.fsync(journal_out.fileno())
+        self.cursor = cursor
+        self.done = cursor is None
+
+    def records(self):
+        """
+        records() returns the tweets of all of the replayed pages, in order
+        """
+        return [tweet for page in self.pages for tweet in page]
+
+    def compact(self, obj, filename):
+        """
+        compact() atomically writes the archive built from the journal, then removes the journal
+        Args:
+        - obj (list): the archive, i.e. list of tweets
+        - filename (string): final name of the archive
+        """
+        atomicDump(obj, filename)
+        self.discard()
+
+    def discard(self):
+        """
+        discard() removes the journal file
+        """
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Bounded-memory reader of JSON arrays, used by the archive stores
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import json                    # JSON encoder and decoder
+import re                      # Regular expression operations
+from bisect import bisect_right  # Array bisection algorithm
+
+# Global settings
+CHUNKSIZE = 1 << 16  # characters read at a time
+BLOCKSIZE = 1000     # elements decoded at a time by iterArrayReverse()
+SEPARATOR = re.compile(r'[\s,]*')  # whitespace and commas between elements
+DELIMITER = re.compile(r'[,\]\s]')  # end of a scalar element, i.e. a number, true, false or null
+
+
+def _parse(file, chunks, base = 0, skip = 0, inside = False):
+    """
+    _parse() yields the elements of a JSON array as (position, element), position being the index of the first
+    character of the element within the file. Only the current chunk, plus the element being decoded, is held in memory.
+    The position and tell() cookie of each chunk read are appended to 'chunks', so that the caller can seek back later
+    Args:
+    - file (file object): text file, positioned at the beginning of the array or, if 'inside', at 'base'
+    - chunks (list): receives (position, cookie) of each chunk
+    - base (int): position of the file's current offset
+    - skip (int): characters to ignore at the beginning
+    - inside (bool): whether the opening bracket has already been consumed
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    if skip:
+        file.read(skip)
+        base += skip
+
+    def fill():
+        nonlocal buffer, eof
+        cookie = file.tell()
+        data = file.read(CHUNKSIZE)
+        chunks.append((base + len(buffer), cookie))
+        if data:
+            buffer += data
+        else:
+            eof = True
+
+    while True:
+        while True:
+            pos = SEPARATOR.match(buffer, pos).end()
+            if not inside and buffer[pos:pos + 1] == '[':
+                inside = True
+                pos += 1
+                continue
+            if pos < len(buffer) or eof:
+                break
+            fill()
+        if pos >= len(buffer) or buffer[pos] == ']':
+            return
+        if buffer[pos] not in '{["' and not eof and not DELIMITER.search(buffer, pos):
+            fill()  # a scalar cut by the end of the chunk, e.g. 1.5 read as 1.
+            continue
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        yield base + pos, element
+        pos = end
+        if pos >= CHUNKSIZE:
+            buffer = buffer[pos:]
+            base += pos
+            pos = 0
+
+
+def iterArray(filename):
+    """
+    iterArray() yields the elements of the JSON array stored in a file, one at a time
+    Args:
+    - filename (string): name of the file
+    """
+    with open(filename, 'r') as file_in:
+        for position, element in _parse(file_in, []):
+            yield element
+
+
+def countArray(filename):
+    """
+    countArray() returns the number of elements of the JSON array stored in a file, without holding them in memory
+    Args:
+    - filename (string): name of the file
+    """
+    return sum(1 for element in iterArray(filename))
+
+
+def iterArrayReverse(filename, block = BLOCKSIZE):
+    """
+    iterArrayReverse() yields the elements of the JSON array stored in a file, last one first.
+    A first pass records the position of every 'block'-th element, then blocks are decoded from the last one backwards:
+    memory is bounded by one block of elements plus a few integers per block
+    Args:
+    - filename (string): name of the file
+    - block (int): elements decoded at a time
+    """
+    with open(filename, 'r') as file_in:
+        chunks = []
+        checkpoints = []
+        for index, (position, element) in enumerate(_parse(file_in, chunks)):
+            if index % block == 0:
+                checkpoints.append(position)
+        starts = [start for start, cookie in chunks]
+        for position in reversed(checkpoints):
+            start, cookie = chunks[bisect_right(starts, position) - 1]
+            file_in.seek(cookie)
+            elements = []
+            for offset, element in _parse(file_in, [], start, position - start, True):
+                elements.append(element)
+                if len(elements) == block:
+                    break
+            yield from reversed(elements)
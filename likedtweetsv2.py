@@ -7,31 +7,41 @@
 
 # External modules/dependencies
 import argparse                # Parser for command-line options, arguments and sub-commands
+import changelog               # Changelog of the liked/unliked tweets between runs, shared with savemylikes.py
+import facets                  # Facet indexes and buffered export, shared with savemylikes.py
+import httpclient              # Pooled keep-alive HTTP client, shared with savemylikes.py
+import itertools               # Functions creating iterators for efficient looping
 import json                    # JSON encoder and decoder
+import likesdb                 # Optional SQLite archive with full-text search, shared with savemylikes.py
+import likestore               # Archive storage backends, shared with savemylikes.py
+import metrics                 # Per-phase timers and counters, shared with savemylikes.py
 import os                      # Miscellaneous operating system interfaces
-import requests                # HTTP library for Python
-import shutil                  # High-level file operations
-import subprocess              # Subprocess management
+import pagecache               # Record/replay cache of the raw API pages, shared with savemylikes.py
+import projection              # Field projection profiles, shared with savemylikes.py
+import publish                 # Atomic publishing and per-account locks, shared with savemylikes.py
+import random                  # Generate pseudo-random numbers
+import records                 # Compact in-memory tweet records
 import sys                     # System-specific parameters and functions
+import threading               # Thread-based parallelism
+import time                    # Time access and conversions
 from datetime import datetime  # Basic date and time types
-from json2html import *        # Python wrapper for JSON to HTML-Table convertor
+from journal import PageJournal, atomicDump  # Crash-safe page journal, shared with savemylikes.py
+# Imported by the modes using them, so that -V, -s, -f and -e don't load them: htmlrender (HTML renderer, see
+# convert2HTML()), snapshots (snapshots of the obsolete files, see archiveFile()), concurrent.futures (see fetchAll())
 
 # Global settings
 __version__ = '3.0'
 __build__ = '20220804'
-TIMESTAMP = datetime.now().strftime('%Y-%m-%d-%H')
+TIMESTAMP = None  # time of the run, format: %Y-%m-%d-%H, set by main() and by each poll of --watch
 ARCHIVEDIR = '_archive'
+MAXRESULTS = 100  # largest page size allowed by the "liked_tweets" endpoint
+AUTHORCACHE = '_authors.json'  # author table shared across pages, runs and accounts
+AUTHORLOCK = threading.Lock()  # serializes the updates of AUTHORCACHE by concurrent accounts
+JOBS = 4  # accounts fetched concurrently by --all
+WATCHJITTER = 0.1  # --watch polls are spread by up to +/- 10% of the interval
+PROFILE = 'html'  # default projection profile: fields requested and stored, see projection.py
 # Default fields: id, text
-# Additional fields
-expansions = 'author_id'
-tweet_fields = 'author_id,created_at,entities'
-user_fields = 'id,name,username'
-query_params = dict([
-    ('expansions', expansions),
-    ('tweet.fields', tweet_fields),
-    ('user.fields', user_fields),
-#    ('max_results', 5)  ## DEBUG, comment out in final version
-])
+# Additional fields: as per the projection profile, 'expansions' being always 'author_id'
 
 
 def createUrl(id):
@@ -40,7 +50,7 @@ def createUrl(id):
     Args:
     - id (string): Twitter IDs are 64-bit integers, treated as a string here
     """
-    url = f'https://api.twitter.com/2/users/{id}/liked_tweets'
+    url = f'{httpclient.APIBASE}/2/users/{id}/liked_tweets'
     return url
 
 
@@ -51,6 +61,10 @@ def readConf(name):
     - the twitter ID
     - the OAuth2 bearer token
     - the last timestamp
+    - the number of archived likes, 'last_count', written by updateConf()
+    - optionally, the kind of archive store: 'json' (default), 'segments' or 'blocks', and the 'codec' of 'blocks': 'gzip' (default) or 'lzma'
+    - optionally, whether the likes are also stored into SQLite: 'sqlite' (default: false)
+    - optionally, the projection 'profile': 'minimal', 'html' (default) or 'full', see projection.py
     Args:
     - name (string): Twitter user name
     """
@@ -67,6 +81,14 @@ def readConf(name):
         if ISVERBOSE:
             beautify_last_timestamp = config_json['last_timestamp'] or 'EMPTY'
             print('[+] Last timestamp is: ' + beautify_last_timestamp)
+        if config_json.get('store', 'json') not in likestore.STORES or config_json.get('codec', 'gzip') not in likestore.CODECS:
+            print('[-] Unknown archive store: ' + config_json.get('store', 'json') + ' / ' + config_json.get('codec', 'gzip'))
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(70)  # ERROR: unknown archive store
+        if config_json.get('profile', PROFILE) not in projection.PROFILES:
+            print('[-] Unknown projection profile: ' + config_json['profile'])
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(70)  # ERROR: unknown archive store/profile
         return config_json
     except FileNotFoundError:
         print('[-] Config file not found for ' + name)
@@ -76,7 +98,8 @@ def readConf(name):
 
 def connect2Endpoint(url, bearer_token, query_params):
     """
-    connect2Endpoint() consumes Twitter v2 API "liked_tweets" endpoint. The response, once converted to JSON,
+    connect2Endpoint() consumes Twitter v2 API "liked_tweets" endpoint. Requests are paced to the rate limit and
+    retried on 429/5xx by the scheduler, the script quits only when the deadline is exceeded. The response, once converted to JSON,
     consists of the following keys:
     - data (list of dicts): each element contains the fundamental info about the tweet
     - includes (dict): optional, its contents depends on the chosen expansion(s)
@@ -84,123 +107,671 @@ def connect2Endpoint(url, bearer_token, query_params):
     Args:
     - url (string): the endpoint, generated by createUrl()
     - bearer_token (string): fetched from the configuration file
-    - query_params (dict): global setting defined at the beginning of this script
+    - query_params (dict): query parameters, as per the projection profile
+    With --cache the raw page is also recorded, with --replay it's read from the cache instead, see pagecache.py
     """
+    cache = pagecache.getCache()
+    if pagecache.isReplay():
+        body = cache.get(metrics.account(), url, query_params)
+        if body is None:
+            print('[-] Page not found in ' + cache.directory + ', params = ' + str(query_params))
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(40)  # ERROR: local archive or cached page not found
+        with metrics.timer('parse'):
+            response_json = json.loads(body)
+        return response_json
     headers = {'Authorization': f'Bearer {bearer_token}'}
-    response = requests.request('GET', url, headers = headers, params = query_params)
-    if response.status_code != 200:
+    try:
+        with metrics.timer('request'):
+            response = httpclient.getScheduler().request(url, bearer_token, headers = headers, params = query_params)
+    except httpclient.FetchError as error:
         print('[-] An error has occurred')
-        print(f'[-] HTTP status code = {response.status_code}')
-        print(f'[-] HTTP reason = {response.reason}')
+        print(f'[-] HTTP status code = {error.status}')
+        print(f'[-] HTTP reason = {error.reason}')
         print('[-] Quitting!', end = '\n\n')
-        sys.exit(response.status_code)
-    else:
-        if ISVERBOSE: print(f'[+] HTTP status code = {response.status_code}')
-    return response.json()
-
-
-def mergeExpansions(data_json, includes_json):
+        if isinstance(error, httpclient.DeadlineError):
+            sys.exit(110)  # ERROR: request given up at the deadline
+        sys.exit(error.status or 255)
+    if ISVERBOSE: print(f'[+] HTTP status code = {response.status_code}')
+    if cache is not None:
+        cache.put(metrics.account(), url, query_params, response.content)
+    with metrics.timer('parse'):
+        response_json = response.json()
+    return response_json
+
+
+def mergeExpansions(data_json, includes_json, authors):
     """
-    mergeExpansion() parses 'response_json' for returned tweets, it searches the 'include' key to match 'tweet/author_id' and 'users/id'.
+    mergeExpansion() parses 'response_json' for returned tweets, it indexes the 'include' key by 'users/id' to match 'tweet/author_id'.
     Once that's done, it merges both dictionaries into one record comprised of:
     - id, text (from 'data', default values)
     - author_id, created_at (from 'data', optional values as per 'tweet.fields')
     - name, username (from 'includes', defined by 'expansions')
+    The returned authors are also stored into the author cache, their IDs interned as they're shared with the records.
+    Authors hold the 'user.fields' of the projection profile, i.e. more than name and username with 'full'.
     Args:
     - data_json (dict): JSON-formatted output returned from querying the endpoint
     - includes_json (dict): JSON-formatted output returned from querying the endpoint
+    - authors (dict): author cache, generated by readAuthors()
     """
+    for user in includes_json:
+        authors[sys.intern(user['id'])] = {key: value for key, value in user.items() if key != 'id'}
     for tweet in data_json:
-        author = tweet['author_id']
-        for user in includes_json:
-            if user['id'] == author:
-                tweet.update({'author_name': user['name'], 'author_handle': user['username']})
+        author = authors.get(tweet['author_id'])
+        if author is not None:
+            tweet.update({'author_name': author['name'], 'author_handle': author['username']})
     return data_json
 
 
-def saveData(name, output_json):
+def readAuthors():
+    """
+    readAuthors() loads the author cache from AUTHORCACHE, a JSON-formatted dictionary keyed by author_id.
+    The cache is shared by all of the accounts, so that each author is stored once rather than in every single record
+    """
+    try:
+        with open(AUTHORCACHE, 'r') as authors_in:
+            authors_json = json.load(authors_in)
+    except FileNotFoundError:
+        authors_json = {}
+    if ISVERBOSE: print('[+] Author cache holds ' + str(len(authors_json)) + ' authors')
+    return authors_json
+
+
+def saveAuthors(authors):
+    """
+    saveAuthors() writes the author cache to AUTHORCACHE, the file is replaced atomically as it's shared across accounts.
+    The authors are merged into the cache as found on disk, so that accounts fetched concurrently, by threads or by
+    other runs, don't drop each other's
+    Args:
+    - authors (dict): author cache, generated by readAuthors()
+    """
+    with AUTHORLOCK, publish.FileLock(AUTHORCACHE + publish.LOCKSUFFIX, wait = True):
+        try:
+            with open(AUTHORCACHE, 'r') as authors_in:
+                merged = json.load(authors_in)
+        except FileNotFoundError:
+            merged = {}
+        merged.update(authors)
+        atomicDump(merged, AUTHORCACHE)
+
+
+def loadRecords(tweets_json, authors, profile = PROFILE):
+    """
+    loadRecords() yields the archived tweets as compact records, the author's name and handle being kept in the author cache.
+    Those borne by the records of archives saved by former versions are moved to the cache, unless already there
+    Args:
+    - tweets_json (iterable): tweets
+    - authors (dict): author cache, generated by readAuthors()
+    - profile (string): projection profile, see projection.PROFILES
+    """
+    for tweet in tweets_json:
+        if 'author_name' in tweet and tweet['author_id'] not in authors:
+            authors[sys.intern(tweet['author_id'])] = {'name': tweet['author_name'], 'username': tweet['author_handle']}
+        yield records.Tweet.fromJson(tweet, profile)
+
+
+def upgradeRecords(previous, authors, profile):
+    """
+    upgradeRecords() yields the tweets of the previous archive as stored by the current version, i.e. as per the given
+    projection profile and without the author's name and handle. Those borne by the records of former versions are moved
+    to the author cache, which is saved once the archive has been read: that is before the rewritten archive is published
+    Args:
+    - previous (JsonStore/BlockStore): the previous archive
+    - authors (dict): author cache, generated by readAuthors()
+    - profile (string): projection profile, see projection.PROFILES
+    """
+    known = len(authors)
+    yield from records.toJson(loadRecords(previous.iterNewest(), authors, profile))
+    if len(authors) > known:
+        saveAuthors(authors)
+
+
+def buildIndex(tweets_json):
+    """
+    buildIndex() collects the IDs of the tweets already present in the local archive, the resulting set is used
+    by fetchLikes() to detect where the new likes end and the archived ones begin
+    Args:
+    - tweets_json (iterable): tweets
+    """
+    return {tweet['id'] for tweet in tweets_json}
+
+
+def fetchLikes(url, bearer_token, known_ids, authors, journal, db, profile = PROFILE):
+    """
+    fetchLikes() queries the API endpoint until the response is empty or, when 'known_ids' is not empty, until a page
+    is returned whose tweets are all already archived (stop-on-known-ID incremental mode).
+    For info, see [Pagination](https://developer.twitter.com/en/docs/twitter-api/pagination).
+    Each page is appended to the journal along with its next_token and its authors, a replayed journal is resumed from its
+    last next_token, its authors going back to the author cache as it's only saved once the fetch is over.
+    It returns a tuple made of:
+    - the list of new tweets, newest first, as compact records (see records.py), authors going to the author cache
+    - the number of pages (= requests) fetched
+    - the largest page size seen
+    Args:
+    - url (string): the endpoint, generated by createUrl()
+    - bearer_token (string): fetched from the configuration file
+    - known_ids (set): IDs of the archived tweets, generated by buildIndex()
+    - authors (dict): author cache, generated by readAuthors()
+    - journal (PageJournal): page journal, possibly replayed
+    - db (LikesDB): SQLite archive, filled page by page, None if not enabled
+    - profile (string): projection profile, selects the fields requested and kept in the records
+    """
+    params = projection.v2Params(profile)
+    params.update([('max_results', MAXRESULTS)])
+    count = fetched = page_size = 0
+    next_token = 'dummy'  # value used only once, to set off the 'while' loop
+    output_list = list(records.fromJson(journal.records(), profile))
+    mergeExpansions([], journal.users, authors)
+    if journal.pages:
+        next_token = journal.cursor
+        params.update([('pagination_token', next_token)])
+    while next_token:
+        count += 1
+        response_json = connect2Endpoint(url, bearer_token, params)
+        if ISVERBOSE: print('[!] Iteration = ' + str(count) + ' with next_token = \'' + next_token + '\'')
+
+        result_count = response_json['meta']['result_count']
+        if ISVERBOSE: print('[!] Fetched ' + str(result_count) + ' records')
+        metrics.count('pages')
+        metrics.count('records', result_count)
+        fetched += result_count
+        page_size = max(page_size, result_count)
+        if ISVERBOSE: print('[!] Partial count: ' + str(fetched) + ' records thus far...')
+
+        if result_count == 0:
+            if ISVERBOSE:
+                print('[!] No data returned')
+                print('[!] Last page reached')
+            journal.append([], None)
+            break
+
+        if ISVERBOSE:
+            print('[!] data: tweets ' + response_json['data'][0]['id'] + ' to ' + response_json['data'][-1]['id']
+                + ', includes: ' + str(len(response_json['includes']['users'])) + ' users')
+
+        with metrics.timer('merge'):
+            merged_json = mergeExpansions(response_json['data'], response_json['includes']['users'], authors)
+
+        new_json = [tweet for tweet in merged_json if tweet['id'] not in known_ids]
+        new_records = list(records.fromJson(new_json, profile))
+        output_list += new_records
+        if db is not None:
+            db.addTweets(new_json)
+        if ISVERBOSE:
+            print('[!] ' + str(len(new_json)) + ' new tweets, current output length = ' + str(len(output_list)), end = '\n\n')
+
+        if known_ids and not new_json:
+            if ISVERBOSE: print('[!] Page made entirely of archived tweets, stopping')
+            journal.append([], None)
+            break
+
+        next_token = response_json['meta'].get('next_token')
+        params.update([('pagination_token', next_token)])
+        new_authors = {tweet.author_id for tweet in new_records}
+        journal.append(list(records.toJson(new_records)), next_token,
+            [user for user in response_json['includes']['users'] if user['id'] in new_authors])
+
+    return output_list, count, page_size
+
+
+def openArchive(name, config_json):
+    """
+    openArchive() returns the store holding the local archive, None if there's no archive yet
+    Args:
+    - name (string): Twitter user name
+    - config_json (dict): contents of the configuration file
+    """
+    store = config_json.get('store', 'json')
+    if store != 'segments' and config_json['last_timestamp'] == '':
+        return None
+    return likestore.openStore(name + '_likedtweets', store, config_json['last_timestamp'], config_json.get('last_count'),
+        config_json.get('codec', 'gzip'))
+
+
+def openDatabase(name, config_json, archive):
+    """
+    openDatabase() returns the SQLite archive of the account, None if 'sqlite' is not enabled in the configuration file.
+    A new database is filled from the local archive first, if it holds any like
+    Args:
+    - name (string): Twitter user name
+    - config_json (dict): contents of the configuration file
+    - archive (JsonStore/SegmentStore): the local archive, None if there's no archive yet
+    """
+    if not config_json.get('sqlite', False):
+        return None
+    db = likesdb.LikesDB(name + '_likes.sqlite')
+    if db.count() == 0 and archive is not None and archive.count() > 0:
+        print('[+] Filling ' + db.filename + ' from the local archive')
+        db.backfill(archive.iterNewest(), readAuthors())
+    return db
+
+
+def searchDatabase(name, args):
+    """
+    searchDatabase() prints the tweets of the SQLite archive matching text, author and date range, newest first
+    Args:
+    - name (string): Twitter user name
+    - args (Namespace): command line, i.e. query, author, since, until, limit
+    """
+    filename = name + '_likes.sqlite'
+    if not os.path.isfile(filename):
+        print('[-] Local database ' + filename + ' not found')
+        print('[-] Quitting!', end = '\n\n')
+        sys.exit(40)  # ERROR: local archive not found
+    db = likesdb.LikesDB(filename)
+    start = time.perf_counter()
+    try:
+        rows = db.search(args.query, args.author, args.since, args.until, args.limit)
+    except ValueError as error:
+        print('[-] Invalid query: ' + str(error))
+        print('[-] Quitting!', end = '\n\n')
+        sys.exit(80)  # ERROR: invalid search query
+    elapsed = time.perf_counter() - start
+    for row in rows:
+        print(likesdb.formatResult(row))
+    print('[+] ' + str(len(rows)) + ' results out of ' + str(db.count()) + ' records in ' + format(elapsed * 1000, '.1f') + 'ms')
+    db.close()
+
+
+def readFacets(name, config_json, archive):
+    """
+    readFacets() returns the facet index of the archive, rebuilt if it doesn't match it (e.g. the archive predates it)
+    Args:
+    - name (string): Twitter user name
+    - config_json (dict): contents of the configuration file
+    - archive (JsonStore/SegmentStore/BlockStore): the local archive
+    """
+    index = facets.FacetIndex(name + '_likedtweets_facets.json')
+    if index.timestamp != config_json['last_timestamp'] or index.count != archive.count():
+        if ISVERBOSE: print('[+] Building the facet index of ' + archive.path)
+        index = facets.FacetIndex()
+        index.add(archive.iterNewest())
+        index.write(name + '_likedtweets_facets.json', config_json['last_timestamp'])
+    return index
+
+
+def showFacets(name, config_json, archive, args):
+    """
+    showFacets() prints the likes per author, per URL domain and per month, or per the facet chosen by --facet
+    Args:
+    - name (string): Twitter user name
+    - config_json (dict): contents of the configuration file
+    - archive (JsonStore/SegmentStore/BlockStore): the local archive
+    - args (Namespace): command line, i.e. facet, top
+    """
+    index = readFacets(name, config_json, archive)
+    authors = readAuthors()
+    with facets.openOutput() as out:
+        for facet in [args.facet] if args.facet else ['authors', 'domains', 'months']:
+            rows = index.top(facet, args.top, authors)
+            out.write('[+] Likes per ' + facet[:-1] + ', ' + str(len(rows)) + ' rows out of ' + str(index.count) + ' likes\n')
+            for value, likes in rows:
+                out.write(format(likes, '>9') + '  ' + value + '\n')
+
+
+def exportLikes(name, archive, args):
+    """
+    exportLikes() streams the likes matching author, domain and date range to the standard output or to a file,
+    as NDJSON, CSV or pretty printed
+    Args:
+    - name (string): Twitter user name
+    - archive (JsonStore/SegmentStore/BlockStore): the local archive
+    - args (Namespace): command line, i.e. format, output, author, domain, since, until
+    """
+    start = time.perf_counter()
+    with facets.openOutput(args.output) as out:
+        count = facets.exportArchive(archive, out, args.format, args.author, args.domain, args.since, args.until, readAuthors())
+    if args.output or ISVERBOSE:
+        print('[+] Exported ' + str(count) + ' likes of ' + name + ' in ' + format(time.perf_counter() - start, '.1f') + 's')
+
+
+def saveData(name, config_json, new_json, previous, journal, authors):
     """
-    saveData() writes to disk the full list of tweets
+    saveData() writes to disk the tweets, authors aside as they're stored in the author cache, then removes the page journal.
+    With the 'json' store the full list (new tweets on top of the previous archive) is streamed, then atomically renamed, to a new file.
+    With the 'segments' store only the new tweets are appended as a new segment, segments are then compacted
+    in the background: the compaction thread is returned so that the caller can join it before quitting.
+    With the 'blocks' store the full list is streamed, one compressed block at a time, to a new file.
+    The previous records are rewritten as per the current projection profile, the authors they bear being moved to the author cache
     Args:
     - name (string): Twitter username
-    - output_json (list): list of tweets containing both 'data' and 'includes'
+    - config_json (dict): contents of the configuration file
+    - new_json (list): list of fetched tweets, as compact records
+    - previous (JsonStore/SegmentStore/BlockStore): the previous archive, None in full mode as it gets replaced
+    - journal (PageJournal): page journal of the run
+    - authors (dict): author cache, generated by readAuthors()
     """
     if ISVERBOSE: print('[!] Storing liked_tweets to local file')
-    with open(name + '_likedtweets_' + TIMESTAMP + '.json', 'w') as output_file:
-        json.dump(output_json, output_file)
+    tweets_json = list(records.toJson(new_json))
+    if config_json.get('store', 'json') == 'segments':
+        store = likestore.SegmentStore(name + '_likedtweets_segments')
+        if previous is None:
+            store.replace(tweets_json)
+        else:
+            store.append(tweets_json)
+        journal.discard()
+        return store.compactAsync()
+
+    if config_json.get('store', 'json') == 'blocks':
+        store = likestore.BlockStore(name + '_likedtweets_' + TIMESTAMP + '.blocks', config_json.get('codec', 'gzip'))
+        if previous is None:
+            store.write(tweets_json)
+        else:
+            previous_json = upgradeRecords(previous, authors, config_json.get('profile', PROFILE))
+            store.write(itertools.chain(tweets_json, previous_json), len(tweets_json) + previous.count())
+        journal.discard()
+        return None
+
+    store = likestore.JsonStore(name + '_likedtweets_' + TIMESTAMP + '.json')
+    if previous is None:
+        store.write(tweets_json)
+    else:
+        previous_json = upgradeRecords(previous, authors, config_json.get('profile', PROFILE))
+        store.write(itertools.chain(tweets_json, previous_json))
+    journal.discard()
+    return None
 
 
-def updateConf(name, config_json):
+def updateConf(name, config_json, count):
     """
-    updateConf() updates the external configuration file with the last timestamp
+    updateConf() updates the external configuration file with the last timestamp and the number of archived likes,
+    so that the archive doesn't need to be read just to be counted
     Args:
     - config_json (dict): contents of the configuration file
     - name (string): Twitter user name
+    - count (int): number of likes in the archive
     """
     if ISVERBOSE: print('[!] Updating configuration file')
-    config_json.update(last_timestamp = TIMESTAMP)
-    with open(name + '_configv2.json', 'w') as config_out:
-        json.dump(config_json, config_out)
+    config_json.update(last_timestamp = TIMESTAMP, last_count = count)
+    atomicDump(config_json, name + '_configv2.json')
 
 
-def convert2HTML(tweets_json, name, old_ts):
+def convert2HTML(tweets, total, name, old_ts, authors):
     """
-    convert2HTML() converts the JSON file into a table-based HTML file
+    convert2HTML() converts the tweets into table-based HTML pages of htmlrender.PAGESIZE rows each, streamed straight
+    to disk, plus an index page <name>_index_<timestamp>.html linking them. Only the pages whose rows changed since
+    the previous conversion are rendered again
     Args:
-    - tweets_json (list): list of tweets
+    - tweets (iterable): tweets, as compact records, newest first
+    - total (int): number of tweets
     - name (string): Twitter user name
     - old_ts (string): previously saved timestamp
+    - authors (dict): author cache, generated by readAuthors()
     """
-    tweets_json_out = []
-    tweets_length = len(tweets_json)
-
-    for index in range(0, tweets_length):
-        tweet = {"ROW": "", "USER INFO": "", "TWEET INFO": "", "FULL TEXT": "", "URL": ""}
-        tweet.update({"ROW": index})
-        tweet.update({"USER INFO": {"USER_ID": tweets_json[index]['author_id'], "USER_NAME": tweets_json[index]['author_name'], "USER_HANDLE": tweets_json[index]['author_handle']}})
-        tweet.update({"TWEET INFO": {"TWEET_ID": tweets_json[index]['id'], "TWEET_DATE": tweets_json[index]['created_at']}})
-        tweet.update({"FULL TEXT": tweets_json[index]['text']})
-        try:
-            tweet.update({"URL": tweets_json[index]['entities']['urls'][0]['expanded_url']})
-        except:
-            tweet.update({"URL": "N/A"})
-        tweets_json_out.append(tweet)
-
-    index_out = json2html.convert(json = tweets_json_out)
+    import htmlrender              # Streaming, paginated HTML renderer, shared with savemylikes.py
+    with metrics.timer('render'):
+        tweets_length, pages, rendered = htmlrender.renderArchive((tweet.row(authors) for tweet in tweets), total, name, TIMESTAMP)
+    metrics.count('rendered', rendered)
 
-    with open(name + '_index_' + TIMESTAMP + '.html', 'w') as html_out:
-        html_out.write(index_out)
-
-    print('[+] Conversion to HTML done, processed ' + str(tweets_length) + ' records')
+    print('[+] Conversion to HTML done, processed ' + str(tweets_length) + ' records into ' + str(pages) + ' pages, '
+        + str(rendered) + ' rendered and ' + str(pages - rendered) + ' unchanged')
     if ISVERBOSE:
         print('[+] New file: ' + name + '_index_' + TIMESTAMP + '.html saved to disk')
 
-    subprocess.check_output(['rm', '-f', name + '_index_latest.html'])
-    subprocess.check_output(['ln', name + '_index_' + TIMESTAMP + '.html', name + '_index_latest.html'])
+    publish.publishLink(name + '_index_' + TIMESTAMP + '.html', name + '_index_latest.html')
     if ISVERBOSE:
         print('[+] New file: ' + name + '_index_' + TIMESTAMP + '.html linked to LATEST')
 
 
-def archiveFile(name, old_ts):
+def lockAccount(name):
     """
-    archiveFile() obsoletes old files by moving them to ARCHIVEDIR
+    lockAccount() takes the lock of an account, <name>.lock, for a run writing its files, i.e. the archive, the configuration
+    file and the HTML output. Quits if another run (cron, --watch, savemylikes.py) holds it. Returns the lock, the caller
+    releases it at the end of a 'with' statement
+    Args:
+    - name (string): Twitter user name
+    """
+    try:
+        return publish.accountLock(name).acquire()
+    except publish.LockError as error:
+        print('[-] Another run is updating ' + name + ': ' + str(error))
+        print('[-] Quitting!', end = '\n\n')
+        sys.exit(100)  # ERROR: account locked by another run
+
+
+def archiveFile(name, old_ts, store = 'json'):
+    """
+    archiveFile() obsoletes old files by storing them as a snapshot in ARCHIVEDIR, then removing them.
+    Snapshots are deduplicated by content, the retention policy of snapshots.py is applied afterwards
     Args:
     - name (string): Twitter user name
     - old_ts (string): previously saved timestamp
+    - store (string): kind of archive store, the 'segments' store has no per-run archive file
     """
     if ISVERBOSE: print('[!] Archiving obsolete files')
-    files = [name + '_likedtweets_' + old_ts + '.json', name + '_index_' + old_ts + '.html']
-    for file in files:
+    candidates = [name + '_index_' + old_ts + '.html']
+    if store != 'segments':
+        candidates.insert(0, likestore.openStore(name + '_likedtweets', store, old_ts).path)
+    files = []
+    for file in candidates:
         if os.path.isfile(file):
-            if os.path.isdir(ARCHIVEDIR):
-                shutil.move(file, ARCHIVEDIR + '/' + file)
-                if ISVERBOSE:
-                    print('[+] Archived file: ' + file)
-            else:
-                print('[-] "' + ARCHIVEDIR + '" is not present!')
-                sys.exit(60)  # ERROR: archive directory not found
+            files.append(file)
         else:
             print('[!] "' + file + '" is not present, skipping!')
+    if not files:
+        return
+    if not os.path.isdir(ARCHIVEDIR):
+        print('[-] "' + ARCHIVEDIR + '" is not present!')
+        sys.exit(60)  # ERROR: archive directory not found
+    import snapshots               # Content-deduplicated snapshots of the obsolete files, shared with savemylikes.py
+    size, written = snapshots.takeSnapshot(ARCHIVEDIR, name, old_ts, files)
+    for file in files:
+        os.remove(file)
+        if ISVERBOSE:
+            print('[+] Archived file: ' + file)
+    print('[+] Snapshot ' + old_ts + ' stored: ' + str(size) + ' bytes, ' + str(written) + ' bytes of new chunks')
+    for timestamp in snapshots.prune(ARCHIVEDIR, name, keep = old_ts):
+        if ISVERBOSE: print('[+] Removed snapshot: ' + timestamp)
+
+
+def fetchAccount(twitter_name, config_json, full, warm = None):
+    """
+    fetchAccount() runs the "get" workflow for one account: fetches the new likes, saves the archive, the configuration
+    file and the author cache, then archives the obsolete files and updates the facet index. Returns a summary: new records,
+    removed records (unliked or deleted, only detected by a full fetch), pages and archived records.
+    When called by --watch, the ID index, the author cache and the SQLite archive are kept in 'warm' across polls
+    rather than read again, and nothing is written unless new likes have been fetched
+    Args:
+    - twitter_name (string): Twitter user name
+    - config_json (dict): contents of the configuration file
+    - full (bool): fetch the whole list of likes, not just the new ones
+    - warm (dict): state kept by --watch between polls, None otherwise
+    """
+    metrics.setAccount(twitter_name)
+    url = createUrl(config_json['twitter_id'])
+    bearer_token = config_json['BEARER']
+    last_timestamp = config_json['last_timestamp']
+
+    # The previous archive, if any, is the base for the incremental fetch: its IDs tell fetchLikes() where to stop
+    archive = openArchive(twitter_name, config_json)
+    last_length = archive.count() if archive is not None else 0
+    is_incremental = last_length > 0 and not full
+    if warm is not None and 'known_ids' in warm and is_incremental:
+        known_ids = warm['known_ids']
+    else:
+        known_ids = buildIndex(archive.iterNewest()) if is_incremental else set()
+
+    """
+    In incremental mode "new_list" only holds the likes that are not archived yet, they are merged on top of the previous archive.
+    In full mode (first run or "--full") "new_list" holds the whole list of likes and replaces the previous archive.
+    """
+    journal = PageJournal(twitter_name + '_likedtweets.journal', 'incremental' if is_incremental else 'full')
+    if journal.replay():
+        print('[!] Resuming interrupted run, ' + str(len(journal.pages)) + ' pages found in ' + journal.filename)
+    if warm is not None and 'authors' in warm:
+        authors, db = warm['authors'], warm['db']
+    else:
+        authors = readAuthors()
+        db = openDatabase(twitter_name, config_json, archive)
+    new_list, count, page_size = fetchLikes(url, bearer_token, known_ids, authors, journal, db, config_json.get('profile', PROFILE))
+    if warm is not None:
+        warm.update(known_ids = known_ids, authors = authors, db = db)
+        if is_incremental and not new_list:
+            journal.discard()
+            print('[+] No new likes in ' + str(count) + ' pages')
+            return {'new': 0, 'removed': 0, 'pages': count, 'total': last_length}
+    # In incremental mode fetchLikes() only returns unknown IDs, a full fetch is merged against the previous archive
+    if is_incremental:
+        added, removed = changelog.idVector(tweet.id for tweet in new_list), changelog.idVector([])
+    else:
+        previous_ids = changelog.idVector(tweet['id'] for tweet in archive.iterNewest()) if archive is not None else changelog.idVector([])
+        added, removed = changelog.diff(previous_ids, changelog.idVector(tweet.id for tweet in new_list))
+    if warm is not None:
+        known_ids.update(tweet.id for tweet in new_list)
+    saveAuthors(authors)
+    if is_incremental:
+        print('[+] Operation completed, fetched ' + str(len(new_list)) + ' new records in ' + str(count) + ' pages')
+        if page_size > 0:
+            full_pages = -(-(len(new_list) + last_length) // page_size)  # full pagination, ending with the page without next_token
+            print('[+] Incremental fetch saved ' + str(max(full_pages - count, 0)) + ' pages/requests')
+    else:
+        print('[+] Operation completed, fetched ' + str(len(new_list)) + ' records in ' + str(count) + ' pages')
+        print('[+] Acquired ' + str(len(new_list) - last_length) + ' new records')
+
+    # Finally, some manipulation occurs of the output files
+    with metrics.timer('save'):
+        compaction = saveData(twitter_name, config_json, new_list, archive if is_incremental else None, journal, authors)
+    metrics.count('new', len(added))
+    metrics.count('removed', len(removed))
+    updateConf(twitter_name, config_json, len(new_list) + (last_length if is_incremental else 0))
+    if added or removed:
+        changelog.record(twitter_name + '_changelog.ndjson', TIMESTAMP, last_timestamp, 'incremental' if is_incremental else 'full', added, removed)
+        print('[+] Changelog: ' + str(len(added)) + ' added, ' + str(len(removed)) + ' removed')
+    if last_timestamp != TIMESTAMP:
+        with metrics.timer('archive'):
+            archiveFile(twitter_name, last_timestamp or 'EMPTY', config_json.get('store', 'json'))
+    if compaction is not None:
+        compaction.join()
+    facets.updateFacets(twitter_name + '_likedtweets_facets.json', list(records.toJson(new_list)), TIMESTAMP, is_incremental,
+        config_json['last_count'], openArchive(twitter_name, config_json))
+    return {'new': len(added), 'removed': len(removed), 'pages': count, 'total': config_json['last_count']}
+
+
+def watchAccount(twitter_name, config_json, full, interval, stats = False, metrics_file = None):
+    """
+    watchAccount() stays resident and runs fetchAccount() every 'interval' seconds, give or take WATCHJITTER.
+    The HTTP client, the ID index and the author cache are kept alive between polls, the archive is only saved and
+    the HTML output only regenerated when likes have been added or, by a full fetch, removed. A failed poll is reported and retried at the next
+    one, the journal of an interrupted pagination is resumed. The metrics file, if any, is refreshed after each poll.
+    Quits on Ctrl-C
+    Args:
+    - twitter_name (string): Twitter user name
+    - config_json (dict): contents of the configuration file
+    - full (bool): fetch the whole list of likes at the first poll
+    - interval (float): seconds between two polls
+    - stats (bool): print the metrics when quitting
+    - metrics_file (string): file the metrics are written to, None if not requested
+    """
+    global TIMESTAMP
+    warm = {}
+    try:
+        while True:
+            TIMESTAMP = datetime.now().strftime('%Y-%m-%d-%H')
+            old_ts = config_json['last_timestamp']
+            try:
+                with lockAccount(twitter_name):
+                    summary = fetchAccount(twitter_name, config_json, full, warm)
+                    if summary['new'] or summary['removed']:
+                        archive = openArchive(twitter_name, config_json)
+                        convert2HTML(loadRecords(archive.iterNewest(), warm['authors']), archive.count(), twitter_name, old_ts, warm['authors'])
+            except SystemExit as error:
+                print('[-] Poll failed with error code ' + str(error.code) + ', retrying at the next one')
+            else:
+                full = False
+            evictCache()
+            reportMetrics(False, metrics_file)
+            pause = interval * random.uniform(1 - WATCHJITTER, 1 + WATCHJITTER)
+            print('[+] Next poll in ' + format(pause, '.0f') + 's')
+            time.sleep(pause)
+    except KeyboardInterrupt:
+        print('[!] Interrupted, quitting')
+        printHttpSummary()
+        reportMetrics(stats, metrics_file)
+
+
+def findAccounts():
+    """
+    findAccounts() returns the user names of the accounts configured in the current directory,
+    i.e. of the <name>_configv2.json files
+    """
+    return sorted(filename[:-len('_configv2.json')] for filename in os.listdir('.') if filename.endswith('_configv2.json'))
+
+
+def fetchAll(names, full, jobs):
+    """
+    fetchAll() runs fetchAccount() for several accounts on a pool of threads, then prints a summary line per account.
+    All of the requests go through the shared client and scheduler: the pool size is the global concurrency cap while
+    each bearer token keeps its own rate budget. An account that fails, i.e. that would have quit the script,
+    doesn't stop the others. Returns the number of failed accounts
+    Args:
+    - names (list): Twitter user names
+    - full (bool): fetch the whole list of likes, not just the new ones
+    - jobs (int): number of accounts fetched concurrently
+    """
+    def worker(name):
+        start = time.perf_counter()
+        print('[+] Fetching liked tweets for ' + name)
+        try:
+            with lockAccount(name):
+                summary = fetchAccount(name, readConf(name), full)
+            summary['status'] = 0
+        except SystemExit as error:
+            summary = {'status': error.code}
+        except Exception as error:
+            print('[-] ' + name + ': ' + repr(error))
+            summary = {'status': 255}
+        summary['elapsed'] = time.perf_counter() - start
+        return summary
+
+    from concurrent.futures import ThreadPoolExecutor  # Launching parallel tasks
+    with ThreadPoolExecutor(max_workers = jobs) as executor:
+        results = list(executor.map(worker, names))
+
+    print('[+] Summary of ' + str(len(names)) + ' accounts')
+    failed = 0
+    for name, summary in zip(names, results):
+        if summary['status'] == 0:
+            print('[+] ' + name + ': ' + str(summary['new']) + ' new records in ' + str(summary['pages']) + ' pages, '
+                + str(summary['total']) + ' archived, ' + format(summary['elapsed'], '.1f') + 's')
+        else:
+            print('[-] ' + name + ': failed with error code ' + str(summary['status']) + ' after ' + format(summary['elapsed'], '.1f') + 's')
+            failed += 1
+    return failed
+
+
+def printHttpSummary():
+    """
+    printHttpSummary() prints the counters of the HTTP client and, if any, the retries and waits due to the rate limit
+    """
+    print('[+] HTTP: ' + httpclient.getClient().summary())
+    scheduler = httpclient.getScheduler()
+    if scheduler.retries or scheduler.waited:
+        print('[+] Rate limit: ' + str(scheduler.retries) + ' retries, ' + format(scheduler.waited, '.1f') + 's waited')
+
+
+def evictCache():
+    """
+    evictCache() bounds the page cache, if recording, by age and size and prints the pages recorded and evicted
+    """
+    cache = pagecache.getCache()
+    if cache is None or pagecache.isReplay():
+        return
+    removed, freed = cache.evict()
+    print('[+] Page cache: ' + str(cache.stored) + ' pages recorded, ' + str(removed) + ' evicted (' + str(freed) + ' bytes)')
+
+
+def reportMetrics(stats, metrics_file):
+    """
+    reportMetrics() prints the per-phase timers and the counters (--stats) and/or writes them to a file (--metrics)
+    Args:
+    - stats (bool): print the metrics
+    - metrics_file (string): file the metrics are written to, Prometheus text format or JSON, None if not requested
+    """
+    if stats:
+        for line in metrics.summary():
+            print(line)
+    if metrics_file:
+        metrics.writeMetrics(metrics_file)
 
 
 def main():
@@ -210,10 +781,34 @@ def main():
     parser = argparse.ArgumentParser(description = 'Consumes Twitter API to retrieve the liked tweets incrementally, version ' + __version__ + ', build ' + __build__ + '.')
     parser.add_argument('-v', '--verbose', action = 'store_true', help = 'Print extended information')
     parser.add_argument('-V', '--Version', action = 'version', version = '%(prog)s {version}'.format(version=__version__))
+    parser.add_argument('-F', '--full', action = 'store_true', help = 'Fetch the whole list of likes, not just the new ones')
+    parser.add_argument('--timeout', metavar = '<seconds>', default = httpclient.READ_TIMEOUT, type = float, help = 'HTTP read timeout')
+    parser.add_argument('--deadline', metavar = '<seconds>', default = httpclient.DEADLINE, type = float, help = 'Give up a request retried for longer than this')
+    parser.add_argument('--stats', action = 'store_true', help = 'Print the time spent per phase and the counters')
+    parser.add_argument('--metrics', metavar = '<file>', default = None, type = str, help = 'Write the metrics to <file>: Prometheus text format, JSON if *.json')
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--cache', metavar = '<directory>', nargs = '?', const = pagecache.CACHEDIR, default = None, type = str, help = 'Record the raw API pages to <directory>, ' + pagecache.CACHEDIR + ' by default')
+    cache_group.add_argument('--replay', metavar = '<directory>', nargs = '?', const = pagecache.CACHEDIR, default = None, type = str, help = 'Read the API pages from the cache instead of the network')
     group = parser.add_mutually_exclusive_group()
     group.add_argument('-g', '--get', metavar = '<User name>', default = '', type = str, help = 'User name or Twitter handle (w/o @)')
 #    group.add_argument('-p', '--print', metavar = '<User name>', default = '', type = str, help = 'Pretty print local JSON archive to screen')
     group.add_argument('-t', '--tohtml', metavar = '<User name>', default = '', type = str, help = 'Convert local JSON archive to HTML')
+    group.add_argument('-s', '--search', metavar = '<User name>', default = '', type = str, help = 'Search the local SQLite archive')
+    group.add_argument('-f', '--facets', metavar = '<User name>', default = '', type = str, help = 'Print the likes per author, domain and month')
+    group.add_argument('-e', '--export', metavar = '<User name>', default = '', type = str, help = 'Export the likes matching --author, --domain, --since and --until')
+    group.add_argument('-a', '--all', action = 'store_true', help = 'Get the likes of every account configured in the current directory')
+    parser.add_argument('-j', '--jobs', metavar = '<N>', default = JOBS, type = int, help = 'Accounts fetched concurrently by --all')
+    parser.add_argument('-w', '--watch', metavar = '<seconds>', default = 0, type = float, help = 'Keep running --get, polling every <seconds>')
+    parser.add_argument('-q', '--query', metavar = '<text>', default = None, type = str, help = 'Full-text query for --search, FTS5 syntax')
+    parser.add_argument('--author', metavar = '<handle>', default = None, type = str, help = 'Author filter for --search and --export')
+    parser.add_argument('--since', metavar = '<YYYY-MM-DD>', default = None, type = str, help = 'First day for --search and --export')
+    parser.add_argument('--until', metavar = '<YYYY-MM-DD>', default = None, type = str, help = 'Last day for --search and --export')
+    parser.add_argument('--limit', metavar = '<N>', default = 50, type = int, help = 'Maximum number of results for --search')
+    parser.add_argument('--domain', metavar = '<domain>', default = None, type = str, help = 'URL domain filter for --export, subdomains included')
+    parser.add_argument('--format', choices = facets.FORMATS, default = 'ndjson', help = 'Output format of --export')
+    parser.add_argument('-o', '--output', metavar = '<file>', default = None, type = str, help = 'Output file of --export, standard output by default')
+    parser.add_argument('--facet', choices = facets.FACETS, default = None, help = 'Facet printed by --facets, authors, domains and months by default')
+    parser.add_argument('--top', metavar = '<N>', default = facets.TOP, type = int, help = 'Rows per facet printed by --facets')
 
     # In case of no arguments help message is shown
     if len(sys.argv) == 1:
@@ -221,6 +816,8 @@ def main():
         sys.exit(10)  # ERROR: no arguments
     else:
         args = parser.parse_args() # parse command line
+        if args.watch and not args.get:
+            parser.error('argument -w/--watch: only allowed with -g/--get')
 
     """
     First off, <name>_configv2.json is read to fetch the user's Twitter ID and any tokens
@@ -228,96 +825,93 @@ def main():
     <User name>'s default value is the empty string, if <User name> has a non-empty value it must come from get/print/tohtml
     """
 #    twitter_name = args.get + args.print + args.tohtml
-    twitter_name = args.get + args.tohtml
-    global ISVERBOSE
+    twitter_name = args.get + args.tohtml + args.search + args.facets + args.export
+    global ISVERBOSE, TIMESTAMP
     ISVERBOSE = args.verbose
+    TIMESTAMP = datetime.now().strftime('%Y-%m-%d-%H')
+    # "cache" records the raw pages fetched, "replay" runs the same pipeline from the recorded pages
+    if args.cache or args.replay:
+        pagecache.setCache(pagecache.PageCache(args.replay or args.cache), replay = bool(args.replay))
+    # "all" fetches every account configured in the current directory, concurrently
+    if args.all:
+        names = findAccounts()
+        if not names:
+            print('[-] No <name>_configv2.json found!', end = '\n\n')
+            sys.exit(20)  # ERROR: config file not found
+        httpclient.getClient(read_timeout = args.timeout, pool_size = max(args.jobs, httpclient.POOLSIZE))
+        httpclient.getScheduler(args.deadline)
+        failed = fetchAll(names, args.full, args.jobs)
+        evictCache()
+        printHttpSummary()
+        reportMetrics(args.stats, args.metrics)
+        sys.exit(90 if failed else 0)  # ERROR: one or more accounts failed
     if twitter_name != '':
         config_json = readConf(twitter_name)
     else:
         print('[-] User ID is empty!', end = '\n\n')
         sys.exit(30)  # ERROR: user ID is an empty string
 
+    httpclient.getClient(read_timeout = args.timeout)
+    httpclient.getScheduler(args.deadline)
+
     # Once an <User name> has been provided we go on by assembling the necessary variables
-    twitter_id = config_json['twitter_id']
-    url = createUrl(twitter_id)
-    bearer_token = config_json['BEARER']
     last_timestamp = config_json['last_timestamp']
 
-    if last_timestamp != '':
-        with open(twitter_name + '_likedtweets_' + last_timestamp + '.json', 'r') as last_file:
-            input_json = json.load(last_file)
-            last_length = len(input_json)
-    else:
-        last_length = 0
+    # If "search" mutually exclusive option is chosen the SQLite archive is queried, the JSON archive isn't read
+    if args.search:
+        searchDatabase(twitter_name, args)
+        sys.exit(0)
+
+    # "facets" and "export" read the local archive, the facet index being refreshed if needed
+    if args.facets or args.export:
+        archive = openArchive(twitter_name, config_json)
+        try:
+            facets.checkDate(args.since)
+            facets.checkDate(args.until)
+        except ValueError as error:
+            print('[-] Invalid date: ' + str(error))
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(80)  # ERROR: invalid search query
+        try:
+            if archive is None:
+                raise FileNotFoundError
+            if args.facets:
+                showFacets(twitter_name, config_json, archive, args)
+            else:
+                exportLikes(twitter_name, archive, args)
+            sys.exit(0)
+        except FileNotFoundError:
+            print('[-] Local archive for ' + twitter_name + ' not found')
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(40)  # ERROR: local archive not found
 
     # If "tohtml" mutually exclusive option is chosen we do the same as with "print"
     if args.tohtml:
+        archive = openArchive(twitter_name, config_json)
         try:
             if ISVERBOSE: print('[+] Generating HTML output for user ' + twitter_name)
-            filename = twitter_name + '_likedtweets_' + last_timestamp + '.json'
-            with open(filename, 'r') as archive_in:
-                archive_json = json.load(archive_in)
-            convert2HTML(archive_json, twitter_name, last_timestamp)
+            if archive is None:
+                raise FileNotFoundError
+            metrics.setAccount(twitter_name)
+            authors = readAuthors()
+            with lockAccount(twitter_name):
+                convert2HTML(loadRecords(archive.iterNewest(), authors), archive.count(), twitter_name, last_timestamp, authors)
+            reportMetrics(args.stats, args.metrics)
             sys.exit(0)
         except FileNotFoundError:
-            print('[-] Local archive ' + filename + ' not found')
+            print('[-] Local archive for ' + twitter_name + ' not found')
             print('[-] Quitting!', end = '\n\n')
             sys.exit(40)  # ERROR: local archive not found
     # Once "tohtml" is done the script exits in a controlled fashion
 
-    """
-    At this stage a loop is triggered that queries the API endpoint until the response is empty
-    for info, see [Pagination](https://developer.twitter.com/en/docs/twitter-api/pagination)
-    at the end of the loop, "output_list" will bear a `list of dict`, treated as a JSON file
-    each list element is a single tweet, enriched by merging info from both returned 'data' and 'includes'
-    """
-    count = records = 0
-    next_token = 'dummy'  # value used only once, to set off the 'while' loop
-    output_list = []
-    while next_token:
-        count += 1
-        response_json = connect2Endpoint(url, bearer_token, query_params)
-        if ISVERBOSE: print('[!] Iteration = ' + str(count) + ' with next_token = \'' + next_token + '\'')
-
-        result_count = response_json['meta']['result_count']
-        if ISVERBOSE: print('[!] Fetched ' + str(result_count) + ' records')
-        records += result_count
-        if ISVERBOSE: print('[!] Partial count: ' + str(records) + ' records thus far...')
-
-        if result_count == 0:
-            if ISVERBOSE:
-                print('[!] No data returned')
-                print('[!] Last page reached')
-            print('[+] Operation completed, fetched ' + str(records) + ' records')
-            print('[+] Acquired ' + str(records - last_length) + ' new records')
-            break
-        else:
-            if ISVERBOSE:
-                print('data: ')
-                print(response_json['data'])
-                print('includes: ')
-                print(response_json['includes']['users'], end = '\n\n')
-
-            merged_json = mergeExpansions(response_json['data'], response_json['includes']['users'])
-            if ISVERBOSE:
-                print('merged data: ')
-                print(merged_json, end = '\n\n')
-
-            output_list += merged_json
-            if ISVERBOSE:
-                print('data length = ' + str(len(response_json['data'])))
-                print('current output len = ' + str(len(output_list)))
-                print('meta = ' + str(response_json['meta']), end = '\n\n')
-
-            next_token = response_json['meta']['next_token']
-            query_params.update([('pagination_token', next_token)])
-
-    # Finally, some manipulation occurs of the output files
-    saveData(twitter_name, output_list)
-    updateConf(twitter_name, config_json)
-    if last_timestamp != TIMESTAMP:
-        archiveFile(twitter_name, last_timestamp or 'EMPTY')
+    if args.watch:
+        watchAccount(twitter_name, config_json, args.full, args.watch, args.stats, args.metrics)
+        sys.exit(0)
+    with lockAccount(twitter_name):
+        fetchAccount(twitter_name, config_json, args.full)
+    evictCache()
+    printHttpSummary()
+    reportMetrics(args.stats, args.metrics)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# Optional SQLite archive, with full-text search, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  sqlite3 is imported by LikesDB only, normalize() users don't load it
+
+# External modules/dependencies
+from datetime import datetime  # Basic date and time types
+from urllib.parse import urlsplit  # Parse URLs into components
+# sqlite3 (DB-API 2.0 interface for SQLite databases) is imported when a database is opened, see LikesDB
+
+# Global settings
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS authors (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    username TEXT COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS authors_username ON authors (username);
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    author_id TEXT,
+    created_at TEXT,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS tweets_author ON tweets (author_id);
+CREATE INDEX IF NOT EXISTS tweets_created ON tweets (created_at);
+CREATE TABLE IF NOT EXISTS urls (
+    tweet_id INTEGER,
+    expanded_url TEXT,
+    domain TEXT,
+    PRIMARY KEY (tweet_id, expanded_url)
+);
+CREATE INDEX IF NOT EXISTS urls_domain ON urls (domain);
+CREATE VIRTUAL TABLE IF NOT EXISTS tweets_fts USING fts5 (text, content = 'tweets', content_rowid = 'id');
+CREATE TRIGGER IF NOT EXISTS tweets_ai AFTER INSERT ON tweets BEGIN
+    INSERT INTO tweets_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS tweets_ad AFTER DELETE ON tweets BEGIN
+    INSERT INTO tweets_fts (tweets_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+V1DATE = '%a %b %d %H:%M:%S %z %Y'  # created_at format of API v1.1, e.g. "Wed Aug 03 10:00:00 +0000 2022"
+
+
+def normalize(tweet):
+    """
+    normalize() turns a tweet, either a v2 record (as merged by likedtweetsv2.py) or a v1.1 object, into a tuple:
+    (id, created_at as ISO 8601, text, author (id, name, username), list of expanded URLs)
+    Args:
+    - tweet (dict): the tweet
+    """
+    if 'id_str' in tweet:
+        created_at = datetime.strptime(tweet['created_at'], V1DATE).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        author = (tweet['user']['id_str'], tweet['user']['name'], tweet['user']['screen_name'])
+        text = tweet.get('full_text', tweet.get('text', ''))
+    else:
+        created_at = tweet['created_at']
+        author = (tweet['author_id'], tweet.get('author_name'), tweet.get('author_handle'))
+        text = tweet['text']
+    urls = [url['expanded_url'] for url in tweet.get('entities', {}).get('urls', []) if url.get('expanded_url')]
+    return int(tweet['id']), created_at, text, author, urls
+
+
+class LikesDB:
+    """
+    LikesDB stores the likes of an account into SQLite: tweets, authors and URL entities, indexed by tweet id, author
+    and created_at, plus an FTS5 table over the text. It is filled page by page during the fetch
+    Args:
+    - filename (string): name of the database, e.g. <name>_likes.sqlite
+    """
+    def __init__(self, filename):
+        import sqlite3                 # DB-API 2.0 interface for SQLite databases
+        self.filename = filename
+        self.errors = sqlite3.OperationalError
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(SCHEMA)
+
+    def count(self):
+        """
+        count() returns the number of stored tweets
+        """
+        return self.connection.execute('SELECT COUNT(*) FROM tweets').fetchone()[0]
+
+    def addTweets(self, tweets):
+        """
+        addTweets() stores the given tweets in a single transaction, tweets already stored are skipped while
+        the authors are refreshed
+        Args:
+        - tweets (iterable): tweets, v2 records or v1.1 objects
+        """
+        with self.connection:
+            for tweet in tweets:
+                tweet_id, created_at, text, author, urls = normalize(tweet)
+                if author[1] is not None:
+                    self.connection.execute('INSERT INTO authors (id, name, username) VALUES (?, ?, ?) '
+                        'ON CONFLICT (id) DO UPDATE SET name = excluded.name, username = excluded.username', author)
+                cursor = self.connection.execute('INSERT OR IGNORE INTO tweets (id, author_id, created_at, text) VALUES (?, ?, ?, ?)',
+                    (tweet_id, author[0], created_at, text))
+                if cursor.rowcount:
+                    self.connection.executemany('INSERT OR IGNORE INTO urls (tweet_id, expanded_url, domain) VALUES (?, ?, ?)',
+                        [(tweet_id, url, urlsplit(url).hostname) for url in urls])
+
+    def addAuthors(self, authors):
+        """
+        addAuthors() stores the authors of the author cache
+        Args:
+        - authors (dict): author details (name, username) keyed by author_id
+        """
+        with self.connection:
+            self.connection.executemany('INSERT INTO authors (id, name, username) VALUES (?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET name = excluded.name, username = excluded.username',
+                [(author_id, author['name'], author['username']) for author_id, author in authors.items()])
+
+    def search(self, query = None, author = None, since = None, until = None, limit = 50):
+        """
+        search() returns the matching tweets, newest first, as tuples (id, created_at, username, name, text, url).
+        ValueError is raised on a malformed full-text query
+        Args:
+        - query (string): FTS5 query over the text, e.g. 'python AND http*'
+        - author (string): author handle (w/o @) or author_id
+        - since (string): first day, ISO 8601 e.g. 2022-08-01
+        - until (string): last day, ISO 8601 e.g. 2022-08-31
+        - limit (int): maximum number of results
+        """
+        sql = ('SELECT t.id, t.created_at, a.username, a.name, t.text, '
+            '(SELECT expanded_url FROM urls WHERE tweet_id = t.id LIMIT 1) '
+            'FROM tweets t LEFT JOIN authors a ON a.id = t.author_id')
+        clauses, params = [], []
+        if query:
+            clauses.append('t.id IN (SELECT rowid FROM tweets_fts WHERE tweets_fts MATCH ?)')
+            params.append(query)
+        if author:
+            clauses.append('(a.username = ? OR t.author_id = ?)')
+            params += [author.lstrip('@'), author]
+        if since:
+            clauses.append('t.created_at >= ?')
+            params.append(since)
+        if until:
+            clauses.append('t.created_at < ?')
+            params.append(until + '~')  # '~' sorts after any time of the day
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY t.created_at DESC LIMIT ?'
+        params.append(limit)
+        try:
+            return self.connection.execute(sql, params).fetchall()
+        except self.errors as error:
+            raise ValueError(str(error))
+
+    def backfill(self, tweets, authors = None):
+        """
+        backfill() fills a new, empty database from an existing archive, returns the number of stored tweets
+        Args:
+        - tweets (iterable): tweets of the archive
+        - authors (dict): author cache, only needed by archives that don't embed the author details
+        """
+        if authors:
+            self.addAuthors(authors)
+        self.addTweets(tweets)
+        return self.count()
+
+    def close(self):
+        """
+        close() closes the database
+        """
+        self.connection.close()
+
+
+def formatResult(row):
+    """
+    formatResult() returns a search result as two lines of text: date, author and tweet ID first, then text and URL
+    Args:
+    - row (tuple): one of the results returned by LikesDB.search()
+    """
+    tweet_id, created_at, username, name, text, url = row
+    header = created_at[:10] + '  @' + str(username) + ' (' + str(name) + ')  ' + str(tweet_id)
+    body = '    ' + ' '.join(text.split()) + ('  ' + url if url else '')
+    return header + '\n' + body
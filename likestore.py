@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# Archive storage backends shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version: single JSON file and append-only NDJSON segments
+#  2026-10-17  JsonStore streams the archive instead of loading it, its count can come from the configuration file
+#  2026-10-17  Added BlockStore: independently compressed blocks plus a block index
+#  2026-10-17  JsonStore.write() streams the tweets, any iterable can be written
+#  2026-10-17  Archives are written to temporary names unique to the process and thread
+
+# External modules/dependencies
+import gzip                    # Support for gzip files
+import json                    # JSON encoder and decoder
+import jsonstream              # Bounded-memory reader of JSON arrays
+import likesdb                 # Optional SQLite archive, normalize() gives the ID and ISO 8601 date of any tweet
+import lzma                    # Compression using the LZMA algorithm
+import os                      # Miscellaneous operating system interfaces
+import struct                  # Interpret bytes as packed binary data
+import threading               # Thread-based parallelism
+from journal import atomicDump  # Atomic write-then-rename of JSON documents
+from publish import tempName   # Temporary names unique to the process and thread
+
+# Global settings
+STORES = ('json', 'segments', 'blocks')
+MANIFEST = 'manifest.json'
+FANIN = 4  # number of segments of the same size tier merged together by compact()
+BLOCKSIZE = 1000  # tweets per compressed block of BlockStore
+CODECS = {
+    'gzip': (lambda data: gzip.compress(data, mtime = 0), gzip.decompress),
+    'lzma': (lzma.compress, lzma.decompress)
+}
+BLOCKMAGIC = b'LTBLOCK1'  # last bytes of a BlockStore file, preceded by the offset of the block index
+
+
+class JsonStore:
+    """
+    JsonStore is the historical archive format: one JSON document holding the list of tweets, newest first.
+    The document is never loaded as a whole, tweets are decoded one at a time by jsonstream.
+    FileNotFoundError is raised by the readers when the archive doesn't exist
+    Args:
+    - filename (string): name of the archive, e.g. <name>_likedtweets_<timestamp>.json
+    - count (int): number of tweets, as stored in the configuration file, None if unknown
+    """
+    def __init__(self, filename, count = None):
+        self.path = filename
+        self.known_count = count
+
+    def count(self):
+        """
+        count() returns the number of tweets, the archive is only scanned when the count is unknown
+        """
+        if self.known_count is None:
+            self.known_count = jsonstream.countArray(self.path)
+        return self.known_count
+
+    def iterNewest(self):
+        """
+        iterNewest() yields the tweets, newest first
+        """
+        return jsonstream.iterArray(self.path)
+
+    def iterOldest(self):
+        """
+        iterOldest() yields the tweets, oldest first
+        """
+        return jsonstream.iterArrayReverse(self.path)
+
+    def write(self, records):
+        """
+        write() atomically replaces the archive. Tweets are encoded one at a time, same layout as json.dump(), so that
+        a generator is written without being held in memory
+        Args:
+        - records (iterable): tweets, newest first
+        """
+        written = 0
+        temporary = tempName(self.path)
+        with open(temporary, 'w') as archive_out:
+            archive_out.write('[')
+            for record in records:
+                archive_out.write((', ' if written else '') + json.dumps(record))
+                written += 1
+            archive_out.write(']')
+            archive_out.flush()
+            os.fsync(archive_out.fileno())
+        os.replace(temporary, self.path)
+        self.known_count = written
+
+
+class SegmentStore:
+    """
+    SegmentStore keeps the archive as a directory of immutable, append-only NDJSON segments plus a small manifest.
+    Each run adds the new likes as a new segment, so the write cost depends on the new likes only. Segments are listed
+    oldest first in the manifest while each segment holds its tweets newest first, as returned by the API.
+    compact() merges runs of similarly sized segments, readers stream one segment at a time.
+    Args:
+    - dirname (string): directory holding the segments, e.g. <name>_likedtweets_segments
+    """
+    def __init__(self, dirname):
+        self.path = dirname
+        self.lock = threading.Lock()
+
+    def manifest(self):
+        """
+        manifest() returns the manifest: the list of segments (file name and number of tweets) and the next sequence number
+        """
+        try:
+            with open(os.path.join(self.path, MANIFEST), 'r') as manifest_in:
+                return json.load(manifest_in)
+        except FileNotFoundError:
+            return {'next': 1, 'segments': []}
+
+    def count(self):
+        """
+        count() returns the number of tweets, as stored in the manifest
+        """
+        return sum(segment['count'] for segment in self.manifest()['segments'])
+
+    def iterNewest(self):
+        """
+        iterNewest() yields the tweets newest first, reading one line at a time
+        """
+        for segment in reversed(self.manifest()['segments']):
+            with open(os.path.join(self.path, segment['file']), 'r') as segment_in:
+                for line in segment_in:
+                    yield json.loads(line)
+
+    def iterOldest(self):
+        """
+        iterOldest() yields the tweets oldest first, only one segment at a time is held in memory
+        """
+        for segment in self.manifest()['segments']:
+            with open(os.path.join(self.path, segment['file']), 'r') as segment_in:
+                lines = segment_in.readlines()
+            for line in reversed(lines):
+                yield json.loads(line)
+
+    def _writeSegment(self, manifest, lines):
+        """
+        _writeSegment() writes a new segment file out of an iterable of NDJSON lines, returns its manifest entry
+        """
+        filename = 'seg-' + format(manifest['next'], '06d') + '.ndjson'
+        manifest['next'] += 1
+        count = 0
+        with open(os.path.join(self.path, filename), 'w') as segment_out:
+            for line in lines:
+                segment_out.write(line)
+                count += 1
+            segment_out.flush()
+            os.fsync(segment_out.fileno())
+        return {'file': filename, 'count': count}
+
+    def append(self, records):
+        """
+        append() stores the new tweets as a new segment
+        Args:
+        - records (list): list of new tweets, newest first
+        """
+        if not records:
+            return
+        os.makedirs(self.path, exist_ok = True)
+        with self.lock:
+            manifest = self.manifest()
+            manifest['segments'].append(self._writeSegment(manifest, (json.dumps(tweet) + '\n' for tweet in records)))
+            atomicDump(manifest, os.path.join(self.path, MANIFEST))
+
+    def replace(self, records):
+        """
+        replace() stores the tweets as the only segment, dropping the previous ones (e.g. after a full fetch)
+        Args:
+        - records (list): list of tweets, newest first
+        """
+        os.makedirs(self.path, exist_ok = True)
+        with self.lock:
+            manifest = self.manifest()
+            obsolete = manifest['segments']
+            manifest['segments'] = [self._writeSegment(manifest, (json.dumps(tweet) + '\n' for tweet in records))]
+            atomicDump(manifest, os.path.join(self.path, MANIFEST))
+            for segment in obsolete:
+                os.remove(os.path.join(self.path, segment['file']))
+
+    def compact(self):
+        """
+        compact() merges FANIN consecutive segments of the same size tier (tier = number of digits in base FANIN)
+        into a single one, until no such run is left. This keeps the number of segments logarithmic in the archive size
+        """
+        with self.lock:
+            manifest = self.manifest()
+            segments = manifest['segments']
+            merged = False
+            index = 0
+            while index + FANIN <= len(segments):
+                group = segments[index:index + FANIN]
+                tiers = {_tier(segment['count']) for segment in group}
+                if len(tiers) > 1:
+                    index += 1
+                    continue
+                segments[index:index + FANIN] = [self._writeSegment(manifest, self._lines(reversed(group)))]
+                atomicDump(manifest, os.path.join(self.path, MANIFEST))
+                for segment in group:
+                    os.remove(os.path.join(self.path, segment['file']))
+                merged = True
+                index = 0
+            return merged
+
+    def compactAsync(self):
+        """
+        compactAsync() runs compact() on a background thread, the thread is returned so that the caller can join it
+        """
+        thread = threading.Thread(target = self.compact)
+        thread.start()
+        return thread
+
+    def _lines(self, segments):
+        """
+        _lines() yields the raw lines of the given segments, in order
+        """
+        for segment in segments:
+            with open(os.path.join(self.path, segment['file']), 'r') as segment_in:
+                for line in segment_in:
+                    yield line
+
+
+class BlockStore:
+    """
+    BlockStore keeps the archive in a single file of independently compressed blocks of BLOCKSIZE tweets (NDJSON),
+    newest first, followed by a block index: codec, number of tweets and, for each block, its offset and length,
+    number of tweets, smallest and largest tweet ID, oldest and newest created_at (ISO 8601). The file ends with
+    the offset of the index and BLOCKMAGIC.
+    Blocks are anchored to the oldest like (the newest block is the only partial one) so that adding likes leaves the
+    older blocks byte-for-byte identical. Readers only decompress the blocks they need, count() only reads the index
+    Args:
+    - filename (string): name of the archive, e.g. <name>_likedtweets_<timestamp>.blocks
+    - codec (string): 'gzip' or 'lzma', used by write(), readers take it from the index
+    """
+    def __init__(self, filename, codec = 'gzip'):
+        self.path = filename
+        self.codec = codec
+        self.index = None
+
+    def readIndex(self):
+        """
+        readIndex() returns the block index, FileNotFoundError is raised when the archive doesn't exist
+        """
+        if self.index is None:
+            with open(self.path, 'rb') as archive_in:
+                archive_in.seek(-8 - len(BLOCKMAGIC), os.SEEK_END)
+                offset, magic = struct.unpack('<Q8s', archive_in.read(8 + len(BLOCKMAGIC)))
+                if magic != BLOCKMAGIC:
+                    raise ValueError(self.path + ' is not a block archive')
+                archive_in.seek(offset)
+                self.index = json.loads(archive_in.read()[:-8 - len(BLOCKMAGIC)])
+        return self.index
+
+    def count(self):
+        """
+        count() returns the number of tweets, as stored in the block index
+        """
+        return self.readIndex()['count']
+
+    def readBlock(self, block):
+        """
+        readBlock() returns the tweets of a block, newest first
+        Args:
+        - block (dict): entry of the block index
+        """
+        decompress = CODECS[self.readIndex()['codec']][1]
+        with open(self.path, 'rb') as archive_in:
+            archive_in.seek(block['offset'])
+            data = decompress(archive_in.read(block['length']))
+        return [json.loads(line) for line in data.splitlines()]
+
+    def iterNewest(self):
+        """
+        iterNewest() yields the tweets newest first, one block at a time is held in memory
+        """
+        for block in self.readIndex()['blocks']:
+            yield from self.readBlock(block)
+
+    def iterOldest(self):
+        """
+        iterOldest() yields the tweets oldest first, one block at a time is held in memory
+        """
+        for block in reversed(self.readIndex()['blocks']):
+            yield from reversed(self.readBlock(block))
+
+    def find(self, tweet_id):
+        """
+        find() returns the tweet with the given ID, None if not archived. Only the blocks whose ID range includes it are read
+        Args:
+        - tweet_id (string/int): the tweet ID
+        """
+        tweet_id = int(tweet_id)
+        for block in self.readIndex()['blocks']:
+            if block['min_id'] <= tweet_id <= block['max_id']:
+                for tweet in self.readBlock(block):
+                    if likesdb.normalize(tweet)[0] == tweet_id:
+                        return tweet
+        return None
+
+    def iterRange(self, since, until):
+        """
+        iterRange() yields the tweets created within a date range, newest first. Only the blocks overlapping it are read
+        Args:
+        - since (string): first day, ISO 8601 e.g. 2022-08-01
+        - until (string): last day, ISO 8601 e.g. 2022-08-31
+        """
+        until += '~'  # '~' sorts after any time of the day
+        for block in self.readIndex()['blocks']:
+            if block['oldest'] < until and block['newest'] >= since:
+                for tweet in self.readBlock(block):
+                    if since <= likesdb.normalize(tweet)[1] < until:
+                        yield tweet
+
+    def write(self, records, total = None):
+        """
+        write() atomically replaces the archive, tweets are streamed into one block at a time
+        Args:
+        - records (iterable): tweets, newest first
+        - total (int): number of tweets, needed to anchor the blocks when 'records' is not a list
+        """
+        if total is None:
+            records = list(records)
+            total = len(records)
+        compress = CODECS[self.codec][0]
+        index = {'codec': self.codec, 'count': 0, 'blocks': []}
+
+        temporary = tempName(self.path)
+        with open(temporary, 'wb') as archive_out:
+            def flush(block):
+                data = compress(''.join(json.dumps(tweet) + '\n' for tweet in block).encode())
+                keys = [likesdb.normalize(tweet)[:2] for tweet in block]
+                index['blocks'].append({'offset': archive_out.tell(), 'length': len(data), 'count': len(block),
+                    'min_id': min(key[0] for key in keys), 'max_id': max(key[0] for key in keys),
+                    'oldest': min(key[1] for key in keys), 'newest': max(key[1] for key in keys)})
+                index['count'] += len(block)
+                archive_out.write(data)
+
+            block = []
+            limit = total % BLOCKSIZE or BLOCKSIZE
+            for tweet in records:
+                block.append(tweet)
+                if len(block) == limit:
+                    flush(block)
+                    block = []
+                    limit = BLOCKSIZE
+            if block:
+                flush(block)
+            offset = archive_out.tell()
+            archive_out.write(json.dumps(index).encode() + struct.pack('<Q8s', offset, BLOCKMAGIC))
+            archive_out.flush()
+            os.fsync(archive_out.fileno())
+        os.replace(temporary, self.path)
+        self.index = index
+
+
+def _tier(count):
+    """
+    _tier() returns the size tier of a segment, i.e. the number of digits of its count in base FANIN
+    """
+    tier = 0
+    while count:
+        count //= FANIN
+        tier += 1
+    return tier
+
+
+def openStore(prefix, kind, timestamp, count = None, codec = 'gzip'):
+    """
+    openStore() returns the store holding an archive
+    Args:
+    - prefix (string): archive name prefix, e.g. <name>_likedtweets
+    - kind (string): 'json', 'segments' or 'blocks', as set in the configuration file
+    - timestamp (string): timestamp of the archive, used by the 'json' and 'blocks' stores
+    - count (int): number of tweets of the archive, only used by the 'json' store (the manifest/index holds it otherwise)
+    - codec (string): compression of the 'blocks' store, 'gzip' or 'lzma'
+    """
+    if kind == 'segments':
+        return SegmentStore(prefix + '_segments')
+    if kind == 'blocks':
+        return BlockStore(prefix + '_' + timestamp + '.blocks', codec)
+    return JsonStore(prefix + '_' + timestamp + '.json', count)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Per-phase timers and counters, printed by --stats and exported by --metrics, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  Added the 'removed' counter, 'new' no longer goes negative when a full fetch finds fewer likes
+
+# External modules/dependencies
+import httpclient              # Pooled keep-alive HTTP client, its counters are exported too
+import json                    # JSON encoder and decoder
+import publish                 # Atomic write-then-rename of the output files
+import threading               # Thread-based parallelism
+import time                    # Time access and conversions
+from contextlib import contextmanager  # Utilities for with-statement contexts
+
+# Global settings
+PREFIX = 'likedtweets_'
+PHASES = ('request', 'parse', 'merge', 'save', 'render', 'archive')  # phases timed by the scripts, in pipeline order
+LOCK = threading.Lock()
+TIMERS = {}    # (phase, account) -> [calls, seconds]
+COUNTERS = {}  # (name, account) -> value
+CONTEXT = threading.local()  # account the current thread is working for, see setAccount()
+HELP = {
+    'pages': 'Pages (requests) fetched',
+    'records': 'Records returned by the API',
+    'new': 'Records added to the archive',
+    'removed': 'Records removed from the archive, i.e. unliked or deleted, by a full fetch',
+    'rendered': 'HTML pages rendered',
+}
+
+
+def setAccount(account):
+    """
+    setAccount() sets the account the current thread is working for, the following measures are labelled with it.
+    Threads of --all each work for their own account
+    Args:
+    - account (string): Twitter user name / ID
+    """
+    CONTEXT.account = account
+
+
+def account():
+    """
+    account() returns the account the current thread is working for, '' if none
+    """
+    return getattr(CONTEXT, 'account', '')
+
+
+@contextmanager
+def timer(phase):
+    """
+    timer() measures the time spent in the body of a 'with' statement and adds it to the phase. It costs two clock reads
+    and a lock, i.e. far less than the phase itself
+    Args:
+    - phase (string): one of PHASES
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with LOCK:
+            timing = TIMERS.setdefault((phase, account()), [0, 0.0])
+            timing[0] += 1
+            timing[1] += elapsed
+
+
+def count(name, value = 1):
+    """
+    count() adds to a counter
+    Args:
+    - name (string): counter, see HELP
+    - value (int): amount added
+    """
+    with LOCK:
+        COUNTERS[(name, account())] = COUNTERS.get((name, account()), 0) + value
+
+
+def collect():
+    """
+    collect() returns a snapshot of the measures: timers and counters by account, plus the counters of the HTTP client
+    and of the scheduler, which are shared by all of the accounts
+    """
+    with LOCK:
+        timers = [{'phase': phase, 'account': name, 'calls': calls, 'seconds': seconds}
+            for (phase, name), (calls, seconds) in TIMERS.items()]
+        counters = [{'name': counter, 'account': name, 'value': value} for (counter, name), value in COUNTERS.items()]
+    timers.sort(key = lambda timing: (timing['account'], PHASES.index(timing['phase']) if timing['phase'] in PHASES else len(PHASES)))
+    counters.sort(key = lambda counter: (counter['account'], counter['name']))
+    http = dict(httpclient.getClient().latency())
+    scheduler = httpclient.getScheduler()
+    http.update(retries = scheduler.retries, waited = scheduler.waited)
+    return {'timestamp': time.time(), 'timers': timers, 'counters': counters, 'http': http}
+
+
+def summary(measures = None):
+    """
+    summary() returns the measures as lines of text: one line per phase (calls, total and average time), counters,
+    then the time spent on the network and waiting for the rate limit
+    Args:
+    - measures (dict): as returned by collect(), collected now if None
+    """
+    measures = measures or collect()
+    lines = []
+    for timing in measures['timers']:
+        lines.append('[+] ' + (timing['account'] + ' ' if timing['account'] else '') + format(timing['phase'], '8')
+            + format(timing['calls'], '>7') + ' calls ' + format(timing['seconds'], '>9.3f') + 's, average '
+            + format(timing['seconds'] / timing['calls'] * 1000, '.1f') + 'ms')
+    for counter in measures['counters']:
+        lines.append('[+] ' + (counter['account'] + ' ' if counter['account'] else '') + counter['name'] + ': ' + str(counter['value']))
+    http = measures['http']
+    lines.append('[+] network ' + format(http['total'], '.3f') + 's in ' + str(http['requests']) + ' requests, '
+        + str(http['bytes']) + ' bytes, ' + str(http['retries']) + ' retries, ' + format(http['waited'], '.3f') + 's of rate limit waits')
+    return lines
+
+
+def _labels(**labels):
+    """
+    _labels() returns the labels of a Prometheus sample, e.g. {phase="save",account="bob"}, empty labels left out
+    """
+    pairs = [key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"' for key, value in labels.items() if value != '']
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def toPrometheus(measures = None):
+    """
+    toPrometheus() returns the measures in the Prometheus text exposition format, e.g. for the textfile collector
+    of node_exporter
+    Args:
+    - measures (dict): as returned by collect(), collected now if None
+    """
+    measures = measures or collect()
+    lines = ['# HELP ' + PREFIX + 'phase_seconds_total Time spent per phase',
+        '# TYPE ' + PREFIX + 'phase_seconds_total counter']
+    lines += [PREFIX + 'phase_seconds_total' + _labels(phase = timing['phase'], account = timing['account']) + ' ' + repr(timing['seconds'])
+        for timing in measures['timers']]
+    lines += ['# HELP ' + PREFIX + 'phase_calls_total Times each phase ran', '# TYPE ' + PREFIX + 'phase_calls_total counter']
+    lines += [PREFIX + 'phase_calls_total' + _labels(phase = timing['phase'], account = timing['account']) + ' ' + str(timing['calls'])
+        for timing in measures['timers']]
+    for name in sorted({counter['name'] for counter in measures['counters']}):
+        lines += ['# HELP ' + PREFIX + name + '_total ' + HELP.get(name, name), '# TYPE ' + PREFIX + name + '_total counter']
+        lines += [PREFIX + name + '_total' + _labels(account = counter['account']) + ' ' + str(counter['value'])
+            for counter in measures['counters'] if counter['name'] == name]
+    http = measures['http']
+    for name, key, text in (('http_requests_total', 'requests', 'HTTP requests sent'),
+            ('http_seconds_total', 'total', 'Time spent waiting for HTTP responses'),
+            ('http_bytes_total', 'bytes', 'Bytes received'),
+            ('http_retries_total', 'retries', 'Requests retried on 429/5xx or connection errors'),
+            ('rate_limit_wait_seconds_total', 'waited', 'Time spent waiting for the rate limit and backing off')):
+        lines += ['# HELP ' + PREFIX + name + ' ' + text, '# TYPE ' + PREFIX + name + ' counter', PREFIX + name + ' ' + str(http[key])]
+    lines += ['# HELP ' + PREFIX + 'last_run_timestamp_seconds Time of the export', '# TYPE ' + PREFIX + 'last_run_timestamp_seconds gauge',
+        PREFIX + 'last_run_timestamp_seconds ' + format(measures['timestamp'], '.3f')]
+    return '\n'.join(lines) + '\n'
+
+
+def writeMetrics(filename):
+    """
+    writeMetrics() writes the measures to a file, atomically so that a scraper never reads a partial file:
+    JSON if the file name ends with .json, otherwise the Prometheus text format (node_exporter expects *.prom)
+    Args:
+    - filename (string): name of the file
+    """
+    measures = collect()
+    publish.atomicWrite(filename, json.dumps(measures) if filename.endswith('.json') else toPrometheus(measures))
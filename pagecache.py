@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Record/replay cache of the raw API pages, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import argparse                # Parser for command-line options, arguments and sub-commands
+import gzip                    # Support for gzip files
+import hashlib                 # Secure hashes and message digests
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+import publish                 # Temporary names unique to the process and thread
+import sys                     # System-specific parameters and functions
+import threading               # Thread-based parallelism
+import time                    # Time access and conversions
+
+# Global settings
+CACHEDIR = '_pagecache'
+MAXBYTES = 512 << 20  # bytes, compressed pages kept at most, oldest evicted first
+MAXAGE = 30 * 86400   # seconds, pages older than this are evicted
+SUFFIX = '.page.gz'
+CACHE = None          # cache used by the scripts, see setCache()
+REPLAY = False        # whether the scripts read the pages from CACHE instead of the API
+
+
+def pageKey(url, params = None):
+    """
+    pageKey() returns the key of a page: SHA-1 of the endpoint and of the query parameters in canonical order, the
+    pagination cursor (pagination_token, max_id, since_id) being one of them
+    Args:
+    - url (string): the endpoint, possibly with a query string
+    - params (dict): query parameters sent aside the URL
+    """
+    canonical = url + '\n' + json.dumps(sorted((params or {}).items()))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+class PageCache:
+    """
+    PageCache keeps the raw responses (bodies as received) of the API on disk, one gzip file per page:
+    <directory>/<account>/<key>.page.gz, starting with a line of JSON metadata (URL, parameters, time of the fetch).
+    Recorded pages let the whole fetch/merge/save pipeline run again offline, at disk speed, with --replay, e.g. after
+    the merge or the rendering changed, and make test fixtures. evict() bounds the cache by age and by size
+    Args:
+    - directory (string): cache directory
+    - max_bytes (int): bytes kept at most by evict()
+    - max_age (float): seconds a page is kept at most by evict()
+    """
+    def __init__(self, directory = CACHEDIR, max_bytes = MAXBYTES, max_age = MAXAGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stored = 0
+
+    def path(self, account, url, params = None):
+        """
+        path() returns the file of a page
+        """
+        return os.path.join(self.directory, account or '_', pageKey(url, params) + SUFFIX)
+
+    def put(self, account, url, params, body):
+        """
+        put() stores a page, replacing the one recorded before with the same key
+        Args:
+        - account (string): Twitter user name / ID
+        - url (string): the endpoint
+        - params (dict): query parameters
+        - body (bytes): raw response body
+        """
+        filename = self.path(account, url, params)
+        os.makedirs(os.path.dirname(filename), exist_ok = True)
+        header = json.dumps({'url': url, 'params': params or {}, 'fetched': time.time()}).encode() + b'\n'
+        temporary = publish.tempName(filename)
+        with open(temporary, 'wb') as page_out:
+            page_out.write(gzip.compress(header + body, compresslevel = 5, mtime = 0))
+        os.replace(temporary, filename)
+        with self.lock:
+            self.stored += 1
+
+    def get(self, account, url, params = None):
+        """
+        get() returns the raw body of a recorded page, None if the page isn't in the cache
+        Args:
+        - account (string): Twitter user name / ID
+        - url (string): the endpoint
+        - params (dict): query parameters
+        """
+        try:
+            with open(self.path(account, url, params), 'rb') as page_in:
+                data = gzip.decompress(page_in.read())
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            self.hits += 1
+        return data[data.index(b'\n') + 1:]
+
+    def pages(self):
+        """
+        pages() returns the recorded pages as tuples (mtime, size, file name), oldest first
+        """
+        found = []
+        try:
+            accounts = os.listdir(self.directory)
+        except FileNotFoundError:
+            return found
+        for account in accounts:
+            for entry in os.scandir(os.path.join(self.directory, account)):
+                if entry.name.endswith(SUFFIX):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, stat.st_size, entry.path))
+        found.sort()
+        return found
+
+    def evict(self, now = None):
+        """
+        evict() removes the pages older than max_age, then the oldest ones until the cache fits in max_bytes.
+        Returns the number of removed pages and of freed bytes
+        Args:
+        - now (float): current time as seconds since the epoch, defaults to now
+        """
+        now = now or time.time()
+        with self.lock:
+            pages = self.pages()
+            total = sum(size for mtime, size, filename in pages)
+            removed, freed = 0, 0
+            for mtime, size, filename in pages:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                os.remove(filename)
+                total -= size
+                removed += 1
+                freed += size
+        return removed, freed
+
+
+def setCache(cache, replay = False):
+    """
+    setCache() sets the cache used by the scripts: pages are recorded into it, or, in replay mode, read from it
+    instead of the API
+    Args:
+    - cache (PageCache): the cache, None to disable it
+    - replay (bool): whether pages are replayed rather than recorded
+    """
+    global CACHE, REPLAY
+    CACHE, REPLAY = cache, replay
+
+
+def getCache():
+    """
+    getCache() returns the cache used by the scripts, None if disabled
+    """
+    return CACHE
+
+
+def isReplay():
+    """
+    isReplay() tells whether the pages are replayed from the cache instead of being fetched
+    """
+    return CACHE is not None and REPLAY
+
+
+def main():
+    """
+    main() lists or evicts the pages of the cache
+    """
+    parser = argparse.ArgumentParser(description = 'Lists and evicts the raw API pages recorded by --cache.')
+    parser.add_argument('-d', '--dir', metavar = '<directory>', default = CACHEDIR, type = str, help = 'Cache directory')
+    parser.add_argument('--max-mb', metavar = '<MB>', default = MAXBYTES >> 20, type = int, help = 'Size kept by --evict')
+    parser.add_argument('--max-days', metavar = '<days>', default = MAXAGE // 86400, type = float, help = 'Age kept by --evict')
+    group = parser.add_mutually_exclusive_group(required = True)
+    group.add_argument('-l', '--list', action = 'store_true', help = 'Pages and bytes per account')
+    group.add_argument('-E', '--evict', action = 'store_true', help = 'Evict the pages by age, then by size')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print('[-] "' + args.dir + '" is not present!')
+        sys.exit(60)  # ERROR: archive directory not found
+    cache = PageCache(args.dir, args.max_mb << 20, args.max_days * 86400)
+    if args.list:
+        accounts = {}
+        for mtime, size, filename in cache.pages():
+            pages, total, newest = accounts.get(os.path.basename(os.path.dirname(filename)), (0, 0, 0))
+            accounts[os.path.basename(os.path.dirname(filename))] = (pages + 1, total + size, max(newest, mtime))
+        for account, (pages, total, newest) in sorted(accounts.items()):
+            print(account + '  ' + str(pages) + ' pages, ' + str(total) + ' bytes, newest ' + time.strftime('%Y-%m-%d %H:%M', time.localtime(newest)))
+    else:
+        removed, freed = cache.evict()
+        print('[+] Evicted ' + str(removed) + ' pages, ' + str(freed) + ' bytes')
+
+if __name__ == '__main__':
+    main()
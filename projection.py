@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Field projection profiles: fields requested from the API and kept on disk, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# Global settings
+# - minimal: what identifies a like, i.e. tweet ID, date, text and author
+# - html: the above plus the first expanded URL, i.e. what the HTML output and -p show
+# - full: every field, as returned by the API
+PROFILES = ('minimal', 'html', 'full')
+V2FIELDS = {
+    'minimal': ('author_id,created_at', 'id,name,username'),
+    'html': ('author_id,created_at,entities', 'id,name,username'),
+    'full': ('author_id,created_at,entities,conversation_id,in_reply_to_user_id,lang,possibly_sensitive,public_metrics,referenced_tweets,source',
+        'id,name,username,created_at,description,location,profile_image_url,protected,public_metrics,url,verified')
+}  # (tweet.fields, user.fields) requested from API v2
+V1PARAMS = {'minimal': '&include_entities=false', 'html': '', 'full': ''}  # API v1.1 can only leave the entities out
+V1FIELDS = ('id', 'id_str', 'created_at', 'full_text', 'text')
+V1USERFIELDS = ('id', 'id_str', 'name', 'screen_name')
+
+
+def v2Params(profile):
+    """
+    v2Params() returns the query parameters selecting the fields of a profile, API v2
+    Args:
+    - profile (string): one of PROFILES
+    """
+    tweet_fields, user_fields = V2FIELDS[profile]
+    return {'expansions': 'author_id', 'tweet.fields': tweet_fields, 'user.fields': user_fields}
+
+
+def projectV1(tweet, profile):
+    """
+    projectV1() returns the fields of a v1.1 tweet kept on disk by a profile: the whole object with 'full', otherwise
+    IDs, date, text, a user object trimmed to IDs, name and handle and, with 'html', the first expanded URL
+    Args:
+    - tweet (dict): the tweet, as returned by API v1.1
+    - profile (string): one of PROFILES
+    """
+    if profile == 'full':
+        return tweet
+    projected = {key: tweet[key] for key in V1FIELDS if key in tweet}
+    projected['user'] = {key: tweet['user'][key] for key in V1USERFIELDS if key in tweet['user']}
+    if profile == 'html':
+        urls = [url for url in tweet.get('entities', {}).get('urls', [])[:1] if url.get('expanded_url')]
+        projected['entities'] = {'urls': [{'expanded_url': url['expanded_url']} for url in urls]}
+    return projected
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# Atomic publishing of the output files and per-account locks, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  The lock file, an unchanged file or link aren't rewritten, ext4 flushes a truncated or replaced file
+
+# External modules/dependencies
+import fcntl                   # The fcntl and ioctl system calls
+import os                      # Miscellaneous operating system interfaces
+import threading               # Thread-based parallelism
+
+# Global settings
+LOCKSUFFIX = '.lock'  # <name>.lock, shared by the v2 and v1.1 scripts as they write the same HTML output
+
+
+class LockError(Exception):
+    """
+    LockError is raised when another run holds a lock
+    Args:
+    - filename (string): the lock file
+    - holder (string): PID of the process holding the lock, as written in the file, '' if unknown
+    """
+    def __init__(self, filename, holder):
+        super().__init__(filename + ' is held by process ' + (holder or '?'))
+        self.filename = filename
+        self.holder = holder
+
+
+def tempName(filename):
+    """
+    tempName() returns a temporary name next to a file, unique to the process and thread, so that concurrent writers of
+    the same file never write to the same temporary file
+    """
+    return filename + '.' + str(os.getpid()) + '-' + str(threading.get_ident()) + '.tmp'
+
+
+def atomicWrite(filename, data):
+    """
+    atomicWrite() writes a file to a temporary name, flushes it to disk and only then renames it to its final name,
+    so that readers see either the previous file or the complete new one
+    Args:
+    - filename (string): final name of the file
+    - data (string/bytes): contents of the file
+    """
+    temporary = tempName(filename)
+    with open(temporary, 'wb' if isinstance(data, bytes) else 'w') as file_out:
+        file_out.write(data)
+        file_out.flush()
+        os.fsync(file_out.fileno())
+    os.replace(temporary, filename)
+
+
+def updateFile(filename, data):
+    """
+    updateFile() writes a file with atomicWrite() unless it already holds the same data, so that an unchanged file
+    keeps its inode (and the hard links to it) and isn't flushed to disk again. Returns whether the file was written
+    Args:
+    - filename (string): final name of the file
+    - data (string/bytes): contents of the file
+    """
+    try:
+        with open(filename, 'rb' if isinstance(data, bytes) else 'r') as file_in:
+            if file_in.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    atomicWrite(filename, data)
+    return True
+
+
+def publishLink(target, link):
+    """
+    publishLink() points a hard link, e.g. <name>_index_latest.html, to a file. The link is created under a temporary
+    name and renamed over the previous one, so that it's never missing, not even for a moment
+    Args:
+    - target (string): the linked file, e.g. <name>_index_<timestamp>.html
+    - link (string): name of the link
+    """
+    if os.path.exists(link) and os.path.samefile(target, link):
+        return  # already published, renaming over it would only flush it to disk
+    temporary = tempName(link)
+    os.link(target, temporary)
+    try:
+        os.replace(temporary, link)
+    finally:
+        if os.path.lexists(temporary):  # rename() does nothing when the link already points to the target
+            os.remove(temporary)
+
+
+class FileLock:
+    """
+    FileLock is an exclusive lock (flock) on a file, used as a context manager. The PID of the holder is written to the
+    file for the error message. The lock is released by the kernel when the process dies, a lock file left behind by a
+    crashed run doesn't block the next one. The file itself is never removed, as that would race with the next holder.
+    A lock already taken with acquire() is released at the end of the 'with' statement
+    Args:
+    - filename (string): the lock file
+    - wait (bool): wait for the lock rather than raising LockError when it's held
+    """
+    def __init__(self, filename, wait = False):
+        self.filename = filename
+        self.wait = wait
+        self.fd = None
+
+    def acquire(self):
+        """
+        acquire() takes the lock, LockError is raised when another process (or another FileLock) holds it
+        """
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if self.wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            holder = os.read(fd, 32).decode(errors = 'replace').strip()
+            os.close(fd)
+            raise LockError(self.filename, holder)
+        os.pwrite(fd, b'%-10d\n' % os.getpid(), 0)  # fixed width in place: truncating the file would flush it to disk
+        self.fd = fd
+        return self
+
+    def release(self):
+        """
+        release() releases the lock
+        """
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        self.fd = None
+
+    def __enter__(self):
+        return self if self.fd is not None else self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+
+def accountLock(name):
+    """
+    accountLock() returns the lock of an account, held by the runs writing its archive, configuration and HTML output,
+    so that overlapping runs (e.g. cron and --watch) don't clobber each other
+    Args:
+    - name (string): Twitter user name / ID
+    """
+    return FileLock(name + LOCKSUFFIX)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Compact in-memory tweet records used by likedtweetsv2.py from the fetch to the HTML output
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  Records follow the projection profile of the account, see projection.py
+
+# External modules/dependencies
+import sys                     # System-specific parameters and functions
+
+# Global settings
+FIELDS = ('id', 'text', 'author_id', 'created_at')
+AUTHORFIELDS = ('author_name', 'author_handle')  # embedded by former versions, now kept in the author cache
+
+
+class Tweet:
+    """
+    Tweet holds the fields of a liked tweet actually used by the pipeline, i.e. fetching, merging, saving and rendering:
+    id, author_id, created_at, text and the first expanded URL. Attributes are slots, no per-instance dictionary is
+    allocated, and author IDs are interned so that all of the likes of an author share a single string.
+    The other fields are only kept, in 'extra', by the 'full' projection profile
+    Args:
+    - id (string): tweet ID
+    - author_id (string): author ID, the author's name and handle are kept in the author cache
+    - created_at (string): creation date, ISO 8601
+    - text (string): text of the tweet
+    - url (string): first expanded URL, None if the tweet has none
+    - extra (dict): the other fields of the tweet, None unless the profile is 'full'
+    """
+    __slots__ = ('id', 'author_id', 'created_at', 'text', 'url', 'extra')
+
+    def __init__(self, id, author_id, created_at, text, url = None, extra = None):
+        self.id = id
+        self.author_id = sys.intern(author_id)
+        self.created_at = created_at
+        self.text = text
+        self.url = url
+        self.extra = extra
+
+    @classmethod
+    def fromJson(cls, tweet, profile = 'html'):
+        """
+        fromJson() returns the record of a tweet, either as returned by the API or as stored in the archive
+        Args:
+        - tweet (dict): the tweet
+        - profile (string): projection profile, see projection.PROFILES
+        """
+        url, extra = None, None
+        if profile != 'minimal':
+            try:
+                url = tweet['entities']['urls'][0].get('expanded_url')
+            except (KeyError, IndexError):
+                pass
+        if profile == 'full':
+            extra = {key: value for key, value in tweet.items() if key not in FIELDS and key not in AUTHORFIELDS} or None
+        return cls(tweet['id'], tweet['author_id'], tweet['created_at'], tweet['text'], url, extra)
+
+    def toJson(self):
+        """
+        toJson() returns the tweet as stored in the archive, same layout as the API response so that the archive can
+        still be read by likesdb.normalize() and by former versions
+        """
+        tweet = {'id': self.id, 'text': self.text, 'author_id': self.author_id, 'created_at': self.created_at}
+        if self.url is not None:
+            tweet['entities'] = {'urls': [{'expanded_url': self.url}]}
+        if self.extra is not None:
+            tweet.update(self.extra)
+        return tweet
+
+    def row(self, authors):
+        """
+        row() returns the fields of the tweet shown in the HTML output:
+        (user_id, user_name, user_handle, tweet_id, tweet_date, text, url)
+        Args:
+        - authors (dict): author cache, keyed by author_id
+        """
+        author = authors.get(self.author_id, {})
+        return (self.author_id, author.get('name', 'N/A'), author.get('username', 'N/A'),
+            self.id, self.created_at, self.text, self.url or 'N/A')
+
+
+def fromJson(tweets_json, profile = 'html'):
+    """
+    fromJson() yields the records of the given tweets
+    Args:
+    - tweets_json (iterable): tweets, as returned by the API or as stored in the archive
+    - profile (string): projection profile, see projection.PROFILES
+    """
+    return (Tweet.fromJson(tweet, profile) for tweet in tweets_json)
+
+
+def toJson(tweets):
+    """
+    toJson() yields the given records as stored in the archive
+    Args:
+    - tweets (iterable): records
+    """
+    return (tweet.toJson() for tweet in tweets)
@@ -14,24 +14,36 @@
 
 # External modules/dependencies
 import argparse                # Parser for command-line options, arguments and sub-commands
+import changelog               # Changelog of the liked/unliked tweets between runs, shared with likedtweetsv2.py
+import facets                  # Facet indexes and buffered export, shared with likedtweetsv2.py
+import httpclient              # Pooled keep-alive HTTP client, shared with likedtweetsv2.py
+import itertools               # Functions creating iterators for efficient looping
 import json                    # JSON encoder and decoder
-import requests                # HTTP library for Python
+import likesdb                 # Optional SQLite archive with full-text search, shared with likedtweetsv2.py
+import likestore               # Archive storage backends, shared with likedtweetsv2.py
+import metrics                 # Per-phase timers and counters, shared with likedtweetsv2.py
 import os                      # Miscellaneous operating system interfaces
-import shutil                  # High-level file operations
-import subprocess              # Subprocess management
+import pagecache               # Record/replay cache of the raw API pages, shared with likedtweetsv2.py
+import projection              # Field projection profiles, shared with likedtweetsv2.py
+import publish                 # Atomic publishing and per-account locks, shared with likedtweetsv2.py
 import sys                     # System-specific parameters and functions
+import time                    # Time access and conversions
 from datetime import datetime  # Basic date and time types
-from json2html import *        # Python wrapper for JSON to HTML-Table convertor
+from journal import PageJournal, atomicDump  # Crash-safe page journal, shared with likedtweetsv2.py
+# Imported by the modes using them, so that -V, -p, -s, -f and -e don't load them: htmlrender (see convert_all()),
+# snapshots (see archive_file()), concurrent.futures (see fetch_all())
 
 # Global settings
 __version__ = '2.5'
 __build__ = '20210511'
-APIENTRYPOINT = 'https://api.twitter.com/1.1/favorites/list.json'
+APIENTRYPOINT = httpclient.APIBASE + '/1.1/favorites/list.json'
 MAXCOUNT = 200
 TWEET_MODE = "extended"
 BASEURL = APIENTRYPOINT + '?count=' + str(MAXCOUNT) + '&tweet_mode=' + TWEET_MODE
-TIMESTAMP = datetime.now().strftime('%Y-%m-%d-%H')
+TIMESTAMP = None  # time of the run, format: %Y-%m-%d-%H, set by main()
 ARCHIVEDIR = '_archive'
+JOBS = 4  # accounts fetched concurrently by --all
+PROFILE = 'full'  # default projection profile: fields requested and stored, see projection.py
 
 def read_conf(name):
     """
@@ -39,7 +51,10 @@ def read_conf(name):
     The file is JSON-formatted and contains:
       the OAuth2 bearer tokens for any users,
       the last timestamp,
-      the last index where we left off.
+      the last index where we left off,
+      optionally, the kind of archive store: 'json' (default), 'segments' or 'blocks', and the 'codec' of 'blocks': 'gzip' (default) or 'lzma',
+      optionally, whether the likes are also stored into SQLite: 'sqlite' (default: false),
+      optionally, the projection 'profile': 'minimal', 'html' or 'full' (default), see projection.py.
     """
     try:
         with open(name + '_config.json', 'r') as config_in:
@@ -56,198 +71,335 @@ def read_conf(name):
             beautify_last_timestamp = config_json['last_timestamp'] or 'EMPTY'
             print('[+] Last index is: ' + beautify_last_index_str)
             print('[+] Last timestamp is: ' + beautify_last_timestamp)
+        if config_json.get('store', 'json') not in likestore.STORES or config_json.get('codec', 'gzip') not in likestore.CODECS:
+            print('[-] Unknown archive store: ' + config_json.get('store', 'json') + ' / ' + config_json.get('codec', 'gzip'))
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(70)  # ERROR: unknown archive store
+        if config_json.get('profile', PROFILE) not in projection.PROFILES:
+            print('[-] Unknown projection profile: ' + config_json['profile'])
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(70)  # ERROR: unknown archive store/profile
         return config_json
     except FileNotFoundError:
         print('[-] Config file not found for ' + name)
         print('[-] Quitting!', end = '\n\n')
         sys.exit(20)  # ERROR: wrong user ID / config file not found
 
-def update_conf(config_json, name, new_index_str):
+def update_conf(config_json, name, new_index_str, count):
     """
     update_conf() updates the external configuration file with the last fetched value, "last_index_str".
     Incremental API requests must comply with "since_id = last_index_str".
+    The length of the archive, "last_count", is stored as well so that -p and -t don't need to count the records.
+    The file is replaced atomically, a crash never leaves it pointing to a half-written archive.
+    """
+    config_json.update(last_index_str = new_index_str, last_timestamp = TIMESTAMP, last_count = count)
+    atomicDump(config_json, name + '_config.json')
+
+def open_archive(name, config_json):
+    """
+    open_archive() returns the store holding the local archive, as set by the 'store' key of the configuration file
+    """
+    return likestore.openStore(name + '_twitter_likes', config_json.get('store', 'json'), config_json['last_timestamp'],
+        config_json.get('last_count'), config_json.get('codec', 'gzip'))
+
+def print_all(archive):
+    """
+    print_all() displays the local archive in a nicely formatted fashion, oldest first. ROW counts from the oldest like (0),
+    as in the HTML output.
+    The archive is streamed in reverse order, a block of records at a time, each record is written at once to a buffered output
+    """
+    with facets.openOutput() as out:
+        for index, tweet in enumerate(archive.iterOldest()):
+            try:
+                url = tweet['entities']['urls'][0]['expanded_url']
+            except (KeyError, IndexError):
+                url = 'N/A'
+            out.write('{\n\t"ROW": "' + str(index) + '",\n\t"TWEET_ID": "' + tweet['id_str'] + '",\n\t"TWEET_FULL_TEXT": """'
+                + tweet['full_text'] + '""",\n\t"TWEET_DATE": "' + tweet['created_at'] + '",\n\t"USER_ID": "' + tweet['user']['id_str']
+                + '",\n\t"USER_NAME": "' + tweet['user']['name'] + '",\n\t"USER_HANDLE": "' + tweet['user']['screen_name']
+                + '",\n\t"URL": "' + url + '"\n}\n\n')
+
+def read_facets(name, config_json, archive):
+    """
+    read_facets() returns the facet index of the archive, rebuilt if it doesn't match it (e.g. the archive predates it)
     """
-    config_json.update(last_index_str = new_index_str, last_timestamp = TIMESTAMP)
-    with open(name + '_config.json', 'w') as config_out:
-        json.dump(config_json, config_out)
+    index = facets.FacetIndex(name + '_twitter_likes_facets.json')
+    if index.timestamp != config_json['last_timestamp'] or index.count != archive.count():
+        if ISVERBOSE: print('[+] Building the facet index of ' + archive.path)
+        index = facets.FacetIndex()
+        index.add(archive.iterNewest())
+        index.write(name + '_twitter_likes_facets.json', config_json['last_timestamp'])
+    return index
+
+def show_facets(name, config_json, archive, args):
+    """
+    show_facets() prints the likes per author, per URL domain and per month, or per the facet chosen by --facet
+    """
+    index = read_facets(name, config_json, archive)
+    with facets.openOutput() as out:
+        for facet in [args.facet] if args.facet else ['authors', 'domains', 'months']:
+            rows = index.top(facet, args.top)
+            out.write('[+] Likes per ' + facet[:-1] + ', ' + str(len(rows)) + ' rows out of ' + str(index.count) + ' likes\n')
+            for value, likes in rows:
+                out.write(format(likes, '>9') + '  ' + value + '\n')
+
+def export_likes(name, archive, args):
+    """
+    export_likes() streams the likes matching author, domain and date range to the standard output or to a file,
+    as NDJSON, CSV or pretty printed
+    """
+    start = time.perf_counter()
+    with facets.openOutput(args.output) as out:
+        count = facets.exportArchive(archive, out, args.format, args.author, args.domain, args.since, args.until)
+    if args.output or ISVERBOSE:
+        print('[+] Exported ' + str(count) + ' likes of ' + name + ' in ' + format(time.perf_counter() - start, '.1f') + 's')
 
-def print_all(file_json):
+def open_db(name, config_json):
     """
-    print_all() displays the local archive in a nicely formatted fashion
+    open_db() returns the SQLite archive if 'sqlite' is enabled in the configuration file, None otherwise.
+    A new database is filled from the local archive first, if it holds any like.
     """
-    for index in range(len(file_json) - 1, -1, -1):
-        print('{')
-        print('\t"ROW": "' + str(index) + '",')
-        print('\t"TWEET_ID": "' + file_json[index]['id_str'] + '",')
-        print('\t"TWEET_FULL_TEXT": """' + file_json[index]['full_text'] + '""",')
-        print('\t"TWEET_DATE": "' + file_json[index]['created_at'] + '",')
-        print('\t"USER_ID": "' + file_json[index]['user']['id_str'] + '",')
-        print('\t"USER_NAME": "' + file_json[index]['user']['name'] + '",')
-        print('\t"USER_HANDLE": "' + file_json[index]['user']['screen_name'] + '",')
+    if not config_json.get('sqlite', False):
+        return None
+    db = likesdb.LikesDB(name + '_likes.sqlite')
+    if db.count() == 0 and config_json['last_timestamp'] != '':
         try:
-            print('\t"URL": "' + file_json[index]['entities']['urls'][0]['expanded_url'] + '"')
-        except:
-            print('\t"URL": "N/A"')
-        print('}', end = '\n\n')
+            archive = open_archive(name, config_json)
+            if archive.count() > 0:
+                print('[+] Filling ' + db.filename + ' from the local archive')
+                db.backfill(archive.iterNewest())
+        except FileNotFoundError:
+            print('[!] Local archive not found, starting from an empty database')
+    return db
 
-def requests_get(url, headers):
+def search_db(name, args):
     """
-    requests_get() handles the HTTP GET part, depends on 'Requests' external module
+    search_db() prints the tweets of the SQLite archive matching text, author and date range, newest first
     """
-    response = requests.get(url, headers=headers)
+    filename = name + '_likes.sqlite'
+    if not os.path.isfile(filename):
+        print('[-] Local database ' + filename + ' not found')
+        print('[-] Quitting!', end = '\n\n')
+        sys.exit(40)  # ERROR: local archive not found
+    db = likesdb.LikesDB(filename)
+    start = time.perf_counter()
+    try:
+        rows = db.search(args.query, args.author, args.since, args.until, args.limit)
+    except ValueError as error:
+        print('[-] Invalid query: ' + str(error))
+        print('[-] Quitting!', end = '\n\n')
+        sys.exit(80)  # ERROR: invalid search query
+    elapsed = time.perf_counter() - start
+    for row in rows:
+        print(likesdb.formatResult(row))
+    print('[+] ' + str(len(rows)) + ' results out of ' + str(db.count()) + ' records in ' + format(elapsed * 1000, '.1f') + 'ms')
+    db.close()
 
-    if response.status_code != 200:
+def requests_get(url, headers):
+    """
+    requests_get() handles the HTTP GET part, the connection is pooled and kept alive by httpclient.
+    Requests are paced to the rate limit and retried on 429/5xx, the script quits only when the deadline is exceeded.
+    With --cache the raw page is also recorded, with --replay it's read from the cache instead, see pagecache.py
+    """
+    cache = pagecache.getCache()
+    if pagecache.isReplay():
+        body = cache.get(metrics.account(), url)
+        if body is None:
+            print('[-] Page not found in ' + cache.directory + ': ' + url)
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(40)  # ERROR: local archive or cached page not found
+        print('[+] Page replayed from ' + cache.directory)
+        with metrics.timer('parse'):
+            response_json = json.loads(body)
+        metrics.count('pages')
+        metrics.count('records', len(response_json))
+        return response_json
+    try:
+        with metrics.timer('request'):
+            response = httpclient.getScheduler().request(url, headers['Authorization'], headers=headers)
+    except httpclient.FetchError as error:
         print('[-] An error has occurred!')
-        print('[-] HTTP status code: ' + str(response.status_code))
+        print('[-] HTTP status code: ' + str(error.status))
         print('[-] Quitting!', end = '\n\n')
+        if isinstance(error, httpclient.DeadlineError):
+            sys.exit(110)  # ERROR: request given up at the deadline
         sys.exit(255)  # ERROR: HTTP error
-    else:
-        print('[+] HTTP status code: ' + str(response.status_code))
+    print('[+] HTTP status code: ' + str(response.status_code))
+    if cache is not None:
+        cache.put(metrics.account(), url, None, response.content)
 
-    return response.json()
+    with metrics.timer('parse'):
+        response_json = response.json()
+    metrics.count('pages')
+    metrics.count('records', len(response_json))
+    return response_json
 
-def dump_json(response_json, name, old_ts):
+def dump_json(response_json, name, config_json, journal=None):
     """
     dump_json() appends any new data 'on top' of the local archive. If no previous local archive is present, we'll just save the contents of our request.
+    The new archive is streamed (new data, then the previous archive read one record at a time) and renamed atomically,
+    the page journal of the run (if any) is removed afterwards, then the previous archive is archived.
+    With the 'segments' store the new data is appended as a new segment instead, no previous data is read or rewritten,
+    segments are then compacted in the background while the changelog and the obsolete files are taken care of.
+    With the 'blocks' store the archive is written as independently compressed blocks, see likestore.BlockStore.
+    The added (and, when a previous archive is replaced, removed) IDs are appended to <name>_changelog.ndjson.
+    The previous records are rewritten as per the projection profile, see projection.projectV1().
+    The facet index, <name>_twitter_likes_facets.json, is updated with the new records.
+    The number of records of the new archive is returned.
     """
+    old_ts = config_json['last_timestamp']
+    mode = 'full' if config_json['last_index_str'] == '' else 'incremental'
+    if config_json.get('store', 'json') == 'segments':
+        store = likestore.SegmentStore(name + '_twitter_likes_segments')
+        if config_json['last_index_str'] == '':
+            store.replace(response_json)
+        else:
+            store.append(response_json)
+        if journal is not None:
+            journal.discard()
+        compaction = store.compactAsync()
+        print('[+] Records (new): ' + str(store.count()))
+        log_changes(name, old_ts, mode, changelog.idVector(tweet['id'] for tweet in response_json), changelog.idVector([]))
+        if old_ts != TIMESTAMP:
+            with metrics.timer('archive'):
+                archive_file(name, old_ts or 'EMPTY', 'segments')
+        compaction.join()
+        facets.updateFacets(name + '_twitter_likes_facets.json', response_json, TIMESTAMP, mode == 'incremental', store.count(), store)
+        return store.count()
+
     if old_ts == '':
         old_ts = 'EMPTY'
+    kind = config_json.get('store', 'json')
+    store = likestore.openStore(name + '_twitter_likes', kind, TIMESTAMP, codec=config_json.get('codec', 'gzip'))
 
     if ISVERBOSE:
         print('[+] Saving raw incremental data file for ' + name)
-        print('[+] New file: ' + name + '_twitter_likes_' + TIMESTAMP + '.json')
-
-    try:
-        with open(name + '_twitter_likes_' + old_ts + '.json', 'r') as previous_in:
-            previous_json = json.load(previous_in)
-            print('[+] Records (previous): ' + str(len(previous_json)))
-    except FileNotFoundError:
+        print('[+] New file: ' + store.path)
+
+    profile = config_json.get('profile', PROFILE)
+    previous = likestore.openStore(name + '_twitter_likes', kind, old_ts, config_json.get('last_count'), config_json.get('codec', 'gzip'))
+    previous_ids = []  # IDs of the previous archive, collected while it's streamed into the new one
+    if os.path.exists(previous.path):
+        previous_count = previous.count()
+        print('[+] Records (previous): ' + str(previous_count))
+        def previous_records():
+            for tweet in previous.iterNewest():
+                previous_ids.append(tweet['id'])
+                yield projection.projectV1(tweet, profile)
+        previous_json = previous_records()
+    else:
         if ISVERBOSE:
             print('[!] Starting from an empty archive')
-        previous_json = []
-
-    if old_ts != TIMESTAMP:
-        archive_file(name, old_ts)
-
-    new_json = response_json + previous_json
-    print('[+] Records (new): ' + str(len(new_json)))
+        previous_count = 0
+        previous_json = iter(())
 
-    with open(name + '_twitter_likes_' + TIMESTAMP + '.json', 'w') as response_out:
-        json.dump(new_json, response_out)
+    new_count = len(response_json) + previous_count
+    if kind == 'blocks':
+        store.write(itertools.chain(response_json, previous_json), new_count)
+    else:
+        store.write(itertools.chain(response_json, previous_json))
+    if journal is not None:
+        journal.discard()
     if ISVERBOSE:
-        print('[+] New file: ' + name + '_twitter_likes_' + TIMESTAMP + '.json saved to disk')
+        print('[+] New file: ' + store.path + ' saved to disk')
+    print('[+] Records (new): ' + str(new_count))
+    previous_vector = changelog.idVector(previous_ids)
+    added, removed = changelog.diff(previous_vector, changelog.idVector(itertools.chain(previous_vector, (tweet['id'] for tweet in response_json))))
+    log_changes(name, config_json['last_timestamp'], mode, added, removed)
 
-def convert_all(tweets_json, name, old_ts):
+    if old_ts != TIMESTAMP:
+        with metrics.timer('archive'):
+            archive_file(name, old_ts, kind)
+    facets.updateFacets(name + '_twitter_likes_facets.json', response_json if mode == 'incremental' else store.iterNewest(), TIMESTAMP, mode == 'incremental',
+        new_count, store)
+    return new_count
+
+def log_changes(name, old_ts, mode, added, removed):
     """
-    convert_all() converts the raw JSON file into a table-based HTML file
+    log_changes() appends the IDs added and removed by a run to <name>_changelog.ndjson, unless there are none
     """
-    tweets_json_out = []
-    tweets_length = len(tweets_json)
+    if added or removed:
+        changelog.record(name + '_changelog.ndjson', TIMESTAMP, old_ts, mode, added, removed)
+        print('[+] Changelog: ' + str(len(added)) + ' added, ' + str(len(removed)) + ' removed')
 
-    for index in range(0, tweets_length):
-        tweet = {"ROW": "", "USER INFO": "", "TWEET INFO": "", "FULL TEXT": "", "URL": ""}
-        tweet.update({"ROW": index})
-        tweet.update({"USER INFO": {"USER_ID": tweets_json[index]['user']['id_str'], "USER_NAME": tweets_json[index]['user']['name'], "USER_HANDLE": tweets_json[index]['user']['screen_name']}})
-        tweet.update({"TWEET INFO": {"TWEET_ID": tweets_json[index]['id_str'], "TWEET_DATE": tweets_json[index]['created_at']}})
-        tweet.update({"FULL TEXT": tweets_json[index]['full_text']})
-        try:
-            tweet.update({"URL": tweets_json[index]['entities']['urls'][0]['expanded_url']})
-        except:
-            tweet.update({"URL": "N/A"})
-        tweets_json_out.append(tweet)
-
-    index_out = json2html.convert(json = tweets_json_out)
+def tweet_row(tweet):
+    """
+    tweet_row() returns the fields of a tweet shown in the HTML output: (user_id, user_name, user_handle, tweet_id, tweet_date, text, url)
+    """
+    try:
+        url = tweet['entities']['urls'][0]['expanded_url']
+    except (KeyError, IndexError):
+        url = 'N/A'
+    return (tweet['user']['id_str'], tweet['user']['name'], tweet['user']['screen_name'],
+        tweet['id_str'], tweet['created_at'], tweet['full_text'], url)
 
-    with open(name + '_index_' + TIMESTAMP + '.html', 'w') as html_out:
-        html_out.write(index_out)
+def convert_all(tweets_json, total, name, old_ts):
+    """
+    convert_all() converts the raw JSON tweets, newest first, into table-based HTML pages streamed straight to disk,
+    plus an index page linking them. Only the pages whose rows changed since the previous conversion are rendered again.
+    """
+    import htmlrender              # Streaming, paginated HTML renderer, shared with likedtweetsv2.py
+    with metrics.timer('render'):
+        tweets_length, pages, rendered = htmlrender.renderArchive((tweet_row(tweet) for tweet in tweets_json), total, name, TIMESTAMP)
+    metrics.count('rendered', rendered)
 
-    print('[+] Processed: ' + str(tweets_length) + ' records')
+    print('[+] Processed: ' + str(tweets_length) + ' records, ' + str(pages) + ' pages (' + str(rendered) + ' rendered, ' + str(pages - rendered) + ' unchanged)')
     if ISVERBOSE:
         print('[+] New file: ' + name + '_index_' + TIMESTAMP + '.html saved to disk')
 
-    subprocess.check_output(['rm', '-f', name + '_index_latest.html'])
-    subprocess.check_output(['ln', name + '_index_' + TIMESTAMP + '.html', name + '_index_latest.html'])
+    publish.publishLink(name + '_index_' + TIMESTAMP + '.html', name + '_index_latest.html')
     if ISVERBOSE:
         print('[+] New file: ' + name + '_index_' + TIMESTAMP + '.html linked to LATEST')
 
-def archive_file(name, old_ts):
+def lock_account(name):
     """
-    archive_file() obsoletes an old archive by moving the file to ARCHIVEDIR
+    lock_account() takes the lock of an account, <user_id>.lock, for a run writing its archive, configuration file or HTML output.
+    Quits if another run (cron, likedtweetsv2.py) holds it. The lock is returned, the caller releases it with a 'with' statement.
     """
-    files = [name + '_twitter_likes_' + old_ts + '.json', name + '_index_' + old_ts + '.html']
-    for file in files:
+    try:
+        return publish.accountLock(name).acquire()
+    except publish.LockError as error:
+        print('[-] Another run is updating ' + name + ': ' + str(error))
+        print('[-] Quitting!', end = '\n\n')
+        sys.exit(100)  # ERROR: account locked by another run
+
+def archive_file(name, old_ts, kind='json'):
+    """
+    archive_file() obsoletes an old archive by storing the files as a content-deduplicated snapshot in ARCHIVEDIR,
+    then removing them. Old snapshots are pruned according to the retention policy of snapshots.py.
+    The 'segments' store has no per-run archive file, only the HTML index is archived.
+    """
+    candidates = [name + '_index_' + old_ts + '.html']
+    if kind != 'segments':
+        candidates.insert(0, likestore.openStore(name + '_twitter_likes', kind, old_ts).path)
+    files = []
+    for file in candidates:
         if os.path.isfile(file):
-          if os.path.isdir(ARCHIVEDIR):
-              shutil.move(file, ARCHIVEDIR + '/' + file)
-              if ISVERBOSE:
-                  print('[+] Archived file: ' + file)
-          else:
-              print('[-] "' + ARCHIVEDIR + '" is not present!')
-              sys.exit(60)  # ERROR: archive directory not found
+            files.append(file)
         else:
-          print('[!] "' + file + '" is not present, skipping!')
+            print('[!] "' + file + '" is not present, skipping!')
+    if not files:
+        return
+    if not os.path.isdir(ARCHIVEDIR):
+        print('[-] "' + ARCHIVEDIR + '" is not present!')
+        sys.exit(60)  # ERROR: archive directory not found
+    import snapshots               # Content-deduplicated snapshots of the obsolete files, shared with likedtweetsv2.py
+    size, written = snapshots.takeSnapshot(ARCHIVEDIR, name, old_ts, files)
+    for file in files:
+        os.remove(file)
+        if ISVERBOSE:
+            print('[+] Archived file: ' + file)
+    print('[+] Snapshot ' + old_ts + ' stored: ' + str(size) + ' bytes, ' + str(written) + ' bytes of new chunks')
+    for timestamp in snapshots.prune(ARCHIVEDIR, name, keep=old_ts):
+        if ISVERBOSE:
+            print('[+] Removed snapshot: ' + timestamp)
 
-def main():
+def fetch_account(user_id, config_json):
     """
-    main() handles the input (through argparse), then implements the logic based on the input arguments.
+    fetch_account() runs the "get" workflow for one account, then returns a summary: new records, pages and archived records.
+    It's called once by -g, once per account by -a.
     """
-    parser = argparse.ArgumentParser(description='Consumes Twitter API to retrieve the liked tweets incrementally, version ' + __version__ + ', build ' + __build__ + '.')
-    parser.add_argument('-v', '--verbose', action='store_true', help='Print extended information')
-    parser.add_argument('-V', '--Version', action='version', version='%(prog)s {version}'.format(version=__version__))
-    group = parser.add_mutually_exclusive_group()
-    group.add_argument('-g', '--get', metavar='<User ID>', default='', type=str, help='User ID or Twitter handle (w/o @)')
-    group.add_argument('-p', '--print', metavar='<User ID>', default='', type=str, help='Pretty print local JSON archive to screen')
-    group.add_argument('-t', '--tohtml', metavar='<User ID>', default='', type=str, help='Convert local JSON archive to HTML')
-
-    # In case of no arguments shows help message
-    if len(sys.argv) == 1:
-        parser.print_help()
-        sys.exit(10)  # ERROR: no arguments
-    else:
-        args = parser.parse_args() # parse command line
-
-    # First off, read <name>_config.json to fetch where we left off and any tokens
-    # Note: "get", "print", and "tohtml" are mutually exclusive, default = '', user_id is necessarily one of them 
-    user_id = args.get + args.print + args.tohtml
-    global ISVERBOSE
-    ISVERBOSE = args.verbose
-    if user_id != '':
-        config_json = read_conf(user_id)
-    else:
-        print('[-] User ID is empty!', end = '\n\n')
-        sys.exit(30)  # ERROR: user ID is an empty string
-
-    # If "print" mutually exclusive option is chosen we take a shortcut here
-    if args.print:
-        try:
-            if ISVERBOSE: print('[+] Printing local archive for user ' + user_id)
-            filename = user_id + '_twitter_likes_' + config_json['last_timestamp'] + '.json'
-            with open(filename, 'r') as archive_in:
-                archive_json = json.load(archive_in)
-            print_all(archive_json)
-            sys.exit(0)
-        except FileNotFoundError:
-            print('[-] Local archive ' + filename + ' not found')
-            print('[-] Quitting!', end = '\n\n')
-            sys.exit(40)  # ERROR: local archive not found
-    # Once "print" is done the script exits in a controlled fashion
-
-    # If "tohtml" mutually exclusive option is chosen we do the same as with "print"
-    if args.tohtml:
-        try:
-            if ISVERBOSE: print('[+] Generating HTML output for user ' + user_id)
-            filename = user_id + '_twitter_likes_' + config_json['last_timestamp'] + '.json'
-            with open(filename, 'r') as archive_in:
-                archive_json = json.load(archive_in)
-            convert_all(archive_json, user_id, config_json['last_timestamp'])
-            sys.exit(0)
-        except FileNotFoundError:
-            print('[-] Local archive ' + filename + ' not found')
-            print('[-] Quitting!', end = '\n\n')
-            sys.exit(40)  # ERROR: local archive not found
-    # Once "tohtml" is done the script exits in a controlled fashion
-
-    # The only other possibility is "get", that comes in two flavours:
+    # "get" comes in two flavours:
     # 1. "first": we must query the API starting from the most recent tweets and dig backwards,
     #             the resulting JSON archive = page1 + ... + pageN
     # 2. "incremental": we only need to gather the latest tweets by means of "since_id = last_index_str",
@@ -260,16 +412,25 @@ def main():
                'Content-Type': 'application/x-www-form-urlencoded;charset=UTF-8'
               }
     print('[+] Fetching tweets for ' + user_id)
+    metrics.setAccount(user_id)
+    db = open_db(user_id, config_json)
+    # The projection profile selects the fields kept on disk, the SQLite archive receives the whole tweets
+    profile = config_json.get('profile', PROFILE)
 
     if config_json['last_timestamp'] == '' or config_json['last_index_str'] == '':
         # Flavour = "first"
         print('[!] First run! We\'ll attempt to fetch each and every Likes recursively...')
 
-        archive_json = []
-        is_first = True
-        page_num = 1
-        url_first = BASEURL + '&screen_name=' + user_id
-        while True:
+        # Each page is journaled along with its last ID, an interrupted run is resumed from there
+        journal = PageJournal(user_id + '_twitter_likes.journal', 'first')
+        if journal.replay():
+            print('[!] Resuming interrupted run, ' + str(len(journal.pages)) + ' pages found in ' + journal.filename)
+        archive_json = journal.records()
+        is_first = not journal.pages
+        last_id = journal.cursor
+        page_num = len(journal.pages) + 1
+        url_first = BASEURL + projection.V1PARAMS[profile] + '&screen_name=' + user_id
+        while not journal.done:
             print('[+] Page N.: ' + str(page_num))
             page_num += 1
             if not is_first:
@@ -281,41 +442,258 @@ def main():
                 is_first = False
             response_json = requests_get(url, headers)
             response_len = len(response_json)
+            if db is not None:
+                db.addTweets(response_json)
+            response_json = [projection.projectV1(tweet, profile) for tweet in response_json]
             # archive_json aggregates the various response_json's
             archive_json += response_json
             try:
                 last_id = response_json[response_len - 1]['id']
             except IndexError:
+                journal.append([], None)
                 print('[+] That was the last page')
                 break
+            journal.append(response_json, last_id)
             if ISVERBOSE:
                 print('[+] Received ' + str(response_len) + ' items')
                 print('[+] Last ID is: ' + str(last_id))
                 print('[+] Archive length is: ' + str(len(archive_json)))
         # Finally, the in-memory JSON archive is saved to file
-        dump_json(archive_json, user_id, config_json['last_timestamp'])
+        with metrics.timer('save'):
+            count = dump_json(archive_json, user_id, config_json, journal)
+        metrics.count('new', len(archive_json))
         new_index_str = archive_json[0]['id_str']
         if ISVERBOSE: print('[+] New last index is: ' + new_index_str)
-        update_conf(config_json, user_id, new_index_str)
+        update_conf(config_json, user_id, new_index_str, count)
+        return {'new': len(archive_json), 'pages': page_num - 1, 'total': count}
     else:
         # Flavour = "incremental", "since_id" is used set the the value we fetch from the config file
-        url = BASEURL + '&screen_name=' + user_id + '&since_id=' + config_json['last_index_str']
+        url = BASEURL + projection.V1PARAMS[profile] + '&screen_name=' + user_id + '&since_id=' + config_json['last_index_str']
 
         response_json = requests_get(url, headers)
         response_len = len(response_json)
+        if db is not None:
+            db.addTweets(response_json)
+        response_json = [projection.projectV1(tweet, profile) for tweet in response_json]
         print('[+] Retrieved ' + str(response_len) + ' new tweets')
 
         if response_len > 0:
             # Saving the current response_json on top of the existing archive
             # Filename format is "<name>_twitter_likes_%Y-%m-%d-%H.json"
-            dump_json(response_json, user_id, config_json['last_timestamp'])
+            with metrics.timer('save'):
+                count = dump_json(response_json, user_id, config_json)
+            metrics.count('new', response_len)
 
             # Last step is to update the <name>_config.json file with the current last index
             new_index_str = response_json[0]['id_str']
             if ISVERBOSE: print('[+] New last index is: ' + new_index_str)
-            update_conf(config_json, user_id, new_index_str)
+            update_conf(config_json, user_id, new_index_str, count)
         else:
             print('[+] No updates!')
+        return {'new': response_len, 'pages': 1, 'total': config_json.get('last_count', 0)}
+
+def find_accounts():
+    """
+    find_accounts() returns the user IDs of the accounts configured in the current directory, i.e. of the <user_id>_config.json files
+    """
+    return sorted(filename[:-len('_config.json')] for filename in os.listdir('.') if filename.endswith('_config.json'))
+
+def fetch_all(user_ids, jobs):
+    """
+    fetch_all() runs fetch_account() for several accounts on a pool of "jobs" threads, then prints a summary line per account.
+    The requests share the pooled client and the scheduler, which keeps a separate rate budget for each bearer token.
+    An account that fails, i.e. that would have quit the script, doesn't stop the others. Returns the number of failed accounts.
+    """
+    def worker(user_id):
+        start = time.perf_counter()
+        try:
+            with lock_account(user_id):
+                summary = fetch_account(user_id, read_conf(user_id))
+            summary['status'] = 0
+        except SystemExit as error:
+            summary = {'status': error.code}
+        except Exception as error:
+            print('[-] ' + user_id + ': ' + repr(error))
+            summary = {'status': 255}
+        summary['elapsed'] = time.perf_counter() - start
+        return summary
+
+    from concurrent.futures import ThreadPoolExecutor  # Launching parallel tasks
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(worker, user_ids))
+
+    print('[+] Summary of ' + str(len(user_ids)) + ' accounts')
+    failed = 0
+    for user_id, summary in zip(user_ids, results):
+        if summary['status'] == 0:
+            print('[+] ' + user_id + ': ' + str(summary['new']) + ' new records in ' + str(summary['pages']) + ' pages, '
+                + str(summary['total']) + ' archived, ' + format(summary['elapsed'], '.1f') + 's')
+        else:
+            print('[-] ' + user_id + ': failed with error code ' + str(summary['status']) + ' after ' + format(summary['elapsed'], '.1f') + 's')
+            failed += 1
+    return failed
+
+def print_http_summary():
+    """
+    print_http_summary() prints the counters of the HTTP client and, if any, the retries and waits due to the rate limit
+    """
+    print('[+] HTTP: ' + httpclient.getClient().summary())
+    scheduler = httpclient.getScheduler()
+    if scheduler.retries or scheduler.waited:
+        print('[+] Rate limit: ' + str(scheduler.retries) + ' retries, ' + format(scheduler.waited, '.1f') + 's waited')
+
+def evict_cache():
+    """
+    evict_cache() bounds the page cache, if recording, by age and size and prints the pages recorded and evicted
+    """
+    cache = pagecache.getCache()
+    if cache is None or pagecache.isReplay():
+        return
+    removed, freed = cache.evict()
+    print('[+] Page cache: ' + str(cache.stored) + ' pages recorded, ' + str(removed) + ' evicted (' + str(freed) + ' bytes)')
+
+def report_metrics(stats, metrics_file):
+    """
+    report_metrics() prints the per-phase timers and the counters (--stats) and/or writes them to a file (--metrics),
+    Prometheus text format or JSON if the file name ends with .json
+    """
+    if stats:
+        for line in metrics.summary():
+            print(line)
+    if metrics_file:
+        metrics.writeMetrics(metrics_file)
+
+def main():
+    """
+    main() handles the input (through argparse), then implements the logic based on the input arguments.
+    """
+    parser = argparse.ArgumentParser(description='Consumes Twitter API to retrieve the liked tweets incrementally, version ' + __version__ + ', build ' + __build__ + '.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print extended information')
+    parser.add_argument('-V', '--Version', action='version', version='%(prog)s {version}'.format(version=__version__))
+    parser.add_argument('--timeout', metavar='<seconds>', default=httpclient.READ_TIMEOUT, type=float, help='HTTP read timeout')
+    parser.add_argument('--deadline', metavar='<seconds>', default=httpclient.DEADLINE, type=float, help='Give up a request retried for longer than this')
+    parser.add_argument('--stats', action='store_true', help='Print the time spent per phase and the counters')
+    parser.add_argument('--metrics', metavar='<file>', default=None, type=str, help='Write the metrics to <file>: Prometheus text format, JSON if *.json')
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument('--cache', metavar='<directory>', nargs='?', const=pagecache.CACHEDIR, default=None, type=str, help='Record the raw API pages to <directory>, ' + pagecache.CACHEDIR + ' by default')
+    cache_group.add_argument('--replay', metavar='<directory>', nargs='?', const=pagecache.CACHEDIR, default=None, type=str, help='Read the API pages from the cache instead of the network')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('-g', '--get', metavar='<User ID>', default='', type=str, help='User ID or Twitter handle (w/o @)')
+    group.add_argument('-p', '--print', metavar='<User ID>', default='', type=str, help='Pretty print local JSON archive to screen')
+    group.add_argument('-t', '--tohtml', metavar='<User ID>', default='', type=str, help='Convert local JSON archive to HTML')
+    group.add_argument('-s', '--search', metavar='<User ID>', default='', type=str, help='Search the local SQLite archive')
+    group.add_argument('-f', '--facets', metavar='<User ID>', default='', type=str, help='Print the likes per author, domain and month')
+    group.add_argument('-e', '--export', metavar='<User ID>', default='', type=str, help='Export the likes matching --author, --domain, --since and --until')
+    group.add_argument('-a', '--all', action='store_true', help='Get the likes of every account configured in the current directory')
+    parser.add_argument('-j', '--jobs', metavar='<N>', default=JOBS, type=int, help='Accounts fetched concurrently by --all')
+    parser.add_argument('-q', '--query', metavar='<text>', default=None, type=str, help='Full-text query for --search, FTS5 syntax')
+    parser.add_argument('--author', metavar='<handle>', default=None, type=str, help='Author filter for --search and --export')
+    parser.add_argument('--since', metavar='<YYYY-MM-DD>', default=None, type=str, help='First day for --search and --export')
+    parser.add_argument('--until', metavar='<YYYY-MM-DD>', default=None, type=str, help='Last day for --search and --export')
+    parser.add_argument('--limit', metavar='<N>', default=50, type=int, help='Maximum number of results for --search')
+    parser.add_argument('--domain', metavar='<domain>', default=None, type=str, help='URL domain filter for --export, subdomains included')
+    parser.add_argument('--format', choices=facets.FORMATS, default='ndjson', help='Output format of --export')
+    parser.add_argument('-o', '--output', metavar='<file>', default=None, type=str, help='Output file of --export, standard output by default')
+    parser.add_argument('--facet', choices=facets.FACETS, default=None, help='Facet printed by --facets, authors, domains and months by default')
+    parser.add_argument('--top', metavar='<N>', default=facets.TOP, type=int, help='Rows per facet printed by --facets')
+
+    # In case of no arguments shows help message
+    if len(sys.argv) == 1:
+        parser.print_help()
+        sys.exit(10)  # ERROR: no arguments
+    else:
+        args = parser.parse_args() # parse command line
+
+    # First off, read <name>_config.json to fetch where we left off and any tokens
+    # Note: "get", "print", and "tohtml" are mutually exclusive, default = '', user_id is necessarily one of them 
+    user_id = args.get + args.print + args.tohtml + args.search + args.facets + args.export
+    global ISVERBOSE, TIMESTAMP
+    ISVERBOSE = args.verbose
+    TIMESTAMP = datetime.now().strftime('%Y-%m-%d-%H')
+    # "cache" records the raw pages fetched, "replay" runs the same pipeline from the recorded pages
+    if args.cache or args.replay:
+        pagecache.setCache(pagecache.PageCache(args.replay or args.cache), replay=bool(args.replay))
+    # "all" fetches every account configured in the current directory, concurrently
+    if args.all:
+        user_ids = find_accounts()
+        if not user_ids:
+            print('[-] No <user_id>_config.json found!', end = '\n\n')
+            sys.exit(20)  # ERROR: config file not found
+        httpclient.getClient(read_timeout=args.timeout, pool_size=max(args.jobs, httpclient.POOLSIZE))
+        httpclient.getScheduler(args.deadline)
+        failed = fetch_all(user_ids, args.jobs)
+        evict_cache()
+        print_http_summary()
+        report_metrics(args.stats, args.metrics)
+        sys.exit(90 if failed else 0)  # ERROR: one or more accounts failed
+    if user_id != '':
+        config_json = read_conf(user_id)
+    else:
+        print('[-] User ID is empty!', end = '\n\n')
+        sys.exit(30)  # ERROR: user ID is an empty string
+
+    # If "search" mutually exclusive option is chosen the SQLite archive is queried, the JSON archive isn't read
+    if args.search:
+        search_db(user_id, args)
+        sys.exit(0)
+
+    # "facets" and "export" read the local archive, the facet index being refreshed if needed
+    if args.facets or args.export:
+        try:
+            facets.checkDate(args.since)
+            facets.checkDate(args.until)
+        except ValueError as error:
+            print('[-] Invalid date: ' + str(error))
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(80)  # ERROR: invalid search query
+        try:
+            archive = open_archive(user_id, config_json)
+            if args.facets:
+                show_facets(user_id, config_json, archive, args)
+            else:
+                export_likes(user_id, archive, args)
+            sys.exit(0)
+        except FileNotFoundError:
+            print('[-] Local archive ' + archive.path + ' not found')
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(40)  # ERROR: local archive not found
+
+    # If "print" mutually exclusive option is chosen we take a shortcut here
+    if args.print:
+        try:
+            if ISVERBOSE: print('[+] Printing local archive for user ' + user_id)
+            archive = open_archive(user_id, config_json)
+            print_all(archive)
+            sys.exit(0)
+        except FileNotFoundError:
+            print('[-] Local archive ' + archive.path + ' not found')
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(40)  # ERROR: local archive not found
+    # Once "print" is done the script exits in a controlled fashion
+
+    # If "tohtml" mutually exclusive option is chosen we do the same as with "print"
+    if args.tohtml:
+        try:
+            if ISVERBOSE: print('[+] Generating HTML output for user ' + user_id)
+            archive = open_archive(user_id, config_json)
+            metrics.setAccount(user_id)
+            with lock_account(user_id):
+                convert_all(archive.iterNewest(), archive.count(), user_id, config_json['last_timestamp'])
+            report_metrics(args.stats, args.metrics)
+            sys.exit(0)
+        except FileNotFoundError:
+            print('[-] Local archive ' + archive.path + ' not found')
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(40)  # ERROR: local archive not found
+    # Once "tohtml" is done the script exits in a controlled fashion
+
+    httpclient.getClient(read_timeout=args.timeout)
+    httpclient.getScheduler(args.deadline)
+    with lock_account(user_id):
+        fetch_account(user_id, config_json)
+    evict_cache()
+    print_http_summary()
+    report_metrics(args.stats, args.metrics)
 
 if __name__ == '__main__':
     main()
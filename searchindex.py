@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# Client-side search index of the HTML output: inverted index shards, row shards and a static search page
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+#  2026-10-17  Only the pages whose rows changed are indexed again, see SearchIndex.write()
+
+# External modules/dependencies
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+import re                      # Regular expression operations
+from array import array        # Efficient arrays of numeric values
+from html import escape        # Escape special HTML characters
+from publish import tempName   # Temporary names unique to the process and thread
+
+# Global settings
+SEARCHDIR = 'search'           # shards, next to the pages
+SEARCHPAGE = 'search.html'
+STATE = 'state.json'           # shards, pages and size of the index, read by the next run
+FORMAT = 1                     # bumped whenever the layout of the shards changes, so that the index is built again
+SHARDBYTES = 1 << 18           # bytes, average size of a term shard
+WORD = re.compile(r'\w+')      # same as [\p{L}\p{N}_]+ in the search page
+LINK = re.compile(r'https?://\S+')
+HOST = re.compile(r'^[a-z][a-z0-9+.-]*://(?:[^@/?#]*@)?([^:/?#]+)', re.IGNORECASE)
+FNVBASIS, FNVPRIME = 0x811c9dc5, 0x01000193
+
+
+def tokenize(text):
+    """
+    tokenize() returns the distinct words of a text, lowercase, links and words of a single character left out
+    """
+    return {word for word in WORD.findall(LINK.sub(' ', text.lower())) if len(word) > 1}
+
+
+def domains(url):
+    """
+    domains() returns the domain of a URL and its parent domains, e.g. www.python.org and python.org, without 'www.'
+    """
+    match = HOST.match(url)
+    if match is None:
+        return []
+    host = match.group(1).lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    labels = host.split('.')
+    return ['.'.join(labels[index:]) for index in range(len(labels) - 1)]
+
+
+def termShard(term, shards):
+    """
+    termShard() returns the shard holding a term: FNV-1a hash of its UTF-8 bytes, as computed by the search page
+    Args:
+    - term (string): the term
+    - shards (int): number of shards, a power of 2
+    """
+    digest = FNVBASIS
+    for byte in term.encode():
+        digest = ((digest ^ byte) * FNVPRIME) & 0xffffffff
+    return digest & (shards - 1)
+
+
+def encodePostings(postings):
+    """
+    encodePostings() returns the ROWs of a term as comma-separated hexadecimal gaps, ROWs increasing
+    Args:
+    - postings (list): ROWs, increasing
+    """
+    return ','.join(map('{:x}'.format, [ordinal - previous for previous, ordinal in zip([0] + postings, postings)]))
+
+
+def decodePostings(encoded):
+    """
+    decodePostings() returns the ROWs of a term encoded by encodePostings(), increasing
+    """
+    ordinals = []
+    ordinal = 0
+    for gap in encoded.split(','):
+        ordinal += int(gap, 16)
+        ordinals.append(ordinal)
+    return ordinals
+
+
+def shardCount(size):
+    """
+    shardCount() returns the number of term shards of an index: the smallest power of 2 keeping shards under
+    SHARDBYTES on average
+    Args:
+    - size (int): bytes of the encoded terms and postings
+    """
+    shards = 1
+    while shards * SHARDBYTES < size:
+        shards *= 2
+    return shards
+
+
+def entrySize(term, encoded):
+    """
+    entrySize() returns the bytes taken by a term and its postings in a shard, roughly
+    """
+    return len(term) + len(encoded) + 6
+
+
+def _writeScript(filename, text):
+    """
+    _writeScript() writes a shard unless the file already holds the same text, so unchanged shards keep their date
+    """
+    try:
+        with open(filename, 'r', encoding = 'utf-8') as script_in:
+            if script_in.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    temporary = tempName(filename)
+    with open(temporary, 'w', encoding = 'utf-8') as script_out:
+        script_out.write(text)
+    os.replace(temporary, filename)
+    return True
+
+
+class SearchIndex:
+    """
+    SearchIndex builds, while htmlrender.renderArchive() streams the rows, an inverted index of the words of the
+    tweets, of the author handles (@handle) and of the URL domains (site:domain), keyed by ROW. It's written as
+    JavaScript shards loaded on demand by a static search page, so that it also works from file:// with no server:
+    - terms-<shard>.js: postings of the terms hashed to the shard, see termShard()
+    - rows-<page>.js: the rows of a page shown in the results, only written when the page is rendered
+    - meta.js: number of rows and of term shards
+    Pages are anchored to the oldest like, as the HTML pages, so only the pages whose rows changed are indexed again:
+    the terms of each page are kept aside (pageterms-<page>.json) and only the shards holding the terms of the
+    changed pages are rewritten, see write()
+    Args:
+    - directory (string): directory holding the pages, see htmlrender.pageDir()
+    - name (string): Twitter user name
+    - pagesize (int): rows per page
+    """
+    def __init__(self, directory, name, pagesize):
+        self.directory = directory
+        self.name = name
+        self.pagesize = pagesize
+        self.path = os.path.join(directory, SEARCHDIR)
+        self.postings = {}  # term -> array of ROWs of the pages added, decreasing as rows come newest first
+        self.pages = {}     # page number -> terms, of the pages added
+        os.makedirs(self.path, exist_ok = True)
+        self.state = self.readState()
+
+    def readState(self):
+        """
+        readState() returns the state written by the previous run, None if the index has to be built from scratch:
+        missing (first run, or a run interrupted while writing the index), different format or page size
+        """
+        try:
+            with open(os.path.join(self.path, STATE), 'r') as state_in:
+                state = json.load(state_in)
+        except (FileNotFoundError, ValueError):
+            return None
+        if state.get('format') != FORMAT or state.get('pagesize') != self.pagesize:
+            return None
+        return state
+
+    def add(self, ordinal, row):
+        """
+        add() indexes a row, returns its terms
+        Args:
+        - ordinal (int): ROW value
+        - row (tuple): (user_id, user_name, user_handle, tweet_id, tweet_date, text, url)
+        """
+        terms = tokenize(row[5])
+        if row[2] and row[2] != 'N/A':
+            terms.add('@' + str(row[2]).lower())
+        if row[6] != 'N/A':
+            terms.update('site:' + domain for domain in domains(row[6]))
+        postings = self.postings
+        for term in terms:
+            if term in postings:
+                postings[term].append(ordinal)
+            else:
+                postings[term] = array('l', (ordinal,))
+        return terms
+
+    def hasPage(self, number):
+        """
+        hasPage() tells whether a page is indexed already, i.e. doesn't need to be added again when its rows didn't change
+        """
+        return (self.state is not None and number <= self.state['pages'] and os.path.isfile(self.rowsName(number))
+            and os.path.isfile(self.termsName(number)))
+
+    def addPage(self, number, first, page_rows):
+        """
+        addPage() indexes the rows of a page and writes its row shard
+        Args:
+        - number (int): page number
+        - first (int): ROW of the oldest row of the page
+        - page_rows (list): rows of the page, newest first
+        """
+        terms = set()
+        ordinal = first + len(page_rows) - 1
+        for row in page_rows:
+            terms |= self.add(ordinal, row)
+            ordinal -= 1
+        self.pages[number] = terms
+        self.writeRows(number, first, page_rows)
+
+    def rowsName(self, number):
+        """
+        rowsName() returns the file name of the row shard of a page
+        """
+        return os.path.join(self.path, 'rows-' + format(number, '04d') + '.js')
+
+    def termsName(self, number):
+        """
+        termsName() returns the file name of the terms of a page
+        """
+        return os.path.join(self.path, 'pageterms-' + format(number, '04d') + '.json')
+
+    def shardName(self, shard):
+        """
+        shardName() returns the file name of a term shard
+        """
+        return os.path.join(self.path, 'terms-' + format(shard, 'x') + '.js')
+
+    def readShard(self, shard):
+        """
+        readShard() returns the terms of a shard and their encoded postings, empty if the shard doesn't exist
+        """
+        try:
+            with open(self.shardName(shard), 'r', encoding = 'utf-8') as script_in:
+                script = script_in.read()
+        except FileNotFoundError:
+            return {}
+        return json.loads(script[script.index(', ') + 2:script.rindex(');')])
+
+    def readTerms(self, number):
+        """
+        readTerms() returns the terms of a page as written by the previous run, empty if unknown
+        """
+        try:
+            with open(self.termsName(number), 'r', encoding = 'utf-8') as terms_in:
+                return set(json.load(terms_in))
+        except FileNotFoundError:
+            return set()
+
+    def writeRows(self, number, first, page_rows):
+        """
+        writeRows() writes the row shard of a page: handle, name, tweet ID, date, text and URL of each row, oldest first
+        Args:
+        - number (int): page number
+        - first (int): ROW of the oldest row of the page
+        - page_rows (list): rows of the page, newest first
+        """
+        rows = [[row[2], row[1], row[3], row[4], row[5], row[6]] for row in reversed(page_rows)]
+        _writeScript(self.rowsName(number), 'LikesSearch.rows(' + str(number) + ', ' + str(first) + ', '
+            + json.dumps(rows, ensure_ascii = False, separators = (',', ':')) + ');\n')
+
+    def update(self, pages):
+        """
+        update() merges the pages added into the shards written by the previous run: the postings of the terms found in
+        the changed pages, before or after the change, are rewritten, the other terms are left as they are.
+        Returns the shards to be written, as shard -> terms, the number of shards, of terms and the size of the index
+        Args:
+        - pages (int): number of pages
+        """
+        changed = set(self.pages) | set(range(pages + 1, self.state['pages'] + 1))
+        affected = set(self.postings)
+        for number in changed:
+            affected |= self.readTerms(number)
+        shards, terms, size = self.state['shards'], self.state['terms'], self.state['size']
+        buckets = {}
+        for term in affected:
+            shard = termShard(term, shards)
+            if shard not in buckets:
+                buckets[shard] = self.readShard(shard)
+            encoded = buckets[shard].pop(term, None)
+            ordinals = []
+            if encoded is not None:
+                terms -= 1
+                size -= entrySize(term, encoded)
+                ordinals = [ordinal for ordinal in decodePostings(encoded) if ordinal // self.pagesize + 1 not in changed]
+            if term in self.postings:
+                ordinals = sorted(ordinals + self.postings[term].tolist())
+            if ordinals:
+                buckets[shard][term] = encodePostings(ordinals)
+                terms += 1
+                size += entrySize(term, buckets[shard][term])
+        if shardCount(size) != shards:
+            merged = {}
+            for shard in range(shards):
+                merged.update(buckets[shard] if shard in buckets else self.readShard(shard))
+            shards = shardCount(size)
+            buckets = {shard: {} for shard in range(shards)}
+            for term, encoded in merged.items():
+                buckets[termShard(term, shards)][term] = encoded
+        return buckets, shards, terms, size
+
+    def write(self, total, pages):
+        """
+        write() writes the term shards, the terms of the pages added, the metadata and the search page, then removes
+        the files left over by a larger index. The index is built from scratch when there's no state of a previous run,
+        merged into the previous one otherwise; nothing is written when no page was added. Returns the number of terms
+        Args:
+        - total (int): number of rows
+        - pages (int): number of pages
+        """
+        if self.state is not None and not self.pages and pages == self.state['pages']:
+            return self.state['terms']
+        statename = os.path.join(self.path, STATE)
+        if os.path.isfile(statename):
+            os.remove(statename)  # an interrupted write leaves no state, the next run builds the index from scratch
+        if self.state is None:
+            encoded = {term: encodePostings(postings[::-1].tolist()) for term, postings in self.postings.items()}
+            size = sum(entrySize(term, postings) for term, postings in encoded.items())
+            shards, terms = shardCount(size), len(encoded)
+            buckets = {shard: {} for shard in range(shards)}
+            for term, postings in encoded.items():
+                buckets[termShard(term, shards)][term] = postings
+        else:
+            buckets, shards, terms, size = self.update(pages)
+        for shard, bucket in buckets.items():
+            _writeScript(self.shardName(shard), 'LikesSearch.terms(' + str(shard) + ', '
+                + json.dumps(bucket, ensure_ascii = False, sort_keys = True, separators = (',', ':')) + ');\n')
+        for number, page_terms in self.pages.items():
+            _writeScript(self.termsName(number), json.dumps(sorted(page_terms), ensure_ascii = False) + '\n')
+        meta = {'name': self.name, 'rows': total, 'pagesize': self.pagesize, 'pages': pages, 'shards': shards}
+        _writeScript(os.path.join(self.path, 'meta.js'), 'LikesSearch.meta(' + json.dumps(meta) + ');\n')
+        for filename in os.listdir(self.path):
+            if filename.startswith('terms-') and filename.endswith('.js') and int(filename[6:-3], 16) >= shards:
+                os.remove(os.path.join(self.path, filename))
+            elif filename.startswith('rows-') and filename.endswith('.js') and int(filename[5:-3]) > pages:
+                os.remove(os.path.join(self.path, filename))
+            elif filename.startswith('pageterms-') and filename.endswith('.json') and int(filename[10:-5]) > pages:
+                os.remove(os.path.join(self.path, filename))
+        _writeScript(os.path.join(self.directory, SEARCHPAGE), PAGE.replace('{{TITLE}}', escape(self.name)))
+        _writeScript(statename, json.dumps({'format': FORMAT, 'pagesize': self.pagesize, 'pages': pages, 'shards': shards,
+            'terms': terms, 'size': size}) + '\n')
+        return terms
+
+
+# Static search page: loads meta.js, then the term shards of the query and the row shards of the results shown
+PAGE = r'''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{{TITLE}} likes, search</title>
+<style>body { font-family: sans-serif; } input { width: 40em; } table { border-collapse: collapse; }
+th, td { border: 1px solid #999; padding: 4px; vertical-align: top; } .info { color: #555; margin: 8px 0; }</style>
+</head><body>
+<nav><a href="../{{TITLE}}_index_latest.html">index</a></nav>
+<h1>{{TITLE}} likes, search</h1>
+<form id="form"><input id="query" type="search" autofocus placeholder="words @handle site:domain"> <button>Search</button></form>
+<div class="info" id="info">Loading...</div>
+<table><thead><tr><th>ROW</th><th>USER</th><th>TWEET_DATE</th><th>FULL TEXT</th><th>URL</th></tr></thead><tbody id="results"></tbody></table>
+<button id="more" hidden>More</button>
+<script>
+var LikesSearch = (function () {
+  var SHOWN = 50, meta = null, terms = {}, rows = {}, waiting = {}, matches = [], shown = 0;
+  function load(file, key, cache) {
+    if (key in cache) return Promise.resolve(cache[key]);
+    if (!waiting[file]) {
+      waiting[file] = new Promise(function (resolve, reject) {
+        var script = document.createElement('script');
+        script.src = 'search/' + file;
+        script.onerror = reject;
+        script.onload = function () { resolve(cache[key]); };
+        document.head.appendChild(script);
+      });
+    }
+    return waiting[file];
+  }
+  function hash(term) {
+    var bytes = new TextEncoder().encode(term), digest = 0x811c9dc5;
+    for (var i = 0; i < bytes.length; i++) digest = Math.imul(digest ^ bytes[i], 0x01000193) >>> 0;
+    return digest & (meta.shards - 1);
+  }
+  function postings(term) {
+    var shard = hash(term);
+    return load('terms-' + shard.toString(16) + '.js', shard, terms).then(function (bucket) {
+      var encoded = bucket[term], ordinals = [], previous = 0;
+      if (!encoded) return ordinals;
+      encoded.split(',').forEach(function (gap) { previous += parseInt(gap, 16); ordinals.push(previous); });
+      return ordinals;
+    });
+  }
+  function parse(query) {
+    var parsed = [];
+    query.toLowerCase().split(/\s+/).forEach(function (word) {
+      if (/^@\w+$/u.test(word) || /^site:\S+$/.test(word)) {
+        parsed.push(word.replace(/^site:www\./, 'site:'));
+      } else {
+        (word.replace(/https?:\/\/\S+/g, ' ').match(/[\p{L}\p{N}_]+/gu) || []).forEach(function (token) {
+          if (token.length > 1) parsed.push(token);
+        });
+      }
+    });
+    return parsed.filter(function (term, index) { return parsed.indexOf(term) === index; });
+  }
+  function intersect(lists) {
+    lists.sort(function (a, b) { return a.length - b.length; });
+    var result = lists[0];
+    lists.slice(1).forEach(function (list) {
+      var other = new Set(list);
+      result = result.filter(function (ordinal) { return other.has(ordinal); });
+    });
+    return result.reverse();
+  }
+  function cell(tr, text, href) {
+    var td = tr.insertCell(), node = td;
+    if (href) { node = document.createElement('a'); node.href = href; td.appendChild(node); }
+    node.textContent = text;
+  }
+  function showMore() {
+    var batch = matches.slice(shown, shown + SHOWN);
+    shown += batch.length;
+    document.getElementById('more').hidden = shown >= matches.length;
+    var pages = batch.map(function (ordinal) { return Math.floor(ordinal / meta.pagesize) + 1; });
+    Promise.all(pages.map(function (page) {
+      return load('rows-' + String(page).padStart(4, '0') + '.js', page, rows);
+    })).then(function () {
+      var body = document.getElementById('results');
+      batch.forEach(function (ordinal, index) {
+        var page = rows[pages[index]], row = page.rows[ordinal - page.first], tr = body.insertRow();
+        var pageName = 'page-' + String(pages[index]).padStart(4, '0') + '.html#r' + ordinal;
+        cell(tr, ordinal, pageName);
+        cell(tr, '@' + row[0] + ' (' + row[1] + ')');
+        cell(tr, row[3]);
+        cell(tr, row[4]);
+        cell(tr, row[5], /^https?:\/\//i.test(row[5]) ? row[5] : null);
+      });
+    });
+  }
+  function search(event) {
+    if (event) event.preventDefault();
+    var query = parse(document.getElementById('query').value);
+    document.getElementById('results').innerHTML = '';
+    matches = [];
+    shown = 0;
+    if (!query.length) {
+      document.getElementById('info').textContent = meta.rows + ' likes indexed';
+      document.getElementById('more').hidden = true;
+      return;
+    }
+    Promise.all(query.map(postings)).then(function (lists) {
+      matches = intersect(lists);
+      document.getElementById('info').textContent = matches.length + ' likes found, newest first';
+      showMore();
+    });
+  }
+  document.getElementById('form').addEventListener('submit', search);
+  document.getElementById('more').addEventListener('click', showMore);
+  return {
+    meta: function (data) { meta = data; search(); },
+    terms: function (shard, bucket) { terms[shard] = bucket; },
+    rows: function (page, first, data) { rows[page] = {first: first, rows: data}; }
+  };
+})();
+</script>
+<script src="search/meta.js"></script>
+</body></html>
+'''
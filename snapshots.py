@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# Content-deduplicated snapshot history of the obsolete archives, shared by likedtweetsv2.py and savemylikes.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version, replaces the full copies moved to _archive
+#  2026-10-17  Added readSnapshotFile(), used by importer.py
+#  2026-10-17  Chunks are written to temporary names unique to the process, as accounts share them
+#  2026-10-17  The newest snapshot is always kept, snapshots and pruning hold a lock on the archive directory
+#  2026-10-17  Files are read and chunked READSIZE bytes at a time rather than loaded as a whole
+
+# External modules/dependencies
+import argparse                # Parser for command-line options, arguments and sub-commands
+import hashlib                 # Secure hashes and message digests
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+import re                      # Regular expression operations
+import sys                     # System-specific parameters and functions
+import threading               # Thread-based parallelism
+import zlib                    # Compression compatible with gzip
+from datetime import datetime, timedelta  # Basic date and time types
+from journal import atomicDump  # Atomic write-then-rename of JSON documents
+from publish import FileLock, LOCKSUFFIX, tempName  # File locks, temporary names unique to the process and thread
+
+# Global settings
+ARCHIVEDIR = '_archive'
+CHUNKDIR = 'chunks'        # chunks, zlib-compressed, named after the SHA-1 of their contents
+SNAPSHOTDIR = 'snapshots'  # one manifest per snapshot: <name>/<timestamp>.json
+BOUNDARY = re.compile(rb'\n|\}, (?=\{)')  # end of a line (HTML) or of a record (JSON archive)
+AVGPIECES = 32             # a chunk ends, on average, every AVGPIECES lines/records (power of 2)
+MAXCHUNK = 1 << 20         # bytes, a chunk ends anyway once this large
+READSIZE = 1 << 20         # bytes read at a time by chunkFile()
+HOURLY = 24                # hours during which every snapshot is kept
+DAILY = 30                 # days during which the newest snapshot of each day is kept
+LOCK = threading.Lock()    # serializes snapshots and pruning of concurrent accounts, see archiveLock() for processes
+
+
+def chunkFile(file_in, size = READSIZE):
+    """
+    chunkFile() yields the chunks of a file. Chunks are cut at line/record boundaries, where the content of the
+    preceding line/record says so (content-defined chunking): when likes are added on top of an archive only the first
+    chunks change, the following ones are the same as in the previous snapshot and are stored once.
+    The file is read 'size' bytes at a time, only the chunk being cut is held in memory; chunks don't depend on 'size'.
+    A boundary straddling two reads is found once the second one is scanned, as matches are at most 3 bytes long
+    Args:
+    - file_in (file): the file, opened in binary mode
+    - size (int): bytes read at a time
+    """
+    data = bytearray()
+    piece = 0     # end of the last line/record
+    scanned = 0   # bytes already scanned for boundaries
+    while True:
+        block = file_in.read(size)
+        data += block
+        start = 0
+        for match in BOUNDARY.finditer(data, max(piece, scanned - 3)):
+            end = match.end()
+            if zlib.crc32(data[piece:end]) & (AVGPIECES - 1) == 0 or end - start >= MAXCHUNK:
+                yield bytes(data[start:end])
+                start = end
+            piece = end
+        if not block:
+            break
+        del data[:start]
+        piece -= start
+        scanned = len(data)
+    while start < len(data):
+        yield bytes(data[start:start + MAXCHUNK])
+        start += MAXCHUNK
+
+
+def chunkPath(archivedir, digest):
+    """
+    chunkPath() returns the file name of a chunk, e.g. _archive/chunks/3f/3f786850e387550fdab836ed7e6dc881de23001b
+    """
+    return os.path.join(archivedir, CHUNKDIR, digest[:2], digest)
+
+
+def storeChunk(archivedir, chunk):
+    """
+    storeChunk() stores a chunk unless it's already there, returns its digest and the number of bytes written
+    Args:
+    - archivedir (string): archive directory
+    - chunk (bytes): contents of the chunk
+    """
+    digest = hashlib.sha1(chunk).hexdigest()
+    filename = chunkPath(archivedir, digest)
+    if os.path.isfile(filename):
+        return digest, 0
+    os.makedirs(os.path.dirname(filename), exist_ok = True)
+    compressed = zlib.compress(chunk)
+    temporary = tempName(filename)
+    with open(temporary, 'wb') as chunk_out:
+        chunk_out.write(compressed)
+    os.replace(temporary, filename)
+    return digest, len(compressed)
+
+
+def manifestPath(archivedir, name, timestamp):
+    """
+    manifestPath() returns the file name of the manifest of a snapshot, e.g. _archive/snapshots/<name>/<timestamp>.json
+    """
+    return os.path.join(archivedir, SNAPSHOTDIR, name, timestamp + '.json')
+
+
+def archiveLock(archivedir):
+    """
+    archiveLock() returns the lock of an archive directory. Chunks are shared by all the accounts: it's held by
+    takeSnapshot() and prune() so that the garbage collection of a run (e.g. cron for another account) never removes a
+    chunk that a snapshot being taken by another process found already stored
+    Args:
+    - archivedir (string): archive directory
+    """
+    return FileLock(os.path.join(archivedir, CHUNKDIR + LOCKSUFFIX), wait = True)
+
+
+def takeSnapshot(archivedir, name, timestamp, filenames):
+    """
+    takeSnapshot() stores the given files as the snapshot of an account at a given timestamp: the chunks that are not
+    stored yet, then the manifest listing the chunks of each file. Returns the size of the files and the bytes written
+    Args:
+    - archivedir (string): archive directory
+    - name (string): Twitter user name
+    - timestamp (string): timestamp of the files, format: %Y-%m-%d-%H
+    - filenames (list): files to be stored
+    """
+    manifest = {'timestamp': timestamp, 'files': {}}
+    size, written = 0, 0
+    with LOCK, archiveLock(archivedir):
+        for filename in filenames:
+            digests, file_size = [], 0
+            with open(filename, 'rb') as file_in:
+                for chunk in chunkFile(file_in):
+                    digest, length = storeChunk(archivedir, chunk)
+                    digests.append(digest)
+                    written += length
+                    file_size += len(chunk)
+            manifest['files'][os.path.basename(filename)] = {'size': file_size, 'chunks': digests}
+            size += file_size
+        os.makedirs(os.path.dirname(manifestPath(archivedir, name, timestamp)), exist_ok = True)
+        atomicDump(manifest, manifestPath(archivedir, name, timestamp))
+    return size, written
+
+
+def listSnapshots(archivedir, name):
+    """
+    listSnapshots() returns the timestamps of the snapshots of an account, oldest first
+    Args:
+    - archivedir (string): archive directory
+    - name (string): Twitter user name
+    """
+    try:
+        filenames = os.listdir(os.path.join(archivedir, SNAPSHOTDIR, name))
+    except FileNotFoundError:
+        return []
+    return sorted(filename[:-5] for filename in filenames if filename.endswith('.json'))
+
+
+def readSnapshot(archivedir, name, timestamp):
+    """
+    readSnapshot() returns the manifest of a snapshot, FileNotFoundError is raised when there's no such snapshot
+    """
+    with open(manifestPath(archivedir, name, timestamp), 'r') as manifest_in:
+        return json.load(manifest_in)
+
+
+def readSnapshotFile(archivedir, name, timestamp, filename):
+    """
+    readSnapshotFile() returns the contents of one of the files of a snapshot, KeyError is raised when the snapshot
+    doesn't hold the file
+    Args:
+    - archivedir (string): archive directory
+    - name (string): Twitter user name
+    - timestamp (string): timestamp of the snapshot
+    - filename (string): name of the file, as listed by the manifest
+    """
+    entry = readSnapshot(archivedir, name, timestamp)['files'][filename]
+    pieces = []
+    for digest in entry['chunks']:
+        with open(chunkPath(archivedir, digest), 'rb') as chunk_in:
+            pieces.append(zlib.decompress(chunk_in.read()))
+    return b''.join(pieces)
+
+
+def restoreSnapshot(archivedir, name, timestamp, outdir):
+    """
+    restoreSnapshot() rebuilds the files of a snapshot into a directory, files already there are not overwritten.
+    Returns the list of restored files
+    Args:
+    - archivedir (string): archive directory
+    - name (string): Twitter user name
+    - timestamp (string): timestamp of the snapshot
+    - outdir (string): destination directory
+    """
+    manifest = readSnapshot(archivedir, name, timestamp)
+    restored = []
+    os.makedirs(outdir, exist_ok = True)
+    for filename, entry in manifest['files'].items():
+        target = os.path.join(outdir, filename)
+        if os.path.exists(target):
+            print('[!] "' + target + '" already exists, skipping!')
+            continue
+        temporary = tempName(target)
+        with open(temporary, 'wb') as file_out:
+            for digest in entry['chunks']:
+                with open(chunkPath(archivedir, digest), 'rb') as chunk_in:
+                    file_out.write(zlib.decompress(chunk_in.read()))
+        os.replace(temporary, target)
+        restored.append(target)
+    return restored
+
+
+def expired(timestamps, now, keep = None):
+    """
+    expired() returns the timestamps to be dropped by the retention policy: snapshots younger than HOURLY hours are kept,
+    then the newest snapshot of each day younger than DAILY days, older ones are dropped. The newest snapshot and the
+    one given by 'keep' are kept however old, e.g. after a gap of more than DAILY days between runs.
+    Timestamps that can't be parsed are kept
+    Args:
+    - timestamps (list): timestamps of the snapshots, format: %Y-%m-%d-%H
+    - now (datetime): current time
+    - keep (string): timestamp of the snapshot just taken
+    """
+    drop = []
+    days = set()
+    for timestamp in sorted(timestamps, reverse = True)[1:]:
+        if timestamp == keep:
+            continue
+        try:
+            taken = datetime.strptime(timestamp, '%Y-%m-%d-%H')
+        except ValueError:
+            continue
+        if now - taken < timedelta(hours = HOURLY):
+            continue
+        if now - taken < timedelta(days = DAILY) and taken.date() not in days:
+            days.add(taken.date())
+            continue
+        drop.append(timestamp)
+    return drop
+
+
+def prune(archivedir, name, now = None, keep = None):
+    """
+    prune() applies the retention policy to the snapshots of an account, then removes the chunks no longer referenced
+    by any snapshot. Returns the timestamps of the removed snapshots
+    Args:
+    - archivedir (string): archive directory
+    - name (string): Twitter user name
+    - now (datetime): current time, defaults to now
+    - keep (string): timestamp of the snapshot just taken, kept whatever its age
+    """
+    with LOCK, archiveLock(archivedir):
+        drop = expired(listSnapshots(archivedir, name), now or datetime.now(), keep)
+        for timestamp in drop:
+            os.remove(manifestPath(archivedir, name, timestamp))
+        if drop:
+            collectGarbage(archivedir)
+    return drop
+
+
+def collectGarbage(archivedir):
+    """
+    collectGarbage() removes the chunks not referenced by any snapshot of any account, returns how many were removed.
+    The caller holds archiveLock()
+    Args:
+    - archivedir (string): archive directory
+    """
+    referenced = set()
+    snapshotdir = os.path.join(archivedir, SNAPSHOTDIR)
+    for name in os.listdir(snapshotdir):
+        for timestamp in listSnapshots(archivedir, name):
+            for entry in readSnapshot(archivedir, name, timestamp)['files'].values():
+                referenced.update(entry['chunks'])
+    removed = 0
+    chunkdir = os.path.join(archivedir, CHUNKDIR)
+    for prefix in os.listdir(chunkdir):
+        digests = os.listdir(os.path.join(chunkdir, prefix))
+        for digest in digests:
+            if digest not in referenced:
+                os.remove(os.path.join(chunkdir, prefix, digest))
+                removed += 1
+        if all(digest not in referenced for digest in digests):
+            os.rmdir(os.path.join(chunkdir, prefix))
+    return removed
+
+
+def main():
+    """
+    main() lists, restores or prunes the snapshots of an account
+    """
+    parser = argparse.ArgumentParser(description = 'Lists, restores and prunes the snapshots of the obsolete archives.')
+    parser.add_argument('-d', '--dir', metavar = '<directory>', default = ARCHIVEDIR, type = str, help = 'Archive directory')
+    parser.add_argument('-o', '--output', metavar = '<directory>', default = '.', type = str, help = 'Destination of --restore')
+    group = parser.add_mutually_exclusive_group(required = True)
+    group.add_argument('-l', '--list', metavar = '<User name>', type = str, help = 'List the snapshots of an account')
+    group.add_argument('-r', '--restore', metavar = ('<User name>', '<timestamp>'), nargs = 2, type = str, help = 'Restore a snapshot')
+    group.add_argument('-P', '--prune', metavar = '<User name>', type = str, help = 'Apply the retention policy')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print('[-] "' + args.dir + '" is not present!')
+        sys.exit(60)  # ERROR: archive directory not found
+
+    if args.list:
+        for timestamp in listSnapshots(args.dir, args.list):
+            manifest = readSnapshot(args.dir, args.list, timestamp)
+            print(timestamp + '  ' + ', '.join(filename + ' (' + str(entry['size']) + ' bytes)' for filename, entry in manifest['files'].items()))
+    elif args.restore:
+        name, timestamp = args.restore
+        try:
+            for filename in restoreSnapshot(args.dir, name, timestamp, args.output):
+                print('[+] Restored: ' + filename)
+        except FileNotFoundError:
+            print('[-] Snapshot ' + timestamp + ' of ' + name + ' not found')
+            print('[-] Quitting!', end = '\n\n')
+            sys.exit(40)  # ERROR: local archive not found
+    else:
+        for timestamp in prune(args.dir, args.prune):
+            print('[+] Removed snapshot: ' + timestamp)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Tests of the request scheduler of httpclient.py, against bench/mockserver.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import os                      # Miscellaneous operating system interfaces
+import sys                     # System-specific parameters and functions
+import threading               # Thread-based parallelism
+import time                    # Time access and conversions
+import unittest                # Unit testing framework
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+import httpclient              # Pooled keep-alive HTTP client and request scheduler
+import likedtweetsv2           # Archive of the liked tweets, API v2
+import mockserver              # Local stand-in for the liked_tweets endpoint
+
+# Global settings
+LIMIT = 4     # requests per window, as served by the mock server
+WINDOW = 1.0  # seconds, rate limit window of the mock server
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = mockserver.startServer(100, limit = LIMIT, window = WINDOW)
+        self.url = self.server.url + '/2/users/1/liked_tweets'
+        self.client = httpclient.HttpClient()
+        self.sleeps = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        time.sleep(seconds)
+
+    def exhaust(self, token):
+        # spends the whole budget of the token, the next request is answered with a 429
+        for _ in range(LIMIT):
+            self.server.budget('v2', 'Bearer ' + token)
+
+    def request(self, scheduler, token):
+        return scheduler.request(self.url, token, headers = {'Authorization': 'Bearer ' + token})
+
+    def test_pacing(self):
+        # requests are spread as the budget runs low, then held until the window resets
+        scheduler = httpclient.Scheduler(self.client, 30.0, sleep = self.sleep)
+        start = time.time()
+        for _ in range(LIMIT + 2):
+            self.assertEqual(self.request(scheduler, 'pacing').status_code, 200)
+        self.assertGreater(len(self.sleeps), 0)
+        self.assertGreaterEqual(time.time() - start, WINDOW - 1.0 / LIMIT)
+        self.assertEqual(self.server.requests, LIMIT + 2 + scheduler.retries)
+
+    def test_retry_after(self):
+        # the budget is unknown to the scheduler: the 429 is retried once Retry-After has elapsed
+        self.exhaust('retry')
+        scheduler = httpclient.Scheduler(self.client, 30.0, sleep = self.sleep)
+        self.assertEqual(self.request(scheduler, 'retry').status_code, 200)
+        self.assertEqual(scheduler.retries, 1)
+        self.assertGreaterEqual(self.sleeps[0], 1.0)
+
+    def test_reserve(self):
+        # requests sharing a low budget are spaced out: each one reserves the send time following the previous one
+        scheduler = httpclient.Scheduler(self.client, 30.0, sleep = self.sleep, clock = lambda: 1000.0)
+        scheduler.budgets['shared'] = (2, 1030.0)
+        threads = [threading.Thread(target = lambda: self.sleeps.append(scheduler.reserve('shared'))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(self.sleeps), [10.0, 20.0])
+        self.assertEqual(scheduler.reserve('other'), 0.0)
+
+    def test_deadline(self):
+        # waiting as per Retry-After would exceed the deadline: the request is given up at once
+        self.exhaust('deadline')
+        scheduler = httpclient.Scheduler(self.client, 0.5, sleep = self.sleep)
+        with self.assertRaises(httpclient.DeadlineError) as raised:
+            self.request(scheduler, 'deadline')
+        self.assertEqual(raised.exception.status, 429)
+        self.assertEqual(self.sleeps, [])
+
+    def test_deadline_exit_code(self):
+        # a request given up at the deadline quits with an exit code the shell sees as is, i.e. below 256
+        self.exhaust('exit')
+        previous, httpclient.SCHEDULER = httpclient.SCHEDULER, httpclient.Scheduler(self.client, 0.5, sleep = self.sleep)
+        likedtweetsv2.ISVERBOSE = False
+        try:
+            with self.assertRaises(SystemExit) as raised:
+                likedtweetsv2.connect2Endpoint(self.url, 'exit', {})
+        finally:
+            httpclient.SCHEDULER = previous
+        self.assertEqual(raised.exception.code, 110)
+
+if __name__ == '__main__':
+    unittest.main()
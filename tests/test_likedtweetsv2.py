@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Tests of the archive and author cache handling of likedtweetsv2.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import json                    # JSON encoder and decoder
+import os                      # Miscellaneous operating system interfaces
+import sys                     # System-specific parameters and functions
+import tempfile                # Generate temporary files and directories
+import unittest                # Unit testing framework
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+import likedtweetsv2           # Archive of the liked tweets, API v2
+import likestore               # Archive storage backends
+import mockserver              # Local stand-in for the liked_tweets endpoint
+import records                 # Compact in-memory tweet records
+from journal import PageJournal  # Crash-safe page journal
+
+
+class AccountTest(unittest.TestCase):
+    """
+    AccountTest runs each test in a temporary directory, the working directory of the script
+    """
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tempdir.name)
+        likedtweetsv2.ISVERBOSE = False
+        likedtweetsv2.TIMESTAMP = '2026-10-17-12'
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tempdir.cleanup()
+
+
+class SaveDataTest(AccountTest):
+    def test_legacy_archive(self):
+        # the authors embedded in the records by former versions are moved to the cache, not dropped
+        legacy = [{'id': '2', 'text': 'older', 'author_id': '999', 'created_at': '2022-08-04T10:00:00.000Z',
+            'author_name': 'Legacy Author', 'author_handle': 'legacy'}]
+        with open('bench_likedtweets_2022-08-04-10.json', 'w') as archive_out:
+            json.dump(legacy, archive_out)
+        previous = likestore.JsonStore('bench_likedtweets_2022-08-04-10.json')
+        new = [records.Tweet('3', '111', '2026-10-17T10:00:00.000Z', 'newer')]
+        journal = PageJournal('bench_likedtweets.journal', 'incremental')
+
+        likedtweetsv2.saveData('bench', {}, new, previous, journal, {})
+
+        with open(likedtweetsv2.AUTHORCACHE, 'r') as authors_in:
+            self.assertEqual(json.load(authors_in), {'999': {'name': 'Legacy Author', 'username': 'legacy'}})
+        archive = list(likestore.JsonStore('bench_likedtweets_2026-10-17-12.json').iterNewest())
+        self.assertEqual([tweet['id'] for tweet in archive], ['3', '2'])
+        self.assertFalse(any('author_name' in tweet or 'author_handle' in tweet for tweet in archive))
+
+
+class FetchLikesTest(AccountTest):
+    def setUp(self):
+        super().setUp()
+        self.server = mockserver.startServer(250)
+        self.url = self.server.url + '/2/users/1/liked_tweets'
+        self.connect2Endpoint = likedtweetsv2.connect2Endpoint
+
+    def tearDown(self):
+        likedtweetsv2.connect2Endpoint = self.connect2Endpoint
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def test_resume(self):
+        # the run is killed once two pages are journaled, the author cache not being saved yet
+        def crash(url, bearer_token, query_params):
+            if self.server.requests == 2:
+                raise KeyboardInterrupt
+            return self.connect2Endpoint(url, bearer_token, query_params)
+        likedtweetsv2.connect2Endpoint = crash
+        journal = PageJournal('bench_likedtweets.journal', 'full')
+        with self.assertRaises(KeyboardInterrupt):
+            likedtweetsv2.fetchLikes(self.url, 'synthetic', set(), {}, journal, None)
+        likedtweetsv2.connect2Endpoint = self.connect2Endpoint
+
+        journal = PageJournal('bench_likedtweets.journal', 'full')
+        self.assertTrue(journal.replay())
+        authors = likedtweetsv2.readAuthors()
+        output_list, count, page_size = likedtweetsv2.fetchLikes(self.url, 'synthetic', set(), authors, journal, None)
+        self.assertEqual(len(output_list), 250)
+        self.assertEqual(count, 1)
+        self.assertTrue(all(tweet.row(authors)[1] != 'N/A' for tweet in output_list))
+
+if __name__ == '__main__':
+    unittest.main()
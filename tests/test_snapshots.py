@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Tests of the retention policy of snapshots.py
+# author: Carmelo C
+# email: carmelo.califano@gmail.com
+# history, date format ISO 8601:
+#  2026-10-17  Initial version
+
+# External modules/dependencies
+import io                      # Core tools for working with streams
+import os                      # Miscellaneous operating system interfaces
+import sys                     # System-specific parameters and functions
+import tempfile                # Generate temporary files and directories
+import unittest                # Unit testing framework
+from datetime import datetime  # Basic date and time types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import snapshots               # Content-deduplicated snapshots of the obsolete files
+
+
+class ExpiredTest(unittest.TestCase):
+    NOW = datetime(2026, 10, 17, 12)
+
+    def test_recent(self):
+        # the last 24 hours are all kept, then the newest snapshot of each day
+        timestamps = ['2026-10-17-10', '2026-10-16-20', '2026-10-16-06', '2026-10-16-04', '2026-10-15-08']
+        self.assertEqual(snapshots.expired(timestamps, self.NOW), ['2026-10-16-04'])
+
+    def test_gap_keeps_newest(self):
+        # no run for more than DAILY days: the newest snapshot is kept however old
+        timestamps = ['2022-08-04-10', '2022-08-03-10', '2022-08-02-10']
+        self.assertEqual(snapshots.expired(timestamps, self.NOW), ['2022-08-03-10', '2022-08-02-10'])
+
+    def test_keep(self):
+        timestamps = ['2022-08-04-10', '2022-08-03-10', '2022-08-02-10']
+        self.assertEqual(snapshots.expired(timestamps, self.NOW, keep = '2022-08-02-10'), ['2022-08-03-10'])
+
+
+class ChunkFileTest(unittest.TestCase):
+    def test_read_size(self):
+        # boundaries straddling two reads are found: chunks are the same whatever the read size
+        data = b''.join(b'{"id": "%d", "text": "like %d"}, ' % (index, index * 7) for index in range(5000)) + b'{"id": "0"}]\n'
+        chunks = list(snapshots.chunkFile(io.BytesIO(data), len(data)))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), data)
+        for size in (1, 2, 3, 7, 4096):
+            self.assertEqual(list(snapshots.chunkFile(io.BytesIO(data), size)), chunks)
+
+
+class PruneTest(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.archivedir = self.tempdir.name
+        self.filename = os.path.join(self.archivedir, 'bench_likedtweets.json')
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def snapshot(self, timestamp, data):
+        with open(self.filename, 'wb') as file_out:
+            file_out.write(data)
+        snapshots.takeSnapshot(self.archivedir, 'bench', timestamp, [self.filename])
+
+    def test_gap_keeps_newest(self):
+        # a snapshot taken after a long gap between runs survives the pruning that follows it
+        self.snapshot('2022-08-03-10', b'[{"id": 1}]\n')
+        self.snapshot('2022-08-04-10', b'[{"id": 2}, {"id": 1}]\n')
+        dropped = snapshots.prune(self.archivedir, 'bench', datetime(2026, 10, 17, 12), keep = '2022-08-04-10')
+        self.assertEqual(dropped, ['2022-08-03-10'])
+        self.assertEqual(snapshots.listSnapshots(self.archivedir, 'bench'), ['2022-08-04-10'])
+        data = snapshots.readSnapshotFile(self.archivedir, 'bench', '2022-08-04-10', 'bench_likedtweets.json')
+        self.assertEqual(data, b'[{"id": 2}, {"id": 1}]\n')
+
+if __name__ == '__main__':
+    unittest.main()